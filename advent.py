@@ -1,84 +1,512 @@
 #!/usr/bin/env python
 import argparse
+import glob
 import importlib
+import io
 import logging
 import os
+import pickle
 import sys
+import time
+from contextlib import nullcontext
+from functools import partial
 
-from rich import box
-from rich.console import Console
-from rich.logging import RichHandler
-from rich.table import Table
+from util import (
+        ChromeTraceSink, JSONLinesSink, format_duration, record_timings,
+        set_plain_output, span_attributes, span_sink, strip_markup, timing)
 
-from util import timing
 
+def get_module_path(year: int, day: int) -> str:
+    return f'y{year}.d{day:02d}'
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-t', '--test', action='store_true')
-    parser.add_argument('-v', '--verbose', action='store_true')
-    parser.add_argument('-d', '--draw', action='store_true')
-    parser.add_argument('-i', '--input-file', required=False)
-    parser.add_argument('year', type=int)
-    parser.add_argument('day', type=int)
-    args = parser.parse_args()
 
-    console = Console()
-    loglevel = 'DEBUG' if args.verbose else 'INFO'
-    handler = RichHandler(markup=True)
+def get_input_path(year: int, day: int, test: bool = False) -> str:
+    subdir = 'tests' if test else 'inputs'
+    return os.path.join(f'y{year}', subdir, f'{day:02d}')
+
+
+def find_years() -> tuple[int]:
+    """Return all the years that have puzzle modules, in order."""
+    paths = glob.glob('y[0-9][0-9][0-9][0-9]')
+    return tuple(sorted(int(os.path.basename(p)[1:]) for p in paths))
+
+
+def find_days(year: int) -> tuple[int]:
+    """Return all the days that have puzzle modules for `year`, in order."""
+    paths = glob.glob(os.path.join(f'y{year}', 'd[0-9][0-9].py'))
+    return tuple(sorted(int(os.path.basename(p)[1:3]) for p in paths))
+
+
+def run_day(
+        year: int,
+        day: int,
+        inpath: str,
+        test: bool = False,
+        draw: bool = False) -> tuple:
+    """Import the module for a puzzle day, and run it on an input file.
+
+    Return the results of the two parts as a tuple.
+    """
+    m = importlib.import_module(get_module_path(year, day), 'adventofcode')
+    kwargs = get_run_kwargs(test, draw)
+    with span_attributes(year=year, day=day):
+        if inpath == '-':
+            return m.run(sys.stdin, **kwargs)
+        with open(inpath, 'r') as infile:
+            return m.run(infile, **kwargs)
+
+
+def get_run_kwargs(test: bool = False, draw: bool = False) -> dict:
+    kwargs = {}
+    if test:
+        kwargs['test'] = True
+    if draw:
+        kwargs['draw'] = True
+    return kwargs
+
+
+def run_day_cached(
+        year: int,
+        day: int,
+        inpath: str,
+        test: bool = False,
+        cache=None,
+        refresh: bool = False) -> tuple:
+    """Run a puzzle day, reusing an earlier result from the cache if we can.
+
+    The cache key covers the source code of the day's module and any local
+    modules it uses, the input data, and the flags it runs with. If `refresh`
+    is True, the day is always run and the new result replaces any old one.
+
+    Return the results of the two parts as a tuple, and the cache entry that
+    was used, or None if the day had to be run.
+    """
+    from cache import ResultCache, get_run_key
+
+    if cache is None:
+        cache = ResultCache()
+    m = importlib.import_module(get_module_path(year, day), 'adventofcode')
+    if inpath == '-':
+        data = sys.stdin.buffer.read()
+    else:
+        with open(inpath, 'rb') as infile:
+            data = infile.read()
+    key = get_run_key(m, data, {'test': test})
+    if not refresh:
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['result'], entry
+
+    kwargs = get_run_kwargs(test)
+    with span_attributes(year=year, day=day), record_timings() as timings:
+        start = time.perf_counter_ns()
+        result = m.run(io.StringIO(data.decode('utf-8')), **kwargs)
+        dur = time.perf_counter_ns() - start
+    entry = {
+            'result': result,
+            'duration': dur,
+            'timings': timings,
+            'created': time.time(),
+            }
+    try:
+        cache.put(key, entry)
+    except (pickle.PicklingError, TypeError, AttributeError) as err:
+        logging.warning(f"Couldn't cache the result: {err}")
+    return result, None
+
+
+def get_cache(args):
+    """Return the result cache to use for a run, or None if it's disabled.
+
+    Drawing and profiling always run the day for real.
+    """
+    if args.no_cache or args.draw or args.profile:
+        return None
+    from cache import ResultCache
+
+    return ResultCache(max_size=args.cache_size * 1024 * 1024)
+
+
+def get_trace_sink(path: str):
+    """Return a span sink for `path`, chosen by its file extension.
+
+    Files ending in `.jsonl` get one JSON span record per line, anything else
+    gets the Chrome trace-event format.
+    """
+    if path.endswith('.jsonl'):
+        return JSONLinesSink(path)
+    return ChromeTraceSink(path)
+
+
+def run_batch_day(
+        year: int,
+        day: int,
+        test: bool = False,
+        cache=None,
+        refresh: bool = False) -> tuple:
+    """Run a single day as part of a batch, inside a worker process.
+
+    Return a tuple of (year, day, part 1, part 2, wall time, CPU time, cached,
+    error), with the times in nanoseconds. The results are converted to
+    strings so that they can always be sent back to the parent process.
+    """
+    inpath = get_input_path(year, day, test)
+    wall = time.perf_counter_ns()
+    cpu = time.process_time_ns()
+    p1 = p2 = error = None
+    cached = False
+    try:
+        if cache is None:
+            p1, p2 = run_day(year, day, inpath, test)
+        else:
+            (p1, p2), entry = run_day_cached(
+                    year, day, inpath, test, cache, refresh)
+            cached = entry is not None
+        p1, p2 = str(p1), str(p2)
+    except FileNotFoundError:
+        error = f"No such file '{inpath}'"
+    except Exception as err:
+        error = f"{type(err).__name__}: {err}"
+    wall = time.perf_counter_ns() - wall
+    cpu = time.process_time_ns() - cpu
+    return (year, day, p1, p2, wall, cpu, cached, error)
+
+
+def init_batch_worker(loglevel: str):
+    """Configure logging for a batch worker process.
+
+    The per-part timing messages from many days running at once would just be
+    noise, so the workers only log warnings and above, unless verbose output
+    was requested.
+    """
+    logging.getLogger().setLevel(loglevel)
+
+
+def run_batch(
+        days: tuple[tuple[int, int]],
+        test: bool = False,
+        workers: int | None = None,
+        loglevel: str = 'WARNING',
+        cache=None,
+        refresh: bool = False) -> list[tuple]:
+    """Run many puzzle days in parallel, using a pool of worker processes.
+
+    `days` is a sequence of (year, day) pairs. The pool defaults to one worker
+    per CPU core. If `cache` is given, days are looked up in the result cache
+    before running them. Return the results from `run_batch_day` for each day,
+    in the same order as `days`.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    results = {}
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_batch_worker,
+            initargs=(loglevel,)) as pool:
+        futures = {
+                pool.submit(
+                    run_batch_day, year, day, test, cache, refresh): (year, day)
+                for year, day in days}
+        for future in as_completed(futures):
+            result = future.result()
+            year, day = futures[future]
+            if result[-1]:
+                logging.error(f"{year} Day {day}: {result[-1]}")
+            else:
+                logging.info(
+                        f"{year} Day {day} finished in "
+                        f"{format_duration(result[4])}")
+            results[(year, day)] = result
+    return [results[k] for k in days]
+
+
+class PlainFormatter(logging.Formatter):
+    """A log formatter that strips out Rich markup and emoji codes."""
+    def format(self, record) -> str:
+        return strip_markup(super().format(record))
+
+
+def setup_logging(verbose: bool = False, plain: bool = False) -> str:
+    """Configure logging to the console, and return the log level.
+
+    Rich is only imported if we're actually going to use it, because it
+    takes a noticeable chunk of the startup time of short runs.
+    """
+    loglevel = 'DEBUG' if verbose else 'INFO'
+    if plain:
+        handler = logging.StreamHandler()
+        handler.setFormatter(PlainFormatter('%(levelname)-8s %(message)s'))
+    else:
+        from rich.logging import RichHandler
+
+        handler = RichHandler(markup=True)
     fmt = '%(message)s'
     logging.basicConfig(level=loglevel, format=fmt, handlers=[handler])
+    return loglevel
+
+
+def get_console(plain: bool = False):
+    """Return a Rich console, or None for plain output."""
+    if plain:
+        return None
+    from rich.console import Console
+
+    return Console()
+
+
+def print_plain_table(
+        title: str, columns: tuple, rows: list, caption: str | None = None):
+    headings = [c[0] for c in columns]
+    lines = [headings]
+    for row in rows:
+        cells = [strip_markup(str(x)).split('\n') for x in row]
+        height = max(len(c) for c in cells)
+        for i in range(height):
+            lines.append([c[i] if i < len(c) else '' for c in cells])
+    widths = [max(len(line[i]) for line in lines) for i in range(len(columns))]
+
+    print(title)
+    for line in lines:
+        cells = []
+        for i, cell in enumerate(line):
+            if columns[i][1] == 'right':
+                cells.append(cell.rjust(widths[i]))
+            else:
+                cells.append(cell.ljust(widths[i]))
+        print('  '.join(cells).rstrip())
+    if caption:
+        print(caption)
+
+
+def print_table(
+        console,
+        title: str,
+        columns: tuple,
+        rows: list,
+        caption: str | None = None,
+        padding: tuple = (0, 2),
+        show_lines: bool = False):
+    """Print a table of results.
+
+    `columns` is a sequence of (heading, justify, style) for each column. If
+    `console` is None, the table is printed as plain text.
+    """
+    if console is None:
+        print()
+        print_plain_table(title, columns, rows, caption)
+        return
+
+    from rich import box
+    from rich.table import Table
+
+    table = Table(
+            box=box.ROUNDED,
+            padding=padding,
+            title=title,
+            caption=caption,
+            show_lines=show_lines)
+    for heading, justify, style in columns:
+        table.add_column(heading, justify=justify, style=style, overflow='fold')
+    for row in rows:
+        table.add_row(*row)
+    console.print()
+    console.print(table, justify='center')
+
+
+def print_results(console, year: int, day: int, p1, p2):
+    columns = (('Part', 'left', None), ('Result', 'right', 'cyan'))
+    rows = (('Part 1', str(p1)), ('Part 2', str(p2)))
+    print_table(
+            console, f"{year} Day {day} Results", columns, rows,
+            padding=(0, 4), show_lines=True)
+
+
+def print_profile(console, title: str, columns: tuple, rows: list):
+    columns = ((columns[0], 'left', None),) + tuple(
+            (c, 'right', 'cyan') for c in columns[1:])
+    print_table(console, f"Profile: {title}", columns, rows, padding=(0, 1))
 
-    year = f'y{args.year}'
-    day = f'{args.day:02d}'
-    modpath = f'{year}.d{day}'
-    m = importlib.import_module(modpath, 'adventofcode')
+
+def print_batch_results(console, results: list[tuple], wall: int):
+    columns = (
+            ('Year', 'left', None),
+            ('Day', 'right', None),
+            ('Part 1', 'right', 'cyan'),
+            ('Part 2', 'right', 'cyan'),
+            ('Wall', 'right', 'green'),
+            ('CPU', 'right', 'green'),
+            ('Cached', 'left', 'yellow'),
+            )
+    rows = []
+    for year, day, p1, p2, dur, cpu, cached, error in results:
+        if error:
+            p1 = f'[red]{error}[/]'
+            p2 = ''
+        rows.append((
+                str(year), str(day), p1, p2,
+                format_duration(dur), format_duration(cpu),
+                'yes' if cached else ''))
+    print_table(
+            console, "Batch Results", columns, rows,
+            caption=f"Wall-clock time {format_duration(wall)}")
+
+
+def run_remote(args, console) -> int:
+    """Have a solver server run the day, and print its results."""
+    from server import request
+
+    if args.input_file == '-':
+        logging.error("Can't send standard input to the server")
+        return 1
+    try:
+        response = request(
+                args.year, args.day, args.input_file, args.test, args.socket,
+                not args.no_cache, args.refresh)
+    except OSError as err:
+        logging.error(f"Couldn't reach the server at '{args.socket}': {err}")
+        return 1
+    if not response['ok']:
+        logging.error(response['error'])
+        return 1
+    cached = ' (cached)' if response['cached'] else ''
+    logging.info(
+            f"Server ran {args.year} Day {args.day} in "
+            f"{format_duration(response['duration'])}{cached}")
+    print_results(console, args.year, args.day, *response['result'])
+    return 0
+
+
+def main(args) -> int:
+    setup_logging(args.verbose, args.no_rich)
+    set_plain_output(args.no_rich)
+    console = get_console(args.no_rich)
+
+    if args.all or args.day is None:
+        if args.all:
+            years = find_years()
+        elif args.year is not None:
+            years = (args.year,)
+        else:
+            logging.error("Give a year and day, a year, or --all")
+            return 1
+        days = tuple((y, d) for y in years for d in find_days(y))
+        if not days:
+            logging.error("No puzzle modules found")
+            return 1
+        if args.trace or args.profile:
+            logging.warning(
+                    "Tracing and profiling are not supported for batch runs")
+        mode = '[yellow]test[/]' if args.test else '[yellow]actual[/]'
+        workerlevel = 'DEBUG' if args.verbose else 'WARNING'
+        with timing(f"Executing {len(days)} days in {mode} mode") as start:
+            results = run_batch(
+                    days, args.test, args.jobs, workerlevel,
+                    get_cache(args), args.refresh)
+            wall = time.perf_counter_ns() - start
+        print_batch_results(console, results, wall)
+        return int(any(r[-1] for r in results))
+
+    if args.remote:
+        return run_remote(args, console)
 
     if args.input_file:
         inpath = args.input_file
-    elif args.test:
-        inpath = os.path.join(year, 'tests', day)
     else:
-        inpath = os.path.join(year, 'inputs', day)
+        inpath = get_input_path(args.year, args.day, args.test)
 
     mode = '[yellow]test[/]' if args.test else '[yellow]actual[/]'
     title = f"Executing {args.year} Day {args.day} in {mode} mode"
-    retcode = 0
+    fn = partial(run_day, args.year, args.day, inpath, args.test, args.draw)
+    sink = span_sink(get_trace_sink(args.trace)) if args.trace else nullcontext()
+    cache = get_cache(args)
+    entry = None
     try:
-        with timing(title):
-            infile = None
-            if inpath == '-':
-                infile = sys.stdin
+        with sink, timing(title):
+            if cache is not None:
+                (p1, p2), entry = run_day_cached(
+                        args.year, args.day, inpath, args.test,
+                        cache, args.refresh)
+            elif args.profile:
+                from profiling import EXTENSIONS, profile
+
+                ext = EXTENSIONS[args.profile]
+                outpath = (
+                        args.profile_output or
+                        f'profile_y{args.year}d{args.day:02d}.{ext}')
+                (p1, p2), report = profile(args.profile, fn, outpath)
             else:
-                infile = open(inpath, 'r')
-            kwargs = {}
-            if args.test:
-                kwargs['test'] = True
-            if args.draw:
-                kwargs['draw'] = True
-            p1, p2 = m.run(infile, **kwargs)
-
-        console.print()
-        table = Table(
-                box=box.ROUNDED,
-                padding=(0, 4),
-                title=f"{args.year} Day {args.day} Results",
-                show_lines=True)
-        table.add_column('Part')
-        table.add_column('Result', justify='right', style='cyan')
-        table.add_row('Part 1', str(p1))
-        table.add_row('Part 2', str(p2))
-        console.print(table, justify='center')
+                p1, p2 = fn()
+        if entry is not None:
+            logging.info(
+                    f"Used cached result, which originally took "
+                    f"{format_duration(entry['duration'])}")
+        if args.trace:
+            logging.info(f"Wrote trace to '{args.trace}'")
+        print_results(console, args.year, args.day, p1, p2)
+        if args.profile:
+            print_profile(console, *report)
+            logging.info(f"Wrote {args.profile} report to '{outpath}'")
     except FileNotFoundError:
         logging.error(f"No such file '{inpath}'")
-        retcode = 1
+        return 1
     except Exception as err:
         logging.error(f"Unexpected error '{err}' occurred", exc_info=err)
-        retcode = 1
-    finally:
-        if infile and infile != sys.stdin:
-            try:
-                infile.close()
-            except Exception:
-                pass
-        sys.exit(retcode)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['serve']:
+        from server import main as serve_main
+
+        sys.exit(serve_main(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-t', '--test', action='store_true')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    parser.add_argument('-d', '--draw', action='store_true')
+    parser.add_argument('-i', '--input-file', required=False)
+    parser.add_argument(
+            '-P', '--no-rich', action='store_true',
+            help="plain text output, without importing Rich")
+    parser.add_argument(
+            '-a', '--all', action='store_true',
+            help="run every day of every year in parallel")
+    parser.add_argument(
+            '-j', '--jobs', type=int,
+            help="number of worker processes for batch runs "
+                 "(default: one per CPU)")
+    parser.add_argument(
+            '-T', '--trace', metavar='FILE',
+            help="write timing spans to FILE, as JSON lines if it ends in "
+                 ".jsonl, otherwise in Chrome trace-event format")
+    parser.add_argument(
+            '-p', '--profile', choices=('cprofile', 'tracemalloc', 'sampling'),
+            help="run the day under a profiler and write a report")
+    parser.add_argument(
+            '-o', '--profile-output', metavar='FILE',
+            help="where to write the profiler report "
+                 "(default: profile_yYYYYdDD.EXT)")
+    parser.add_argument(
+            '-n', '--no-cache', action='store_true',
+            help="always run the day, and don't store the result")
+    parser.add_argument(
+            '-r', '--refresh', action='store_true',
+            help="run the day even if it's cached, and store the new result")
+    parser.add_argument(
+            '--cache-size', type=int, default=256, metavar='MB',
+            help="size limit of the result cache (default: 256)")
+    parser.add_argument(
+            '-R', '--remote', action='store_true',
+            help="have a running solver server (advent.py serve) run the day")
+    parser.add_argument(
+            '-s', '--socket',
+            help="socket of the solver server, for --remote")
+    parser.add_argument('year', type=int, nargs='?')
+    parser.add_argument('day', type=int, nargs='?')
+    args = parser.parse_args()
+    if args.remote and not args.socket:
+        from server import DEFAULT_SOCKET
+
+        args.socket = DEFAULT_SOCKET
+    sys.exit(main(args))
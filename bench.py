@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+"""Benchmark puzzle solutions and track performance regressions.
+
+Each day's `run()` is executed a number of times after some warm-up runs, and
+the min, median and 95th percentile duration of every `timing` block (usually
+"Part 1" and "Part 2") is recorded to a JSON history file, keyed by git commit
+and a hash of the input. Each new benchmark is compared against the most recent
+earlier benchmark of the same day and input, and any part whose median time
+has grown by more than the threshold is reported as a regression.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from advent import (
+        find_days, get_console, get_input_path, print_table, run_day,
+        setup_logging)
+from util import format_duration, record_timings, set_plain_output
+
+
+HISTORY_VERSION = 1
+DEFAULT_HISTORY = 'bench_history.json'
+TOTAL = 'Total'
+
+
+def percentile(values: list, pct: float):
+    """Return the `pct` percentile of `values` using the nearest-rank method."""
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def summarise(values: list) -> dict:
+    return {
+            'min': min(values),
+            'median': int(statistics.median(values)),
+            'p95': percentile(values, 95),
+            }
+
+
+def get_commit() -> tuple[str, bool]:
+    """Return the current git commit hash, and whether the tree is dirty."""
+    try:
+        commit = subprocess.run(
+                ('git', 'rev-parse', 'HEAD'),
+                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(
+                ('git', 'status', '--porcelain', '--untracked-files=no'),
+                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ('unknown', False)
+    return (commit, bool(status))
+
+
+def get_input_hash(inpath: str) -> str:
+    with open(inpath, 'rb') as infile:
+        return hashlib.sha256(infile.read()).hexdigest()[:16]
+
+
+def load_history(path: str) -> dict:
+    if not os.path.exists(path):
+        return {'version': HISTORY_VERSION, 'runs': []}
+    with open(path, 'r') as infile:
+        history = json.load(infile)
+    if history.get('version') != HISTORY_VERSION:
+        raise ValueError(
+                f"Unsupported benchmark history version "
+                f"{history.get('version')} in '{path}'")
+    return history
+
+
+def save_history(path: str, history: dict):
+    tmppath = path + '.tmp'
+    with open(tmppath, 'w') as outfile:
+        json.dump(history, outfile, indent=1)
+    os.replace(tmppath, path)
+
+
+def benchmark_day(
+        year: int,
+        day: int,
+        inpath: str,
+        test: bool = False,
+        repeat: int = 5,
+        warmup: int = 1) -> dict:
+    """Benchmark one puzzle day.
+
+    Run the day `warmup` times without recording anything, then `repeat` more
+    times, recording the duration of every `timing` block and of the whole
+    `run()` call. Return a dict mapping each block name to its summary
+    statistics, in nanoseconds.
+    """
+    for _ in range(warmup):
+        run_day(year, day, inpath, test)
+
+    samples = {}
+    for _ in range(repeat):
+        with record_timings() as timings:
+            start = time.perf_counter_ns()
+            run_day(year, day, inpath, test)
+            total = time.perf_counter_ns() - start
+        for message, durations in timings.items():
+            samples.setdefault(message, []).append(sum(durations))
+        samples.setdefault(TOTAL, []).append(total)
+    return {k: summarise(v) for k, v in samples.items()}
+
+
+def find_baseline(history: dict, record: dict) -> dict | None:
+    """Return the most recent earlier record for the same day and input."""
+    key = ('year', 'day', 'test', 'input_hash')
+    for prev in reversed(history['runs']):
+        if all(prev[k] == record[k] for k in key):
+            return prev
+    return None
+
+
+def find_regressions(
+        baseline: dict,
+        record: dict,
+        threshold: float,
+        floor: int = 1_000_000) -> list[tuple]:
+    """Compare the median time of each part against a baseline.
+
+    Return a list of (part, old median, new median) for each part that slowed
+    down by more than `threshold`, as a fraction of the old median. Slowdowns
+    smaller than `floor` nanoseconds are ignored as noise.
+    """
+    result = []
+    for part, stats in record['parts'].items():
+        if part not in baseline['parts']:
+            continue
+        old = baseline['parts'][part]['median']
+        new = stats['median']
+        if new - old > floor and new > old * (1 + threshold):
+            result.append((part, old, new))
+    return result
+
+
+def print_results(console, records: list[dict]):
+    columns = (
+            ('Year', 'left', None),
+            ('Day', 'right', None),
+            ('Part', 'left', None),
+            ('Min', 'right', 'green'),
+            ('Median', 'right', 'cyan'),
+            ('p95', 'right', 'yellow'),
+            )
+    rows = []
+    for record in records:
+        for part, stats in record['parts'].items():
+            rows.append((
+                    str(record['year']), str(record['day']), part,
+                    format_duration(stats['min']),
+                    format_duration(stats['median']),
+                    format_duration(stats['p95'])))
+    print_table(console, "Benchmark Results", columns, rows)
+
+
+def main(args) -> int:
+    loglevel = setup_logging(args.verbose, args.no_rich)
+    set_plain_output(args.no_rich)
+    console = get_console(args.no_rich)
+
+    days = args.days or find_days(args.year)
+    history = load_history(args.history)
+    commit, dirty = get_commit()
+    records = []
+    regressed = False
+    for day in days:
+        inpath = get_input_path(args.year, day, args.test)
+        try:
+            input_hash = get_input_hash(inpath)
+        except FileNotFoundError:
+            logging.error(f"No such file '{inpath}'")
+            regressed = True
+            continue
+
+        logging.info(f"Benchmarking {args.year} Day {day}")
+        # Silence the per-part timing messages while benchmarking.
+        logging.getLogger().setLevel('WARNING')
+        try:
+            parts = benchmark_day(
+                    args.year, day, inpath, args.test,
+                    args.repeat, args.warmup)
+        finally:
+            logging.getLogger().setLevel(loglevel)
+        record = {
+                'year': args.year,
+                'day': day,
+                'test': args.test,
+                'input_hash': input_hash,
+                'commit': commit,
+                'dirty': dirty,
+                'timestamp': int(time.time()),
+                'repeat': args.repeat,
+                'warmup': args.warmup,
+                'parts': parts,
+                }
+        records.append(record)
+
+        baseline = find_baseline(history, record)
+        if baseline:
+            for part, old, new in find_regressions(
+                    baseline, record, args.threshold):
+                regressed = True
+                logging.error(
+                        f"[red bold]REGRESSION[/] {args.year} Day {day} "
+                        f"{part}: median {format_duration(old)} -> "
+                        f"{format_duration(new)} "
+                        f"(since {baseline['commit'][:10]})")
+        if not args.dry_run:
+            history['runs'].append(record)
+
+    if not args.dry_run:
+        save_history(args.history, history)
+    print_results(console, records)
+    return int(regressed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+            description="Benchmark puzzle solutions and detect regressions.")
+    parser.add_argument('-t', '--test', action='store_true')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    parser.add_argument(
+            '-P', '--no-rich', action='store_true',
+            help="plain text output, without importing Rich")
+    parser.add_argument(
+            '-n', '--repeat', type=int, default=5,
+            help="number of recorded runs per day (default: 5)")
+    parser.add_argument(
+            '-w', '--warmup', type=int, default=1,
+            help="number of unrecorded warm-up runs per day (default: 1)")
+    parser.add_argument(
+            '-r', '--threshold', type=float, default=0.2,
+            help="fractional slowdown in median time that counts as a "
+                 "regression (default: 0.2)")
+    parser.add_argument(
+            '-H', '--history', default=DEFAULT_HISTORY,
+            help=f"benchmark history file (default: {DEFAULT_HISTORY})")
+    parser.add_argument(
+            '--dry-run', action='store_true',
+            help="compare against history without recording the results")
+    parser.add_argument('year', type=int)
+    parser.add_argument('days', type=int, nargs='*')
+    args = parser.parse_args()
+    sys.exit(main(args))
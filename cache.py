@@ -0,0 +1,149 @@
+"""A content-addressed, size-bounded on-disk cache.
+
+Entries are stored as pickle files named by the SHA-256 hash of their key. The
+modification time of each file records when it was last used, and when the
+total size of the cache grows past its limit, the least recently used entries
+are evicted.
+"""
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(ROOT, 'out', 'cache')
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+SUFFIX = '.pickle'
+
+
+class ResultCache:
+    def __init__(
+            self,
+            directory: str = DEFAULT_DIR,
+            max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def get_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + SUFFIX)
+
+    def get(self, key: str, default=None):
+        """Return the value stored for `key`, or `default` if there isn't one.
+
+        A successful lookup marks the entry as recently used.
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, 'rb') as infile:
+                value = pickle.load(infile)
+        except FileNotFoundError:
+            return default
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # A damaged or stale entry is as good as a missing one.
+            self.discard(key)
+            return default
+        os.utime(path)
+        return value
+
+    def put(self, key: str, value):
+        """Store `value` for `key`, then evict old entries if needed."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_path(key)
+        tmppath = f'{path}.{os.getpid()}.tmp'
+        with open(tmppath, 'wb') as outfile:
+            pickle.dump(value, outfile, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmppath, path)
+        self.evict()
+
+    def discard(self, key: str):
+        try:
+            os.remove(self.get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def get_entries(self) -> list[tuple]:
+        """Return (last used, size, path) for each entry, oldest first."""
+        result = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return result
+        for name in names:
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            result.append((stat.st_mtime_ns, stat.st_size, path))
+        result.sort()
+        return result
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits."""
+        entries = self.get_entries()
+        total = sum(e[1] for e in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.get_entries():
+            os.remove(path)
+
+
+def get_local_modules(module) -> list:
+    """Return `module` and all the modules from this repository it relies on.
+
+    Dependencies are found by following the module's globals, both modules
+    imported directly and the modules that imported names come from, and then
+    doing the same for each of those, transitively.
+    """
+    result = {}
+    q = [module]
+    while q:
+        m = q.pop()
+        path = getattr(m, '__file__', None)
+        if m.__name__ in result or not path:
+            continue
+        path = os.path.abspath(path)
+        if not path.startswith(ROOT + os.sep) or 'site-packages' in path:
+            continue
+        result[m.__name__] = m
+        for value in vars(m).values():
+            if inspect.ismodule(value):
+                q.append(value)
+                continue
+            name = getattr(value, '__module__', None)
+            if isinstance(name, str) and name in sys.modules:
+                q.append(sys.modules[name])
+    return [result[k] for k in sorted(result)]
+
+
+def get_source_hash(module) -> str:
+    """Return a hash of the source code of `module` and its local modules."""
+    h = hashlib.sha256()
+    for m in get_local_modules(module):
+        h.update(m.__name__.encode('utf-8'))
+        with open(m.__file__, 'rb') as infile:
+            h.update(infile.read())
+    return h.hexdigest()
+
+
+def get_run_key(module, data: bytes, flags: dict) -> str:
+    """Return a cache key for running `module` on input `data`."""
+    h = hashlib.sha256()
+    h.update(get_source_hash(module).encode('ascii'))
+    h.update(hashlib.sha256(data).digest())
+    h.update(repr(sorted(flags.items())).encode('utf-8'))
+    h.update(sys.version.encode('utf-8'))
+    return f'run:{module.__name__}:{h.hexdigest()}'
@@ -0,0 +1,210 @@
+"""Primes, factors and divisors.
+
+Everything here is built on one shared table of smallest prime factors, which
+is extended in segments whenever a caller needs more of it. The table answers
+primality in O(1), and factorises in O(log n), for any number it covers.
+One-off queries about larger numbers are handled by trial division, using the
+primes in the table up to their square root.
+"""
+import math
+from array import array
+
+
+# Don't grow the sieve past this, it would take too much memory.
+MAX_SIEVE = 1 << 24
+
+
+class Sieve:
+    """A growable table of smallest prime factors.
+
+    `spf[n]` is the smallest prime factor of n, for 2 <= n < `limit`.
+    """
+    def __init__(self, limit: int = 1024):
+        self.spf = array('I', [0, 1])
+        self.primes = array('I')
+        self.limit = 2
+        self.extend(limit)
+
+    def extend(self, limit: int):
+        """Grow the table to cover every number less than `limit`."""
+        if limit <= self.limit:
+            return
+        # Grow geometrically, so that repeated small extensions stay cheap.
+        limit = max(limit, min(2 * self.limit, MAX_SIEVE))
+        while self.limit < limit:
+            # Each segment can be at most the square of the previous limit,
+            # so that the primes we already have are enough to sieve it.
+            hi = min(limit, self.limit ** 2)
+            self.sieve_segment(self.limit, hi)
+
+    def sieve_segment(self, lo: int, hi: int):
+        """Fill in the table for lo <= n < hi.
+
+        Every prime p below sqrt(hi) marks its multiples in the segment, in
+        descending order of p, so that the smallest factor is written last.
+        Whatever is left unmarked is prime.
+        """
+        spf = self.spf
+        spf.extend(bytes(4 * (hi - lo)))
+        bound = math.isqrt(hi - 1)
+        for p in reversed(self.primes):
+            if p > bound:
+                continue
+            start = max(p * p, (lo + p - 1) // p * p)
+            if start >= hi:
+                continue
+            count = len(range(start, hi, p))
+            spf[start:hi:p] = array('I', [p]) * count
+        for n in range(lo, hi):
+            if spf[n] == 0:
+                spf[n] = n
+                self.primes.append(n)
+        self.limit = hi
+
+    def is_prime(self, n: int) -> bool:
+        """Return whether `n` is prime.
+
+        A single query beyond the table only sieves up to sqrt(n), and
+        trial divides by those primes. Callers asking about a whole range
+        should extend the table over it first.
+        """
+        if n < 2:
+            return False
+        if n < self.limit:
+            return self.spf[n] == n
+        return self.get_smallest_factor(n) == n
+
+    def get_smallest_factor(self, n: int) -> int:
+        """Return the smallest prime factor of `n`, for n >= 2."""
+        if n < self.limit:
+            return self.spf[n]
+        bound = math.isqrt(n)
+        self.extend(min(bound + 1, MAX_SIEVE))
+        for p in self.primes:
+            if p > bound:
+                return n
+            if n % p == 0:
+                return p
+        # Out of sieved primes, carry on with odd numbers.
+        for p in range(self.limit | 1, bound + 1, 2):
+            if n % p == 0:
+                return p
+        return n
+
+    def factorise(self, n: int) -> dict[int, int]:
+        """Return the prime factorisation of `n` as {prime: exponent}."""
+        result = {}
+        while n > 1:
+            p = self.get_smallest_factor(n)
+            count = 0
+            while n % p == 0:
+                n //= p
+                count += 1
+            result[p] = count
+        return result
+
+    def get_divisors(self, n: int) -> set[int]:
+        result = [1]
+        for p, k in self.factorise(n).items():
+            powers = [p ** i for i in range(1, k + 1)]
+            result += [d * q for d in result for q in powers]
+        return set(result)
+
+    def primes_between(self, lo: int, hi: int) -> list[int]:
+        """Return all the primes p with lo <= p < hi."""
+        if hi <= MAX_SIEVE:
+            self.extend(hi)
+            spf = self.spf
+            return [n for n in range(max(lo, 2), hi) if spf[n] == n]
+        return [n for n in range(lo, hi) if self.is_prime(n)]
+
+
+_sieve = None
+
+
+def get_sieve() -> Sieve:
+    """Return the shared sieve, creating it if needed."""
+    global _sieve
+    if _sieve is None:
+        _sieve = Sieve()
+    return _sieve
+
+
+def is_prime(n: int) -> bool:
+    return get_sieve().is_prime(n)
+
+
+def factorise(n: int) -> dict[int, int]:
+    return get_sieve().factorise(n)
+
+
+def get_divisors(n: int) -> set[int]:
+    return get_sieve().get_divisors(n)
+
+
+def get_divisor_sums(limit: int, max_multiple: int | None = None) -> list:
+    """Return the sum of the divisors of every n from 0 to `limit`.
+
+    If `max_multiple` is given, a divisor d of n only counts when n / d is
+    at most `max_multiple`.
+
+    Divisors come in pairs (d, q) with d <= q and d * q = n, so rather than
+    visiting every divisor of every number, we loop over d up to sqrt(limit),
+    and add both halves of every pair at once. With NumPy this is a few
+    thousand vector operations, and the result is a NumPy array; without it,
+    the result is a list.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    m = max_multiple
+    if np is None:
+        # Add to every multiple of d at once, with a slice assignment.
+        sums = [0] * (limit + 1)
+        for d in range(1, math.isqrt(limit) + 1):
+            top = limit // d
+            pairs = slice(d * (d + 1), limit + 1, d)
+            if m is None:
+                sums[d * d] += d
+                sums[pairs] = [
+                        s + x for s, x in zip(
+                            sums[pairs], range(2 * d + 1, top + d + 1))]
+                continue
+            if d <= m:
+                sums[d * d] += d
+                sums[pairs] = [
+                        s + q for s, q in zip(
+                            sums[pairs], range(d + 1, top + 1))]
+            hi = min(top, m)
+            if hi > d:
+                small = slice(d * (d + 1), d * hi + 1, d)
+                sums[small] = [s + d for s in sums[small]]
+        return sums
+
+    sums = np.zeros(limit + 1, dtype=np.int64)
+    for d in range(1, math.isqrt(limit) + 1):
+        q = np.arange(d + 1, limit // d + 1, dtype=np.int64)
+        n = q * d
+        # The square d * d only has the one divisor to add.
+        if m is None or d <= m:
+            sums[d * d] += d
+            sums[n] += q
+        if m is None:
+            sums[n] += d
+        else:
+            sums[n[q <= m]] += d
+    return sums
+
+
+def find_first_at_least(values, target: int, start: int = 0) -> int | None:
+    """Return the first index from `start` whose value is at least `target`."""
+    if hasattr(values, 'argmax'):
+        hits = values[start:] >= target
+        i = int(hits.argmax())
+        return start + i if hits[i] else None
+    for i in range(start, len(values)):
+        if values[i] >= target:
+            return i
+    return None
@@ -0,0 +1,197 @@
+"""Profilers for running a puzzle solution under instrumentation.
+
+Each profiler calls a function, writes a report file, and returns the
+function's result along with a summary table of (title, columns, rows) for
+display.
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+PROFILERS = ('cprofile', 'tracemalloc', 'sampling')
+EXTENSIONS = {
+        'cprofile': 'pstats',
+        'tracemalloc': 'txt',
+        'sampling': 'collapsed',
+        }
+TOP = 20
+
+
+def format_location(filename: str, lineno: int | None = None) -> str:
+    """Return a short display form of a source location."""
+    try:
+        path = os.path.relpath(filename)
+    except ValueError:
+        path = filename
+    if path.startswith('..'):
+        path = filename
+    if lineno is None:
+        return path
+    return f'{path}:{lineno}'
+
+
+def profile_cprofile(fn, outpath: str) -> tuple:
+    """Run `fn` under cProfile and dump the stats to `outpath`.
+
+    The stats can be explored with `python -m pstats`, or with a viewer such as
+    snakeviz.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn)
+    profiler.dump_stats(outpath)
+
+    stats = pstats.Stats(profiler)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    rows = []
+    for func in stats.fcn_list[:TOP]:
+        calls, primitive, tottime, cumtime, _ = stats.stats[func]
+        filename, lineno, name = func
+        rows.append((
+                f'{name} ({format_location(filename, lineno)})',
+                f'{calls:,d}',
+                f'{tottime:.3f}',
+                f'{cumtime:.3f}'))
+    columns = ('Function', 'Calls', 'Own (s)', 'Cumulative (s)')
+    return result, ("cProfile", columns, rows)
+
+
+def profile_tracemalloc(fn, outpath: str, frames: int = 10) -> tuple:
+    """Run `fn` under tracemalloc, and report the top allocation sites.
+
+    The full allocation table and the peak traced memory are written to
+    `outpath`.
+    """
+    tracemalloc.start(frames)
+    try:
+        result = fn()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+    stats = snapshot.statistics('lineno')
+    with open(outpath, 'w') as outfile:
+        outfile.write(f'Peak traced memory: {peak:,d} bytes\n\n')
+        for stat in stats:
+            outfile.write(f'{stat}\n')
+
+    rows = []
+    for stat in stats[:TOP]:
+        frame = stat.traceback[0]
+        rows.append((
+                format_location(frame.filename, frame.lineno),
+                f'{stat.count:,d}',
+                f'{stat.size:,d}'))
+    columns = ('Allocation site', 'Blocks', 'Bytes')
+    return result, (f"tracemalloc (peak {peak:,d} bytes)", columns, rows)
+
+
+class StackSampler:
+    """Periodically sample the call stack of a thread from another thread.
+
+    The samples are kept as a count of each distinct stack, where a stack is a
+    tuple of frame descriptions, outermost first. The outermost `skip` frames
+    of each stack are discarded, so that the frames of whoever started the
+    sampler don't clutter the report.
+    """
+    def __init__(self, thread_id: int, interval: float = 0.001, skip: int = 0):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.skip = skip
+        self.samples = Counter()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopping.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = self.get_stack(frame)[self.skip:]
+                if stack:
+                    self.samples[stack] += 1
+            time.sleep(self.interval)
+
+    @staticmethod
+    def get_stack(frame) -> tuple:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({format_location(code.co_filename)})')
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def write_collapsed(self, outpath: str):
+        """Write the samples in the collapsed-stack format.
+
+        Each line is a stack of semicolon-separated frames followed by its
+        sample count, as consumed by flamegraph.pl, inferno or speedscope.
+        """
+        with open(outpath, 'w') as outfile:
+            for stack, count in sorted(self.samples.items()):
+                outfile.write(f"{';'.join(stack)} {count}\n")
+
+
+def profile_sampling(fn, outpath: str, interval: float = 0.001) -> tuple:
+    """Run `fn` while sampling its call stack, and report the hottest frames.
+
+    The samples are written to `outpath` in collapsed-stack format, ready to be
+    turned into a flame graph.
+    """
+    skip = len(StackSampler.get_stack(sys._getframe()))
+    sampler = StackSampler(threading.get_ident(), interval, skip)
+    sampler.start()
+    try:
+        result = fn()
+    finally:
+        sampler.stop()
+    sampler.write_collapsed(outpath)
+
+    total = sum(sampler.samples.values())
+    own = Counter()
+    inclusive = Counter()
+    for stack, count in sampler.samples.items():
+        own[stack[-1]] += count
+        for frame in set(stack):
+            inclusive[frame] += count
+
+    rows = []
+    for frame, count in own.most_common(TOP):
+        rows.append((
+                frame,
+                f'{count:,d}',
+                f'{count / total:.1%}',
+                f'{inclusive[frame] / total:.1%}'))
+    columns = ('Function', 'Samples', 'Own', 'Inclusive')
+    return result, (f"Stack sampling ({total:,d} samples)", columns, rows)
+
+
+def profile(mode: str, fn, outpath: str) -> tuple:
+    """Run `fn` under the profiler named by `mode`.
+
+    Return the result of `fn` and a summary table of (title, columns, rows).
+    """
+    match mode:
+        case 'cprofile':
+            return profile_cprofile(fn, outpath)
+        case 'tracemalloc':
+            return profile_tracemalloc(fn, outpath)
+        case 'sampling':
+            return profile_sampling(fn, outpath)
+    raise ValueError(f"Unknown profiler {mode}")
@@ -0,0 +1,238 @@
+"""A long-lived solver daemon, and a thin client to talk to it.
+
+The server imports every puzzle module up front, optionally runs each day on
+its test input to get any numba functions compiled, and then forks a pool of
+worker processes that inherit all of that warm state. It listens on a Unix
+socket for requests, each of which is one line of JSON:
+
+    {"year": 2017, "day": 15, "input": "/path/to/input", "test": false,
+     "cache": true, "refresh": false}
+
+and replies with one line of JSON:
+
+    {"ok": true, "result": ["...", "..."], "duration": 1234, "cached": false}
+
+or `{"ok": false, "error": "..."}` if the run failed. Several requests can be
+served at once, up to the size of the worker pool.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import time
+from contextlib import redirect_stdout
+
+from advent import (
+        find_days, find_years, get_input_path, get_module_path, run_day,
+        run_day_cached, setup_logging)
+from cache import ROOT, ResultCache
+from util import format_duration
+
+
+DEFAULT_SOCKET = os.environ.get(
+        'ADVENT_SOCKET', os.path.join(ROOT, 'out', 'advent.sock'))
+
+
+def preload_modules() -> int:
+    """Import every puzzle module, and return how many were imported."""
+    count = 0
+    for year in find_years():
+        for day in find_days(year):
+            modpath = get_module_path(year, day)
+            try:
+                importlib.import_module(modpath)
+                count += 1
+            except Exception as err:
+                logging.warning(f"Couldn't import {modpath}: {err}")
+    return count
+
+
+def warm_up():
+    """Run every day on its test input, discarding the results.
+
+    This gets any jit-decorated functions compiled before the workers are
+    forked, so that none of them pay for compilation on their first request.
+    """
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for year in find_years():
+            for day in find_days(year):
+                inpath = get_input_path(year, day, True)
+                try:
+                    run_day(year, day, inpath, True)
+                except Exception as err:
+                    logging.debug(f"Warm-up of {year} Day {day} failed: {err}")
+
+
+def init_worker():
+    logging.getLogger().setLevel('WARNING')
+
+
+def solve(
+        year: int,
+        day: int,
+        inpath: str,
+        test: bool = False,
+        cache: ResultCache | None = None,
+        refresh: bool = False) -> dict:
+    """Run one request inside a worker process, and return the response."""
+    start = time.perf_counter_ns()
+    try:
+        if cache is None:
+            result = run_day(year, day, inpath, test)
+            cached = False
+        else:
+            result, entry = run_day_cached(
+                    year, day, inpath, test, cache, refresh)
+            cached = entry is not None
+    except FileNotFoundError:
+        return {'ok': False, 'error': f"No such file '{inpath}'"}
+    except Exception as err:
+        return {'ok': False, 'error': f"{type(err).__name__}: {err}"}
+    return {
+            'ok': True,
+            'result': [str(x) for x in result],
+            'duration': time.perf_counter_ns() - start,
+            'cached': cached,
+            }
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+            year = int(request['year'])
+            day = int(request['day'])
+            test = bool(request.get('test', False))
+            use_cache = bool(request.get('cache', True))
+            refresh = bool(request.get('refresh', False))
+            inpath = request.get('input') or os.path.join(
+                    ROOT, get_input_path(year, day, test))
+        except (ValueError, KeyError, TypeError) as err:
+            response = {'ok': False, 'error': f"Bad request: {err}"}
+        else:
+            cache = self.server.cache if use_cache else None
+            future = self.server.pool.submit(
+                    solve, year, day, inpath, test, cache, refresh)
+            response = future.result()
+            if response['ok']:
+                logging.info(
+                        f"{year} Day {day} served in "
+                        f"{format_duration(response['duration'])}"
+                        f"{' (cached)' if response['cached'] else ''}")
+            else:
+                logging.error(f"{year} Day {day}: {response['error']}")
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, pool, cache: ResultCache | None):
+        self.pool = pool
+        self.cache = cache
+        super().__init__(path, RequestHandler)
+
+
+def serve(
+        path: str = DEFAULT_SOCKET,
+        workers: int | None = None,
+        cache: ResultCache | None = None,
+        warm: bool = False):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # The workers need to be forked from this process, so that they inherit
+    # the modules (and compiled functions) we've already loaded.
+    context = multiprocessing.get_context('fork')
+    count = preload_modules()
+    logging.info(f"Imported {count} puzzle modules")
+    if warm:
+        logging.info("Warming up on test inputs")
+        level = logging.getLogger().level
+        logging.getLogger().setLevel('WARNING')
+        try:
+            warm_up()
+        finally:
+            logging.getLogger().setLevel(level)
+
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=init_worker) as pool:
+        with Server(path, pool, cache) as server:
+            logging.info(f"Listening on {path}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                logging.info("Shutting down")
+            finally:
+                os.remove(path)
+
+
+def request(
+        year: int,
+        day: int,
+        inpath: str | None = None,
+        test: bool = False,
+        path: str = DEFAULT_SOCKET,
+        use_cache: bool = True,
+        refresh: bool = False) -> dict:
+    """Send a request to the server at `path`, and return its response."""
+    message = {
+            'year': year,
+            'day': day,
+            'test': test,
+            'cache': use_cache,
+            'refresh': refresh,
+            }
+    if inpath:
+        message['input'] = os.path.abspath(inpath)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+            prog='advent.py serve',
+            description="Serve puzzle solutions from a warm interpreter.")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    parser.add_argument(
+            '-P', '--no-rich', action='store_true',
+            help="plain text output, without importing Rich")
+    parser.add_argument(
+            '-s', '--socket', default=DEFAULT_SOCKET,
+            help=f"Unix socket to listen on (default: {DEFAULT_SOCKET})")
+    parser.add_argument(
+            '-j', '--jobs', type=int,
+            help="number of worker processes (default: one per CPU)")
+    parser.add_argument(
+            '-w', '--warm', action='store_true',
+            help="run every day on its test input before serving")
+    parser.add_argument(
+            '-n', '--no-cache', action='store_true',
+            help="don't use the result cache")
+    args = parser.parse_args(argv)
+
+    setup_logging(args.verbose, args.no_rich)
+    cache = None if args.no_cache else ResultCache()
+    if sys.platform == 'win32':
+        logging.error("The server needs Unix sockets and fork()")
+        return 1
+    serve(args.socket, args.jobs, cache, args.warm)
+    return 0
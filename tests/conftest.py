@@ -0,0 +1,114 @@
+import inspect
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import helpers
+
+
+DAY_TEST = re.compile(r'test_y(\d{4})d(\d{2})$')
+TIMINGS = {}
+BUDGETS = {}
+_pool = None
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('advent', "Advent of Code test runner")
+    group.addoption(
+            '--jobs', default='0', metavar='N',
+            help="solve the sample inputs of day tests in N worker "
+                 "processes ('auto' for one per CPU, default 0: no workers)")
+    group.addoption(
+            '--budget-scale', type=float, default=1.0, metavar='FACTOR',
+            help="multiply every test time budget by FACTOR")
+    group.addoption(
+            '--no-budgets', action='store_true',
+            help="don't fail tests that go over their time budget")
+    group.addoption(
+            '--timings-json', metavar='PATH',
+            help="write the time taken by every test to PATH")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+            'markers',
+            "budget(seconds): fail the test if it takes longer than this")
+
+
+def get_jobs(config) -> int:
+    value = config.getoption('jobs')
+    if value == 'auto':
+        return os.cpu_count() or 1
+    return int(value)
+
+
+def pytest_collection_finish(session):
+    """Start solving the selected day tests in a pool of workers.
+
+    This runs after `-k` and `-m` have deselected tests, so only the days
+    that are going to be tested get solved.
+    """
+    global _pool
+    jobs = get_jobs(session.config)
+    if jobs < 1 or session.config.option.collectonly:
+        return
+
+    days = []
+    for item in session.items:
+        match = DAY_TEST.match(item.name)
+        fn = getattr(item, 'function', None)
+        if match and fn and 'get_day_result(' in inspect.getsource(fn):
+            days.append((int(match.group(1)), int(match.group(2))))
+    if not days:
+        return
+
+    _pool = ProcessPoolExecutor(jobs, initializer=helpers.init_worker)
+    for year, day in days:
+        helpers.prefetch(_pool, year, day)
+
+
+def pytest_sessionfinish(session):
+    global _pool
+    if _pool is not None:
+        helpers.cancel_prefetch()
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+    path = session.config.getoption('timings_json')
+    if path:
+        with open(path, 'w') as outfile:
+            json.dump(TIMINGS, outfile, indent=1)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    helpers.reset_timing()
+    start = time.perf_counter()
+    result = yield
+    elapsed = helpers.get_elapsed(time.perf_counter() - start)
+    TIMINGS[item.nodeid] = elapsed
+
+    marker = item.get_closest_marker('budget')
+    if marker is not None:
+        budget = marker.args[0] * item.config.getoption('budget_scale')
+        BUDGETS[item.nodeid] = budget
+        if elapsed > budget and not item.config.getoption('no_budgets'):
+            pytest.fail(
+                    f"took {elapsed:.2f}s, over its budget of {budget:.2f}s",
+                    pytrace=False)
+    return result
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not BUDGETS:
+        return
+    terminalreporter.section('time budgets')
+    for nodeid, budget in sorted(BUDGETS.items()):
+        elapsed = TIMINGS[nodeid]
+        mark = 'OVER' if elapsed > budget else 'ok'
+        terminalreporter.write_line(
+                f'{elapsed:8.2f}s / {budget:6.2f}s {mark:>4s}  {nodeid}')
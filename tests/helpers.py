@@ -0,0 +1,73 @@
+"""Shared helpers for the puzzle test suites.
+
+When the suite runs with `--jobs`, conftest.py hands a process pool to
+`prefetch` for every day test before any tests start, so the sample inputs are
+all solved in parallel, and `get_day_result` just collects the answer.
+"""
+import importlib
+import os
+import sys
+import time
+
+
+_prefetched = {}
+_timing = {'waited': 0.0, 'ran': 0.0}
+
+
+def run_day(year: int, day: int) -> tuple:
+    """Run a day on its sample input.
+
+    Return the result, and the time taken in seconds.
+    """
+    modpath = f'y{year}.d{day:02d}'
+    inpath = os.path.join(f'y{year}', 'tests', f'{day:02d}')
+    start = time.perf_counter()
+    m = importlib.import_module(modpath)
+    with open(inpath, 'r') as infile:
+        result = m.run(infile, test=True)
+    return result, time.perf_counter() - start
+
+
+def init_worker():
+    # Nothing would capture output from the workers, so discard it.
+    sys.stdout = open(os.devnull, 'w')
+
+
+def prefetch(pool, year: int, day: int):
+    """Start running a day on its sample input in `pool`."""
+    _prefetched[(year, day)] = pool.submit(run_day, year, day)
+
+
+def get_day_result(year: int, day: int):
+    """Return the result of running a day on its sample input.
+
+    If the day was prefetched, the time spent waiting for it is recorded
+    along with the time it actually took to run in the worker, so that the
+    test's time budget is checked against the real cost of the day.
+    """
+    future = _prefetched.pop((year, day), None)
+    if future is None:
+        result, _ = run_day(year, day)
+        return result
+
+    start = time.perf_counter()
+    result, duration = future.result()
+    _timing['waited'] += time.perf_counter() - start
+    _timing['ran'] += duration
+    return result
+
+
+def reset_timing():
+    _timing['waited'] = 0.0
+    _timing['ran'] = 0.0
+
+
+def get_elapsed(wall: float) -> float:
+    """Return the time a test really took, given its wall time in seconds."""
+    return wall - _timing['waited'] + _timing['ran']
+
+
+def cancel_prefetch():
+    for future in _prefetched.values():
+        future.cancel()
+    _prefetched.clear()
@@ -1,17 +1,13 @@
-import importlib
-import os
+import pytest
+
+import helpers
 
 
 YEAR = 2015
 
 
 def get_day_result(day):
-    modpath = f'y{YEAR}.d{day:02d}'
-    inpath = os.path.join(f'y{YEAR}', 'tests', f'{day:02d}')
-    m = importlib.import_module(modpath)
-    with open(inpath, 'r') as infile:
-        result = m.run(infile, test=True)
-    return result
+    return helpers.get_day_result(YEAR, day)
 
 
 def test_y2015d01():
@@ -26,6 +22,7 @@ def test_y2015d03():
     assert get_day_result(3) == (4, 3)
 
 
+@pytest.mark.budget(30)
 def test_y2015d04():
     assert get_day_result(4) == (609043, 6742839)
 
@@ -50,6 +47,7 @@ def test_y2015d09():
     assert get_day_result(9) == (605, 982)
 
 
+@pytest.mark.budget(10)
 def test_y2015d10():
     assert get_day_result(10) == (82350, 1166642)
 
@@ -106,6 +104,26 @@ def test_y2015d23():
     assert get_day_result(23) == (2, 7)
 
 
+def test_y2015d23_computer():
+    from y2015.d23 import Computer, parse_program
+
+    # Count the Collatz steps from 27 down to 1.
+    program = parse_program([
+            'jio a, +8', 'inc b', 'jie a, +4', 'tpl a', 'inc a', 'jmp +2',
+            'hlf a', 'jmp -7'])
+    comp = Computer()
+    comp.set_register('a', 27)
+    comp.run_program(program)
+    assert comp.registers == [1, 111]
+    assert comp.histogram == [112, 111, 111, 41, 41, 41, 70, 111]
+    assert comp.counter == 638
+
+    # Halving 0 gets back to the same state.
+    comp = Computer()
+    with pytest.raises(ValueError):
+        comp.run_program(parse_program(['inc b', 'hlf a', 'jmp -1']))
+
+
 def test_y2015d24():
     assert get_day_result(24) == (99, 44)
 
@@ -1,17 +1,13 @@
-import importlib
-import os
+import pytest
+
+import helpers
 
 
 YEAR = 2017
 
 
 def get_day_result(day):
-    modpath = f'y{YEAR}.d{day:02d}'
-    inpath = os.path.join(f'y{YEAR}', 'tests', f'{day:02d}')
-    m = importlib.import_module(modpath)
-    with open(inpath, 'r') as infile:
-        result = m.run(infile, test=True)
-    return result
+    return helpers.get_day_result(YEAR, day)
 
 
 def test_y2017d01():
@@ -101,6 +97,7 @@ def test_y2017d13():
     assert get_day_result(13) == (24, 10)
 
 
+@pytest.mark.budget(10)
 def test_y2017d14():
     assert get_day_result(14) == (8108, 1242)
 
@@ -138,6 +135,26 @@ def test_y2017d18():
     assert get_day_result(18) == (4, 3)
 
 
+def test_duet_ring():
+    from y2017.d18 import Duet, parse_program, BLOCKED, HALTED
+
+    # Each computer passes its number on round the ring, and then waits for
+    # a second value that never comes.
+    duet = Duet(3)
+    duet.load_program(parse_program(['snd p', 'rcv a', 'rcv b']))
+    assert duet.run() == 1
+    assert [c.get_register('a') for c in duet.computers] == [2, 0, 1]
+    assert [c.status for c in duet.computers] == [BLOCKED] * 3
+
+    # One computer halts while the other is still waiting on it.
+    duet = Duet()
+    duet.load_program(parse_program([
+            'jgz p 3', 'rcv a', 'rcv b', 'snd 7', 'snd 8']))
+    assert duet.run() == 2
+    assert duet.computers[0].get_register('b') == 8
+    assert [c.status for c in duet.computers] == [HALTED, HALTED]
+
+
 def test_y2017d19():
     assert get_day_result(19) == ('ABCDEF', 38)
 
@@ -154,8 +171,41 @@ def test_y2017d22():
     assert get_day_result(22) == (5587, 26)
 
 
+def test_machine():
+    from y2017.machine import (
+            Computer, count_products, generate_source, parse_program)
+
+    # Count down from 5, multiplying b by 2 each time.
+    comp = Computer(watch={'mul'})
+    comp.parse(['set a 5', 'set b 1', 'mul b 2', 'sub a 1', 'jnz a -2'])
+    comp.run_program()
+    assert (comp.get_register('b'), comp.counter, comp.watched) == (32, 17, 5)
+
+    assert count_products(12, 2, 2) == 4
+    assert count_products(13, 2, 2) == 0
+
+    # The factor search runs in one step, but counts every instruction.
+    with open('y2017/tests/23') as f:
+        program = list(parse_program(f))
+    program[0] = ('set', ['b', '15'])
+    comp = Computer(watch={'mul'})
+    comp.load(program)
+    comp.run_program()
+    assert (comp.get_register('h'), comp.watched) == (1, 169)
+    assert comp.counter == 5 + (1 + 13 * (5 + 8 * 13) + 2) + 6
+
+    # Jumps that aren't taken don't make the source grow with the square of
+    # the program length.
+    program = (('add', ['a', '1']), ('jnz', ['b', '2'])) * 1000
+    comp = Computer()
+    comp.load(program)
+    comp.run_program()
+    assert (comp.get_register('a'), comp.counter) == (1000, 2000)
+    assert len(generate_source(program).split('\n')) < 10 * len(program)
+
+
 def test_y2017d23():
-    assert get_day_result(23) == (2, 903)
+    assert get_day_result(23) == (6724, 903)
 
 
 def test_y2017d24():
@@ -1,18 +1,13 @@
-import importlib
-import os
 from io import StringIO
 
+import helpers
+
 
 YEAR = 2018
 
 
 def get_day_result(day):
-    modpath = f'y{YEAR}.d{day:02d}'
-    inpath = os.path.join(f'y{YEAR}', 'tests', f'{day:02d}')
-    m = importlib.import_module(modpath)
-    with open(inpath, 'r') as infile:
-        result = m.run(infile, test=True)
-    return result
+    return helpers.get_day_result(YEAR, day)
 
 
 def test_y2018d01():
@@ -225,6 +220,39 @@ def test_y2018d19():
     assert get_day_result(19) == (6, 6)
 
 
+def test_elfcode():
+    from y2018.elfcode import Computer, generate_source
+
+    # Count r0 up to 10, then jump out of the program.
+    comp = Computer()
+    comp.parse(
+            "#ip 5\naddi 0 1 0\ngtri 0 9 1\naddr 1 5 5\n"
+            "seti -1 0 5\nseti 99 0 5")
+    assert comp.run() is True
+    assert comp.registers == [10, 1, 0, 0, 0, 99]
+    assert comp.counter == 40
+
+    comp.reset()
+    assert comp.run((3,)) is False
+    assert (comp.pointer, comp.registers[0], comp.counter) == (3, 1, 3)
+    comp.run_to_line(3)
+    assert (comp.registers[0], comp.counter) == (2, 7)
+
+    comp.reset()
+    assert list(comp.watch_line_register(1, 1)) == [0] * 9 + [1]
+    assert comp.halt
+
+    # A long program with no jumps compiles to source of linear size.
+    program = (('addi', 0, 1, 0), ('mulr', 0, 1, 2)) * 1000
+    comp = Computer(4)
+    comp.load(program)
+    assert comp.run() is True
+    assert comp.registers == [1000, 0, 0, 0]
+    assert comp.counter == 2000
+    source = generate_source(program, 4, None)
+    assert len(source.split('\n')) < 10 * len(program)
+
+
 def test_y2018d20():
     from y2018.d20 import Exp, Graph
     g = Graph()
@@ -1,17 +1,11 @@
-import importlib
-import os
+import helpers
 
 
 YEAR = 2019
 
 
 def get_day_result(day):
-    modpath = f'y{YEAR}.d{day:02d}'
-    inpath = os.path.join(f'y{YEAR}', 'tests', f'{day:02d}')
-    m = importlib.import_module(modpath)
-    with open(inpath, 'r') as infile:
-        result = m.run(infile, test=True)
-    return result
+    return helpers.get_day_result(YEAR, day)
 
 
 def test_y2019d01():
@@ -0,0 +1,38 @@
+import bench
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert bench.percentile(values, 50) == 50
+    assert bench.percentile(values, 95) == 95
+    assert bench.percentile(values, 100) == 100
+    assert bench.percentile([7], 95) == 7
+
+
+def test_find_regressions():
+    def record(commit, p1, p2):
+        return {
+                'year': 2018, 'day': 15, 'test': True, 'input_hash': 'abc',
+                'commit': commit,
+                'parts': {
+                    'Part 1': {'median': p1},
+                    'Part 2': {'median': p2},
+                    }}
+
+    history = {'runs': [record('a', 10_000_000, 5_000_000)]}
+    new = record('b', 20_000_000, 5_500_000)
+    baseline = bench.find_baseline(history, new)
+    assert baseline['commit'] == 'a'
+    regressions = bench.find_regressions(baseline, new, 0.2)
+    assert regressions == [('Part 1', 10_000_000, 20_000_000)]
+
+    new['input_hash'] = 'def'
+    assert bench.find_baseline(history, new) is None
+
+
+def test_benchmark_day():
+    inpath = bench.get_input_path(2019, 1, True)
+    parts = bench.benchmark_day(2019, 1, inpath, True, repeat=3, warmup=0)
+    assert set(parts) == {'Part 1', 'Part 2', bench.TOTAL}
+    for stats in parts.values():
+        assert stats['min'] <= stats['median'] <= stats['p95']
@@ -0,0 +1,39 @@
+import importlib
+import os
+
+import cache
+
+
+def test_get_put(tmp_path):
+    c = cache.ResultCache(tmp_path)
+    assert c.get('a') is None
+    assert c.get('a', {}) == {}
+    c.put('a', (1, 'two'))
+    assert c.get('a') == (1, 'two')
+    c.discard('a')
+    assert c.get('a') is None
+
+
+def test_evict(tmp_path):
+    c = cache.ResultCache(tmp_path, max_size=13_000)
+    for i, key in enumerate('abc'):
+        c.put(key, b'x' * 4000)
+        path = c.get_path(key)
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+    # Using 'a' makes 'b' the least recently used entry.
+    assert c.get('a') is not None
+    c.put('d', b'x' * 4000)
+    assert c.get('b') is None
+    assert c.get('a') is not None
+    assert c.get('d') is not None
+
+
+def test_run_key():
+    m = importlib.import_module('y2019.d02')
+    names = {x.__name__ for x in cache.get_local_modules(m)}
+    assert {'y2019.d02', 'y2019.intcode', 'util'} <= names
+
+    key = cache.get_run_key(m, b'1,0,0,0,99', {'test': True})
+    assert key == cache.get_run_key(m, b'1,0,0,0,99', {'test': True})
+    assert key != cache.get_run_key(m, b'1,0,0,0,99', {'test': False})
+    assert key != cache.get_run_key(m, b'2,0,0,0,99', {'test': True})
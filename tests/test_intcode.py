@@ -0,0 +1,216 @@
+from collections import deque
+from functools import partial
+from itertools import permutations
+
+import pytest
+
+
+def test_intcode():
+    from y2019.intcode import NEEDS_INPUT, Computer
+
+    # Memory past the end of the program reads as zero, and grows on write.
+    comp = Computer("3,1000,4,1000,4,2000,99")
+    assert comp.run((42,)) == (42, 0)
+    assert comp.memory[1000] == 42
+
+    # Running out of input pauses the machine where it was.
+    comp = Computer("3,0,3,1,99")
+    assert comp.execute() == NEEDS_INPUT
+    comp.add_inputs((5, 7))
+    comp.run()
+    assert comp.halt
+    assert (comp.memory[0], comp.memory[1]) == (5, 7)
+
+    comp = Computer("104,1,104,2,99")
+    assert list(comp.generate()) == [1, 2]
+
+    with pytest.raises(ValueError):
+        Computer("109,-5,204,0,99").run()
+    with pytest.raises(ValueError):
+        Computer("55,0,99").run()
+
+    # Negative addresses are invalid for reads and jumps too, whether the
+    # program is interpreted or translated.
+    for program in ("1105,1,-1,99", "4,-1,99"):
+        for translated in (False, True):
+            comp = Computer(program)
+            if translated:
+                comp.enable_translation()
+            with pytest.raises(ValueError, match="Invalid address -1"):
+                comp.run()
+
+
+def test_intcode_translation():
+    from y2019.intcode import Computer
+
+    quine = "109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99"
+    programs = (
+            (quine, ()),
+            ("3,1000,4,1000,4,2000,99", (42,)),
+            # Writes into its own code, then runs what it wrote.
+            ("1,1,1,4,99,5,6,0,99", ()),
+            ("3,0,3,1,99", (5, 7)),
+            )
+    for program, inputs in programs:
+        expected = Computer(program)
+        expected.run(inputs)
+        comp = Computer(program)
+        comp.enable_translation()
+        assert comp.run(inputs) == tuple(expected.outputs)
+        assert comp.halt
+        assert comp.memory.cells[:20] == expected.memory.cells[:20]
+
+    comp = Computer("3,9,4,9,1005,9,0,99,0,0")
+    comp.enable_translation()
+    gen = comp.generate()
+    comp.add_input(3)
+    assert next(gen) == 3
+    comp.add_input(0)
+    assert list(gen) == [0]
+
+
+def test_intcode_snapshot():
+    from y2019.intcode import NEEDS_INPUT, PAGE_SIZE, Computer, get_pages
+
+    # Add each input to a running total at 1000, and output it.
+    program = "3,1001,1,1000,1001,1000,4,1000,1105,1,0"
+    comp = Computer(program)
+    comp.add_input(5)
+    assert comp.execute() == NEEDS_INPUT
+    first = comp.snapshot()
+    assert comp.memory[1000] == 5
+
+    comp.add_input(2)
+    assert comp.execute() == NEEDS_INPUT
+    second = comp.snapshot()
+    assert comp.outputs == deque([5, 7])
+    # Only the page holding the total has changed.
+    assert second.pages[0] is first.pages[0]
+    assert second.pages[1000 // PAGE_SIZE] != first.pages[1000 // PAGE_SIZE]
+
+    fork = comp.fork()
+    comp.restore(first)
+    assert comp.outputs == deque([5])
+    comp.add_input(2)
+    comp.execute()
+    assert comp.snapshot() == second
+    assert hash(comp.snapshot()) == hash(second)
+    assert len({first, second, comp.snapshot()}) == 2
+
+    fork.add_input(1)
+    fork.execute()
+    assert fork.outputs == deque([5, 7, 8])
+    assert comp.outputs == deque([5, 7])
+
+    # Memory that has only grown doesn't change the state.
+    comp.memory.ensure(5000)
+    assert comp.snapshot() == second
+
+    # After a snapshot, only the pages written to are looked at again.
+    for translated in (False, True):
+        comp = Computer(program)
+        comp.enable_translation(translated)
+        comp.add_input(5)
+        comp.execute()
+        comp.snapshot()
+        comp.add_input(2)
+        comp.execute()
+        comp.memory[3000] = 1
+        assert comp.memory.dirty == {1000 // PAGE_SIZE, 3000 // PAGE_SIZE}
+        assert comp.snapshot().pages == get_pages(comp.memory.cells)
+        assert comp.memory.dirty == set()
+
+
+def test_intcode_profile():
+    from y2019.intcode import ADJUST_BASE, HALT, Computer, disassemble
+
+    quine = "109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99"
+    comp = Computer(quine)
+    profile = comp.enable_profiling()
+    assert comp.run() == comp.program
+    assert profile.total == 81
+    assert profile.opcodes[ADJUST_BASE] == 16
+    assert profile.opcodes[HALT] == 1
+    assert profile.branches[12] == [15, 1]
+    assert profile.get_hot_loops() == [(0, 12, 15, 80)]
+    assert "81 instructions executed" in profile.report()
+
+    listing = disassemble(comp.memory.cells, 0, 16, profile).split('\n')
+    assert listing[1].split() == ['2', '16', 'out', '[rb-1]']
+    assert listing[4].split()[-2:] == ['taken', '15/16']
+    assert listing[0].startswith('     0>')
+    assert disassemble(comp.program, 15).split() == ['15', 'hlt']
+
+
+def test_intcode_network():
+    import asyncio
+    from y2019.intcode import HALTED, IDLE, Computer, Network
+
+    # Add up three inputs, and pass the total on to be doubled.
+    total = "3,100,3,101,3,102,1,100,101,103,1,103,102,103,4,103,99"
+    double = "3,100,1002,100,2,100,4,100,99"
+    network = Network([Computer(total), Computer(double)])
+    channel = network.connect(0, 1)
+    network.send(0, 1)
+    # Both are waiting on input, so the network can't go on by itself.
+    assert network.run() == IDLE
+    assert network.get_waiting() == [0, 1]
+    assert channel == deque()
+
+    async def feed():
+        for value in (2, 3):
+            await asyncio.sleep(0)
+            network.send(0, value)
+
+    async def main():
+        feeder = asyncio.create_task(feed())
+        status = await asyncio.wait_for(network.run_async(), 1)
+        await feeder
+        return status
+
+    assert asyncio.run(main()) == HALTED
+    assert network.computers[1].outputs == deque([12])
+
+    # Computers on a network can still be driven one by one.
+    echo = "3,100,4,100,99"
+    network = Network([Computer(echo), Computer(double)])
+    network.connect(0, 1)
+    sender, receiver = network.computers
+    sender.add_input(4)
+    sender.execute()
+    assert list(receiver.generate()) == [8]
+    # Generating from the sender takes values off the channel itself.
+    sender.reset()
+    network.connect(0, 1)
+    sender.add_input(5)
+    assert list(sender.generate()) == [5]
+    assert receiver.inputs == deque()
+
+
+def test_intcode_sweep():
+    from y2019.d02 import find_inputs
+    from y2019.d07 import get_signal
+    from y2019.intcode import Computer, sweep
+
+    # Output noun * verb + 7, so that only 89 and 97 can make this target.
+    comp = Computer("1102,1,1,9,1001,9,7,0,99,0")
+    assert find_inputs(comp, 7 + 89 * 97) == (89, 97)
+    assert find_inputs(comp, -1) is None
+
+    # A single amplifier outputs 10 * signal + phase.
+    program = "3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0"
+    for workers in (1, 2):
+        assert sweep(
+                program, permutations(range(5)), get_signal,
+                workers=workers) == ((4, 3, 2, 1, 0), 43210)
+        assert sweep(
+                program, permutations(range(5)), get_signal,
+                reduce='min', workers=workers) == ((0, 1, 2, 3, 4), 1234)
+        assert sweep(
+                program, range(10), partial(get_output_over, 30),
+                reduce='first', workers=workers, chunksize=2) == (3, 33)
+
+
+def get_output_over(target: int, comp, value: int) -> int | None:
+    (result,) = comp.run((value, value))
+    return result if result > target else None
@@ -0,0 +1,49 @@
+import numtheory
+
+
+def get_primes(limit: int) -> list[int]:
+    return [
+            n for n in range(2, limit)
+            if all(n % d for d in range(2, int(n ** 0.5) + 1))]
+
+
+def test_sieve():
+    sieve = numtheory.Sieve(10)
+    assert sieve.limit >= 10
+    assert sieve.primes_between(0, 3000) == get_primes(3000)
+    assert sieve.limit >= 3000
+    assert sieve.is_prime(7919) is True
+    assert sieve.is_prime(7917) is False
+    assert sieve.is_prime(1) is False
+    # A one-off query only sieves as far as its square root.
+    assert sieve.is_prime(16_000_057) is True
+    assert sieve.is_prime(16_000_001) is False
+    assert sieve.limit < 10_000
+    # Beyond the largest sieve, fall back to trial division.
+    assert sieve.is_prime(2 ** 31 - 1) is True
+    assert sieve.is_prime(4_294_967_297) is False
+
+
+def test_factorise():
+    assert numtheory.factorise(1) == {}
+    assert numtheory.factorise(360) == {2: 3, 3: 2, 5: 1}
+    assert numtheory.factorise(10551358) == {2: 1, 5275679: 1}
+    assert numtheory.get_divisors(28) == {1, 2, 4, 7, 14, 28}
+
+
+def test_divisor_sums():
+    limit = 200
+    for m in (None, 50, 2):
+        expected = [0] + [
+                sum(d for d in range(1, n + 1)
+                    if n % d == 0 and (m is None or n // d <= m))
+                for n in range(1, limit + 1)]
+        assert list(numtheory.get_divisor_sums(limit, m)) == expected
+
+
+def test_find_first_at_least():
+    values = [0, 1, 3, 4, 7, 6, 12]
+    assert numtheory.find_first_at_least(values, 5) == 4
+    assert numtheory.find_first_at_least(values, 13) is None
+    sums = numtheory.get_divisor_sums(20)
+    assert numtheory.find_first_at_least(sums, 12, 1) == 6
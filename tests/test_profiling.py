@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+import profiling
+
+
+def busy():
+    return sum(x * x for x in range(200_000))
+
+
+@pytest.mark.parametrize('mode', profiling.PROFILERS)
+def test_profile(mode, tmp_path):
+    outpath = os.path.join(tmp_path, f'report.{profiling.EXTENSIONS[mode]}')
+    result, (title, columns, rows) = profiling.profile(mode, busy, outpath)
+    assert result == busy()
+    assert os.path.getsize(outpath) > 0
+    assert all(len(row) == len(columns) for row in rows)
+
+
+def test_collapsed_stacks(tmp_path):
+    outpath = os.path.join(tmp_path, 'report.collapsed')
+    profiling.profile_sampling(busy, outpath)
+    with open(outpath) as infile:
+        for line in infile:
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
+            assert 'profile_sampling' not in stack
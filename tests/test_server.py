@@ -0,0 +1,33 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import server
+
+
+def test_solve():
+    inpath = os.path.join('y2018', 'tests', '04')
+    response = server.solve(2018, 4, inpath, True)
+    assert response['ok']
+    assert response['result'] == ['240', '4455']
+    assert not response['cached']
+
+    response = server.solve(2018, 4, 'nonexistent', True)
+    assert not response['ok']
+
+
+def test_request(tmp_path):
+    path = os.path.join(tmp_path, 'advent.sock')
+    with ThreadPoolExecutor(2) as pool:
+        with server.Server(path, pool, None) as s:
+            thread = threading.Thread(target=s.serve_forever, daemon=True)
+            thread.start()
+            try:
+                response = server.request(2019, 1, test=True, path=path)
+                assert response['ok']
+                assert response['result'] == ['34241', '51316']
+
+                response = server.request(2019, 99, test=True, path=path)
+                assert not response['ok']
+            finally:
+                s.shutdown()
@@ -1,3 +1,11 @@
+import itertools
+import math
+import os
+import subprocess
+import sys
+
+import pytest
+
 import util
 
 
@@ -26,3 +34,251 @@ def test_get_digits():
     assert util.get_digits(1) == (1,)
     assert util.get_digits(10) == (1, 0)
     assert util.get_digits(3548915) == (3, 5, 4, 8, 9, 1, 5)
+
+
+def test_grid2d():
+    grid = util.Grid2D.from_lines(['#..', '.#.'], {'#': 1, '.': 0}, pad=1)
+    assert (grid.height, grid.width, grid.stride) == (2, 3, 5)
+    assert grid[0, 0] == 1 and grid[1, 1] == 1 and grid[1, 2] == 0
+    assert grid.count(1) == 2
+    assert grid.to_string({0: '.', 1: '#'}) == '#..\n.#.'
+    i = grid.index(0, 0)
+    assert grid.position(i) == (0, 0)
+    assert sum(grid.cells[i + o] for o in grid.surrounding) == 1
+    assert [grid.cells[i + o] for o in grid.adjacent] == [0, 0, 0, 0]
+
+    copy = grid.copy()
+    assert copy == grid
+    copy[0, 2] = 1
+    assert copy != grid
+    assert grid.snapshot() != copy.snapshot()
+    assert list(grid.indexes()) == [6, 7, 8, 11, 12, 13]
+
+    wide = util.Grid2D(2, 2, fill=3, pad=1, typecode='H')
+    wide[1, 1] = 1000
+    assert wide.total() == 1009
+
+
+def test_grid2d_numpy():
+    pytest.importorskip("numpy")
+    wide = util.Grid2D(2, 2, fill=3, pad=1, typecode='H')
+    wide[1, 1] = 1000
+    assert wide.to_numpy().tolist() == [[3, 3], [3, 1000]]
+
+
+def test_priority_queue():
+    q = util.PriorityQueue()
+    with pytest.raises(KeyError):
+        q.pop()
+    q.push(util.Point(0, 0), 5)
+    q.push(util.Point(1, 2), 3)
+    q.push(util.Point(4, 4), 8)
+    assert len(q) == 3
+    assert q.has_node(util.Point(1, 2))
+    assert q.has_position((4, 4))
+    assert not q.has_position((2, 1))
+
+    q.set_priority(util.Point(4, 4), 1)
+    q.set_priority(util.Point(1, 2), 9)
+    q.push(util.Point(0, 0), 4)
+    assert len(q) == 3
+    assert q.get_priority(util.Point(0, 0)) == 4
+    assert q.pop() == (1, util.Point(4, 4))
+    assert not q.has_position((4, 4))
+    assert q.pop() == (4, util.Point(0, 0))
+    assert q.pop() == (9, util.Point(1, 2))
+    assert not q
+    assert util.Point(1, 2) not in q
+
+
+def test_priority_queue_order():
+    q = util.PriorityQueue()
+    values = [(i * 7919) % 101 for i in range(100)]
+    for i, v in enumerate(values):
+        q.push(i, v)
+    for i in range(0, 100, 3):
+        values[i] = 200 - values[i]
+        q.set_priority(i, values[i])
+    expected = sorted((v, i) for i, v in enumerate(values))
+    assert [q.pop() for _ in range(len(q))] == expected
+
+
+GRAPH = {
+        'a': {'b': 1, 'c': 4},
+        'b': {'a': 1, 'c': 1, 'd': 5},
+        'c': {'a': 4, 'b': 1, 'd': 1},
+        'd': {'b': 5, 'c': 1, 'e': 3},
+        'e': {'d': 3},
+        'f': {},
+        }
+
+
+def test_bfs():
+    result = util.bfs(('a',), GRAPH.get, 'e', paths=True)
+    assert result.distance == 3
+    assert result.get_path() == ['a', 'b', 'd', 'e']
+
+    result = util.bfs(('a',), GRAPH.get)
+    assert result.found is None
+    assert result.cost == {'a': 0, 'b': 1, 'c': 1, 'd': 2, 'e': 3}
+    assert util.bfs(('a',), GRAPH.get, limit=1).cost.keys() == {'a', 'b', 'c'}
+    assert util.bfs(('a',), GRAPH.get, 'f').distance is None
+    assert util.bfs(('e', 'f'), GRAPH.get, 'd').distance == 1
+
+
+def test_dijkstra():
+    def get_neighbours(node):
+        return GRAPH[node].items()
+
+    result = util.dijkstra(('a',), get_neighbours, 'e', paths=True)
+    assert result.distance == 6
+    assert result.get_path() == ['a', 'b', 'c', 'd', 'e']
+
+    result = util.dijkstra(('a',), get_neighbours, targets={'c', 'd'})
+    assert result.found == 'd'
+    assert result.cost['c'] == 2
+    assert result.cost['d'] == 3
+    assert util.dijkstra(('a',), get_neighbours, 'e', limit=5).found is None
+
+
+def test_astar():
+    walls = {(1, 0), (1, 1), (1, 2), (3, 1), (3, 2), (3, 3)}
+
+    def get_neighbours(node):
+        y, x = node
+        for n in ((y + 1, x), (y - 1, x), (y, x + 1), (y, x - 1)):
+            if 0 <= n[0] < 5 and 0 <= n[1] < 4 and n not in walls:
+                yield n, 1
+
+    goal = (4, 0)
+    result = util.astar(
+            (0, 0), get_neighbours,
+            lambda n: util.get_manhattan_distance(n, goal), goal, paths=True)
+    assert result.distance == 10
+    path = result.get_path()
+    assert path[0] == (0, 0) and path[-1] == goal
+    assert len(path) == 11
+
+
+def test_bidirectional_bfs():
+    result = util.bidirectional_bfs('a', 'e', GRAPH.get, paths=True)
+    assert result.distance == 3
+    path = result.get_path()
+    assert path[0] == 'a' and path[-1] == 'e' and len(path) == 4
+    assert util.bidirectional_bfs('a', 'a', GRAPH.get).distance == 0
+    assert util.bidirectional_bfs('a', 'f', GRAPH.get).distance is None
+
+    # A long chain, so that the frontiers meet somewhere in the middle.
+    def get_neighbours(n):
+        return [m for m in (n - 1, n + 1) if 0 <= m <= 100]
+    result = util.bidirectional_bfs(0, 100, get_neighbours, paths=True)
+    assert result.distance == 100
+    assert result.get_path() == list(range(101))
+
+
+def find_square(candidates: range) -> int | None:
+    for n in candidates:
+        if n > 10 and math.isqrt(n) ** 2 == n:
+            return n
+    return None
+
+
+def test_find_first():
+    for workers in (1, 2):
+        # The chunks go on forever, so the search has to stop by itself.
+        chunks = (range(n, n + 3) for n in itertools.count(0, 3))
+        assert util.find_first(find_square, chunks, workers) == (5, 16)
+        chunks = [range(n, n + 3) for n in range(0, 15, 3)]
+        assert util.find_first(find_square, chunks, workers) is None
+
+
+def test_record_timings():
+    with util.record_timings() as timings:
+        with util.timing("Part 1"):
+            pass
+        with util.timing("Part 1"):
+            pass
+        with util.timing("Part 2"):
+            pass
+    with util.timing("Part 3"):
+        pass
+    assert set(timings) == {"Part 1", "Part 2"}
+    assert len(timings["Part 1"]) == 2
+    assert all(x >= 0 for x in timings["Part 2"])
+
+
+def test_spans():
+    with util.collect_spans() as collector:
+        with util.span_attributes(year=2018, day=15):
+            with util.timing("Part 1"):
+                with util.timing("inner"):
+                    pass
+        with util.timing("Part 2"):
+            pass
+    inner, part1, part2 = collector.spans
+    assert inner.name == "inner"
+    assert inner.parent == part1.id
+    assert part1.parent is None
+    assert part1.start <= inner.start <= inner.end <= part1.end
+    assert part1.attrs == {'year': 2018, 'day': 15}
+    assert part2.attrs == {}
+
+
+def test_lazy_imports():
+    # Importing the runner and utilities must not pull in any of the slow
+    # optional dependencies.
+    code = (
+            "import sys, advent, util\n"
+            "slow = {'numba', 'rich', 'PIL'} & set(sys.modules)\n"
+            "assert not slow, slow\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run((sys.executable, '-c', code), cwd=root, check=True)
+
+
+def test_jit():
+    @util.jit
+    def bare(x):
+        return x + 1
+
+    @util.jit(cache=False)
+    def configured(x):
+        return x * 2
+
+    assert bare(1) == 2
+    assert configured(3) == 6
+
+
+def test_jit_fallback(monkeypatch):
+    @util.jit
+    def compiled(x):
+        return x + 1
+
+    @compiled.fallback
+    def alternative(x):
+        return x + 1
+
+    with util.collect_spans() as spans:
+        with util.timing("Part 1"):
+            assert compiled(1) == 2
+    assert spans.spans[0].attrs['backend'] in {'numba', 'fallback'}
+
+    # Without numba, the fallback is used instead.
+    monkeypatch.setitem(sys.modules, 'numba', None)
+    assert util._compile(compiled.__wrapped__, {}, alternative) == (
+            alternative, 'fallback')
+    assert util._compile(compiled.__wrapped__, {}) == (
+            compiled.__wrapped__, 'python')
+
+    # A fallback that needs a missing module isn't used either.
+    @util.jit
+    def needy(x):
+        return x + 1
+
+    @needy.fallback(needs=('numba',))
+    def needy_alternative(x):
+        return x + 1
+
+    with util.collect_spans() as spans:
+        with util.timing("Part 1"):
+            assert needy(1) == 2
+    assert spans.spans[0].attrs['backend'] == 'python'
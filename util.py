@@ -1,40 +1,365 @@
+import array
 import heapq
+import importlib
+import itertools
+import json
 import logging
 import math
+import os
+import re
+import sys
+import threading
 import time
-from collections import namedtuple
+import tracemalloc
+from collections import Counter, defaultdict, deque, namedtuple
 from contextlib import contextmanager
 from enum import Enum, auto
-from functools import total_ordering
+from functools import total_ordering, wraps
+
+import numtheory
 
 try:
-    import numba
-    jit = numba.jit
+    import resource
 except ImportError:
-    # Degrade to a no-op decorator if jit isn't available.
-    def jit(*args):
-        def dec(fn):
-            return fn
-        return dec
+    resource = None
+
+
+def _can_import(names) -> bool:
+    """Return whether all the modules in `names` can be imported."""
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            return False
+    return True
+
+
+def _compile(
+        fn, options: dict, fallback=None, requires: tuple = ()) -> tuple:
+    """Compile `fn` with numba, and return (compiled function, backend).
+
+    If numba isn't available, use `fallback` in its place if there is one
+    and the modules it `requires` can be imported, otherwise the plain
+    Python function.
+    """
+    try:
+        import numba
+    except ImportError:
+        if fallback is not None and _can_import(requires):
+            return fallback, 'fallback'
+        return fn, 'python'
+    if 'cache' not in options and '<locals>' not in fn.__qualname__:
+        # Keep compiled code on disk between runs. Numba can't cache
+        # functions defined inside other functions.
+        options = options | {'cache': True}
+    return numba.jit(**options)(fn), 'numba'
+
+
+def _note_backend(backend: str):
+    """Record that a jit function ran with `backend` in the open timings."""
+    for backends in getattr(_span_state, 'backends', ()):
+        backends.add(backend)
+
+
+def _lazy_jit(fn, options: dict):
+    compiled = None
+    backend = None
+    fallback = None
+    requires = ()
+
+    @wraps(fn)
+    def wrapper(*args):
+        nonlocal compiled, backend
+        if compiled is None:
+            compiled, backend = _compile(fn, options, fallback, requires)
+        _note_backend(backend)
+        return compiled(*args)
+
+    def register_fallback(alt=None, *, needs: tuple = ()):
+        """Use `alt` instead of the original function if numba is missing.
+
+        This is meant for decorating an alternative implementation that
+        doesn't rely on compilation to be fast, such as a NumPy version or a
+        smarter algorithm. Works either bare, or with `needs` naming the
+        modules that `alt` imports; if any of those are missing as well,
+        the original function runs as plain Python.
+        """
+        def register(alt):
+            nonlocal fallback, requires
+            fallback = alt
+            requires = tuple(needs)
+            return alt
+
+        if alt is None:
+            return register
+        return register(alt)
+
+    wrapper.fallback = register_fallback
+    return wrapper
+
+
+def jit(*args, **options):
+    """Compile a function with numba, if numba is available.
+
+    Works either bare (`@jit`) or with numba options (`@jit(nopython=True)`).
+    Numba is very slow to import, so it isn't imported, and the function isn't
+    compiled, until the first time the decorated function is called. Compiled
+    code is cached on disk unless `cache=False` is given.
+
+    A faster alternative for when numba is missing can be registered with
+    `@decorated.fallback`, or `@decorated.fallback(needs=('numpy',))` if it
+    has optional dependencies of its own. Whichever implementation runs is
+    noted on the `timing` blocks around it.
+    """
+    if len(args) == 1 and callable(args[0]) and not options:
+        return _lazy_jit(args[0], {})
+
+    def dec(fn):
+        return _lazy_jit(fn, options)
+    return dec
+
+
+MARKUP = re.compile(r'\[/?(?:[a-z]+(?: [a-z]+)*)?\]|:[a-z_]+:\s*')
+
+
+def strip_markup(text: str) -> str:
+    """Remove Rich console markup tags and emoji codes from `text`."""
+    return MARKUP.sub('', text)
+
+
+_plain_output = False
+
+
+def set_plain_output(plain: bool = True):
+    """Turn plain output for `rich_print` on or off."""
+    global _plain_output
+    _plain_output = plain
+
+
+def rich_print(*args, **kwargs):
+    """Print with Rich, if it's available and plain output isn't turned on.
+
+    Rich is only imported the first time this is called, so that modules which
+    print with Rich don't pay for importing it unless they actually print.
+    Otherwise, fall back to the builtin print with any markup stripped.
+    """
+    if not _plain_output:
+        try:
+            from rich import print as rprint
+        except ImportError:
+            pass
+        else:
+            return rprint(*args, **kwargs)
+    print(*(strip_markup(str(x)) for x in args), **kwargs)
+
+
+def format_duration(nanos: int) -> str:
+    """Format a duration in nanoseconds for display.
+
+    Durations under ten seconds are shown in whole microseconds, longer ones
+    in seconds.
+    """
+    micros = nanos // 1000
+    if micros < 10_000_000:
+        return f'{micros:,d}'
+    seconds = micros / 1_000_000
+    return f'{seconds:,.2f}s'
+
+
+# A record of one completed `timing` block. `start` and `end` are
+# `time.perf_counter_ns` values, `parent` is the id of the enclosing span (or
+# None), and `memory` is the growth in peak memory use over the span, in bytes.
+# `attrs` holds any attributes set by `span_attributes`, such as the puzzle
+# year and day.
+Span = namedtuple(
+        'span',
+        ['id', 'parent', 'name', 'start', 'end', 'memory', 'thread', 'attrs'])
+
+
+class SpanCollector:
+    """A span sink that keeps every span it receives in memory."""
+    def __init__(self):
+        self.spans = []
+
+    def emit(self, span: Span):
+        self.spans.append(span)
+
+    def close(self):
+        pass
+
+    def get_durations(self) -> dict:
+        """Return a mapping of span names to lists of durations."""
+        result = defaultdict(list)
+        for span in self.spans:
+            result[span.name].append(span.end - span.start)
+        return result
+
+
+class JSONLinesSink:
+    """A span sink that writes each span as one line of JSON."""
+    def __init__(self, path: str):
+        self.stream = open(path, 'w')
+
+    def emit(self, span: Span):
+        self.stream.write(json.dumps(span._asdict(), default=str) + '\n')
+
+    def close(self):
+        self.stream.close()
+
+
+class ChromeTraceSink:
+    """A span sink that writes the Chrome trace-event format on close.
+
+    The output can be loaded into chrome://tracing, Perfetto or speedscope to
+    view the spans on a timeline or as a flame graph.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.events = []
+
+    def emit(self, span: Span):
+        args = dict(span.attrs)
+        args['id'] = span.id
+        args['parent'] = span.parent
+        args['memory'] = span.memory
+        self.events.append({
+                'name': span.name,
+                'ph': 'X',
+                'ts': span.start / 1000,
+                'dur': (span.end - span.start) / 1000,
+                'pid': os.getpid(),
+                'tid': span.thread,
+                'args': args,
+                })
+
+    def close(self):
+        with open(self.path, 'w') as outfile:
+            json.dump({'traceEvents': self.events}, outfile, default=str)
+
+
+_span_sinks = []
+_span_attrs = [{}]
+_span_ids = itertools.count(1)
+_span_state = threading.local()
+
+
+def add_span_sink(sink):
+    """Start sending spans from `timing` blocks to `sink`.
+
+    A sink is any object with `emit(span)` and `close()` methods.
+    """
+    _span_sinks.append(sink)
+
+
+def remove_span_sink(sink, close: bool = True):
+    _span_sinks.remove(sink)
+    if close:
+        sink.close()
+
+
+@contextmanager
+def span_sink(sink):
+    """Send spans to `sink` for the duration of the context, then close it."""
+    add_span_sink(sink)
+    try:
+        yield sink
+    finally:
+        remove_span_sink(sink)
+
+
+@contextmanager
+def span_attributes(**attrs):
+    """Attach `attrs` to every span completed inside this context."""
+    _span_attrs.append(_span_attrs[-1] | attrs)
+    try:
+        yield
+    finally:
+        _span_attrs.pop()
+
+
+def get_peak_memory() -> int:
+    """Return the peak memory use of this process so far, in bytes.
+
+    If tracemalloc is tracing, this is the peak traced memory, otherwise it is
+    the peak resident set size.
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports the peak in KiB, macOS in bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _open_span() -> tuple:
+    stack = getattr(_span_state, 'stack', None)
+    if stack is None:
+        stack = _span_state.stack = []
+    parent = stack[-1] if stack else None
+    span_id = next(_span_ids)
+    stack.append(span_id)
+    return (span_id, parent, get_peak_memory())
+
+
+def _close_span(
+        opened: tuple, name: str, start: int, end: int, backends: set):
+    span_id, parent, memory = opened
+    _span_state.stack.pop()
+    attrs = _span_attrs[-1]
+    if backends:
+        attrs = attrs | {'backend': ','.join(sorted(backends))}
+    span = Span(
+            span_id, parent, name, start, end,
+            get_peak_memory() - memory,
+            threading.get_ident(),
+            attrs)
+    for sink in _span_sinks:
+        sink.emit(span)
 
 
 @contextmanager
 def timing(message: str = None) -> int:
     start = time.perf_counter_ns()
+    opened = _open_span() if _span_sinks else None
+    stack = getattr(_span_state, 'backends', None)
+    if stack is None:
+        stack = _span_state.backends = []
+    backends = set()
+    stack.append(backends)
     if message:
         logging.info(f"[.........] :green_circle: [green]START[/] {message}")
     try:
         yield start
     finally:
         end = time.perf_counter_ns()
-        dur = end - start
-        micros = dur // 1000
-        if micros < 10_000_000:
-            t = f'{micros:,d}'
-        else:
-            seconds = micros / 1_000_000
-            t = f'{seconds:,.2f}s'
-        logging.info(f"[{t:>9s}] :stop_sign:   [red]END[/] {message}")
+        stack.pop()
+        t = format_duration(end - start)
+        note = f" ({', '.join(sorted(backends))})" if backends else ''
+        logging.info(f"[{t:>9s}] :stop_sign:   [red]END[/] {message}{note}")
+        if opened is not None:
+            _close_span(opened, message, start, end, backends)
+
+
+@contextmanager
+def collect_spans() -> SpanCollector:
+    """Collect all the spans completed inside this context in memory."""
+    with span_sink(SpanCollector()) as collector:
+        yield collector
+
+
+@contextmanager
+def record_timings() -> dict:
+    """Collect the durations of all `timing` blocks run inside this context.
+
+    Yield a dict that maps each timing message to a list of the durations
+    recorded for it, in nanoseconds. The dict is filled in when the context
+    exits.
+    """
+    result = {}
+    with collect_spans() as collector:
+        yield result
+    result.update(collector.get_durations())
 
 
 @total_ordering
@@ -100,61 +425,595 @@ def get_manhattan_distance(a: tuple[int], b: tuple[int]) -> int:
     return sum(abs(b[i] - a[i]) for i in range(len(a)))
 
 
+class Grid2D:
+    """A rectangular grid of small integers, stored in one flat array.
+
+    Cells live in a `bytearray` (or an `array.array` of another `typecode`,
+    for values that don't fit in a byte), row after row, `stride` cells per
+    row. The grid can be surrounded by `pad` cells of `border` on every side,
+    so that code looking at the neighbours of a cell near the edge finds the
+    border value there instead of needing bounds checks.
+
+    Cells can be addressed by (y, x) position, with (0, 0) the top-left cell
+    inside the padding, or directly by flat index into `cells`. Adding one of
+    the offsets in `adjacent` (N, E, S, W) or `surrounding` (all eight) to an
+    index gives the index of a neighbour. That only stays inside the array
+    for cells that have padding around them.
+    """
+    def __init__(
+            self,
+            height: int,
+            width: int,
+            fill: int = 0,
+            pad: int = 0,
+            border: int = 0,
+            typecode: str = 'B'):
+        self.height = height
+        self.width = width
+        self.pad = pad
+        self.stride = width + 2 * pad
+        self.typecode = typecode
+        size = self.stride * (height + 2 * pad)
+        if typecode == 'B':
+            self.cells = bytearray([border]) * size
+        else:
+            self.cells = array.array(typecode, [border]) * size
+        if fill != border:
+            row = self.cells[:width]
+            for i in range(width):
+                row[i] = fill
+            for y in range(height):
+                start = self.index(y, 0)
+                self.cells[start:start + width] = row
+
+        s = self.stride
+        self.adjacent = (-s, 1, s, -1)
+        self.surrounding = (-s - 1, -s, -s + 1, -1, 1, s - 1, s, s + 1)
+
+    @classmethod
+    def from_lines(
+            cls,
+            lines,
+            values: dict | None = None,
+            pad: int = 0,
+            border: int = 0,
+            typecode: str = 'B') -> 'Grid2D':
+        """Make a grid from lines of text, one character per cell.
+
+        `values` maps each character to its cell value. Without it, cells
+        hold the character codes themselves.
+        """
+        lines = [line.rstrip('\n') for line in lines]
+        lines = [line for line in lines if line]
+        grid = cls(len(lines), len(lines[0]), border, pad, border, typecode)
+        for y, line in enumerate(lines):
+            if values is None:
+                row = line.encode('ascii')
+            else:
+                row = [values[ch] for ch in line]
+            if typecode != 'B':
+                row = array.array(typecode, list(row))
+            start = grid.index(y, 0)
+            grid.cells[start:start + grid.width] = row
+        return grid
+
+    def index(self, y: int, x: int) -> int:
+        return (y + self.pad) * self.stride + x + self.pad
+
+    def position(self, index: int) -> tuple[int, int]:
+        y, x = divmod(index, self.stride)
+        return (y - self.pad, x - self.pad)
+
+    def in_bounds(self, y: int, x: int) -> bool:
+        return 0 <= y < self.height and 0 <= x < self.width
+
+    def __getitem__(self, position: tuple[int, int]) -> int:
+        y, x = position
+        return self.cells[(y + self.pad) * self.stride + x + self.pad]
+
+    def __setitem__(self, position: tuple[int, int], value: int):
+        y, x = position
+        self.cells[(y + self.pad) * self.stride + x + self.pad] = value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Grid2D):
+            return NotImplemented
+        return self.stride == other.stride and self.cells == other.cells
+
+    __hash__ = None
+
+    def indexes(self):
+        """Generate the flat index of every cell inside the padding."""
+        for y in range(self.height):
+            start = self.index(y, 0)
+            yield from range(start, start + self.width)
+
+    def get_row(self, y: int):
+        start = self.index(y, 0)
+        return self.cells[start:start + self.width]
+
+    def count(self, value: int) -> int:
+        """Return how many cells inside the padding hold `value`."""
+        if self.pad == 0:
+            return self.cells.count(value)
+        return sum(self.get_row(y).count(value) for y in range(self.height))
+
+    def total(self) -> int:
+        """Return the sum of the cells inside the padding."""
+        if self.pad == 0:
+            return sum(self.cells)
+        return sum(sum(self.get_row(y)) for y in range(self.height))
+
+    def snapshot(self) -> bytes:
+        """Return the contents of the grid as hashable bytes.
+
+        This is handy for spotting repeated states, by keeping the snapshots
+        in a dict or set.
+        """
+        return bytes(self.cells)
+
+    def copy(self) -> 'Grid2D':
+        result = object.__new__(Grid2D)
+        result.__dict__.update(self.__dict__)
+        result.cells = self.cells[:]
+        return result
+
+    def to_string(self, chars: dict | None = None) -> str:
+        """Return the grid as lines of text, one character per cell.
+
+        `chars` maps cell values to characters. Without it, cells are taken
+        to be character codes.
+        """
+        lines = []
+        for y in range(self.height):
+            row = self.get_row(y)
+            if chars is None:
+                lines.append(bytes(row).decode('ascii'))
+            else:
+                lines.append(''.join(chars[v] for v in row))
+        return '\n'.join(lines)
+
+    def to_numpy(self):
+        """Return a NumPy array view of the cells inside the padding.
+
+        The view shares memory with the grid, so changes to either one show
+        up in the other.
+        """
+        import numpy as np
+
+        full = np.frombuffer(self.cells, dtype=self.typecode).reshape(
+                (self.height + 2 * self.pad, self.stride))
+        p = self.pad
+        return full[p:p + self.height, p:p + self.width]
+
+
 class PriorityQueue:
+    """A min-priority queue of unique nodes.
+
+    This is a binary heap of (priority, node) entries, along with an index
+    from each node to its position in the heap, so that membership tests are
+    O(1) and changing the priority of a queued node is O(log n), without
+    leaving stale entries behind in the heap. Entries with equal priority are
+    ordered by node, so nodes need to be comparable.
+    """
     def __init__(self):
-        self.queue = []
-        self.finder = {}
-        self.deleted = set()
+        self.heap = []
+        self.index = {}
+        self.positions = None
 
     def __len__(self):
-        return len(self.queue)
+        return len(self.heap)
 
     def __bool__(self):
-        return bool(self.finder)
+        return bool(self.heap)
+
+    def __contains__(self, node):
+        return node in self.index
 
     def push(self, node, priority):
-        entry = (priority, node)
-        heapq.heappush(self.queue, entry)
-        self.finder[node] = entry
+        if node in self.index:
+            self.set_priority(node, priority)
+            return
+        i = len(self.heap)
+        self.heap.append((priority, node))
+        self.index[node] = i
+        self._sift_up(i)
+        if self.positions is not None:
+            self.positions[(node.y, node.x)] += 1
 
     def has_node(self, node):
-        return node in self.finder
+        return node in self.index
 
     def has_position(self, position):
-        return position in {(n.y, n.x) for n in self.finder.keys()}
+        """Return whether any queued node is at `position`.
+
+        Nodes must have `y` and `x` attributes to use this. The index of
+        positions is only built the first time it is needed, and kept up to
+        date from then on.
+        """
+        if self.positions is None:
+            self.positions = Counter((n.y, n.x) for n in self.index)
+        return self.positions[position] > 0
+
+    def get_priority(self, node):
+        return self.heap[self.index[node]][0]
 
     def set_priority(self, node, priority):
-        if node in self.finder:
-            self.deleted.add(id(self.finder[node]))
-        self.push(node, priority)
+        """Set the priority of `node`, adding it to the queue if necessary."""
+        i = self.index.get(node)
+        if i is None:
+            self.push(node, priority)
+            return
+        old = self.heap[i]
+        entry = (priority, node)
+        self.heap[i] = entry
+        if entry < old:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
 
     def pop(self):
-        while self.queue:
-            entry = heapq.heappop(self.queue)
-            if id(entry) not in self.deleted:
-                del self.finder[entry[1]]
-                return entry
-            self.deleted.discard(id(entry))
-        raise KeyError('Cannot pop from empty priority queue')
+        """Remove and return the lowest priority (priority, node) entry."""
+        heap = self.heap
+        if not heap:
+            raise KeyError('Cannot pop from empty priority queue')
+        last = heap.pop()
+        if heap:
+            result = heap[0]
+            heap[0] = last
+            self._sift_down(0)
+        else:
+            result = last
+        node = result[1]
+        del self.index[node]
+        if self.positions is not None:
+            self.positions[(node.y, node.x)] -= 1
+        return result
+
+    def _sift_up(self, i: int):
+        heap = self.heap
+        index = self.index
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            other = heap[parent]
+            if not entry < other:
+                break
+            heap[i] = other
+            index[other[1]] = i
+            i = parent
+        heap[i] = entry
+        index[entry[1]] = i
+
+    def _sift_down(self, i: int):
+        heap = self.heap
+        index = self.index
+        size = len(heap)
+        entry = heap[i]
+        child = 2 * i + 1
+        while child < size:
+            right = child + 1
+            if right < size and heap[right] < heap[child]:
+                child = right
+            other = heap[child]
+            if not other < entry:
+                break
+            heap[i] = other
+            index[other[1]] = i
+            i = child
+            child = 2 * i + 1
+        heap[i] = entry
+        index[entry[1]] = i
+
+
+class SearchResult:
+    """The outcome of a graph search.
+
+    `cost` maps every node reached to the cost of the cheapest path found to
+    it, and `found` is the goal node the search stopped at, if any. When a
+    weighted search stops early, the costs of nodes still on its frontier are
+    not necessarily final.
+
+    `parents` maps each node to the node it was reached from, if the search
+    was asked to record paths, otherwise it is None.
+    """
+    def __init__(self, cost: dict, parents: dict | None = None, found=None):
+        self.cost = cost
+        self.parents = parents
+        self.found = found
+
+    @property
+    def distance(self) -> int | None:
+        """The cost of the path to the goal, or None if it wasn't found."""
+        if self.found is None:
+            return None
+        return self.cost[self.found]
+
+    def get_path(self, node=None) -> list:
+        """Return the list of nodes on the path from a start to `node`.
+
+        If `node` is not given, return the path to the goal that was found.
+        """
+        if self.parents is None:
+            raise ValueError("This search did not record paths")
+        if node is None:
+            node = self.found
+        result = [node]
+        while node in self.parents:
+            node = self.parents[node]
+            result.append(node)
+        result.reverse()
+        return result
+
+
+def _get_stop(goal, is_goal, targets):
+    """Return a function that says when a search should stop, or None."""
+    if targets is not None:
+        remaining = set(targets)
+
+        def stop(node) -> bool:
+            remaining.discard(node)
+            return not remaining
+        return stop if remaining else (lambda node: True)
+    if is_goal is not None:
+        return is_goal
+    if goal is not None:
+        return lambda node: node == goal
+    return None
+
+
+def bfs(
+        starts,
+        get_neighbours,
+        goal=None,
+        is_goal=None,
+        targets=None,
+        limit: int | None = None,
+        paths: bool = False,
+        ) -> SearchResult:
+    """Breadth-first search from the nodes in `starts`.
+
+    `get_neighbours(node)` returns an iterable of the nodes adjacent to
+    `node`, each one step away. The search stops at the first node that is
+    `goal` or satisfies `is_goal(node)`, or once every node in `targets` has
+    been reached. With none of those, it explores everything reachable. Paths
+    longer than `limit` steps are not explored.
+    """
+    cost = dict.fromkeys(starts, 0)
+    parents = {} if paths else None
+    stop = _get_stop(goal, is_goal, targets)
+    if stop is not None:
+        for node in cost:
+            if stop(node):
+                return SearchResult(cost, parents, node)
+
+    q = deque(cost)
+    while q:
+        node = q.popleft()
+        score = cost[node] + 1
+        if limit is not None and score > limit:
+            break
+        for n in get_neighbours(node):
+            if n in cost:
+                continue
+            cost[n] = score
+            if parents is not None:
+                parents[n] = node
+            if stop is not None and stop(n):
+                return SearchResult(cost, parents, n)
+            q.append(n)
+    return SearchResult(cost, parents)
+
+
+def dijkstra(
+        starts,
+        get_neighbours,
+        goal=None,
+        is_goal=None,
+        targets=None,
+        limit: int | None = None,
+        paths: bool = False,
+        heuristic=None,
+        ) -> SearchResult:
+    """Find the cheapest paths from the nodes in `starts`.
+
+    `get_neighbours(node)` returns an iterable of (neighbour, cost) pairs.
+    Goals work as for `bfs()`, and paths whose cost (plus heuristic) is over
+    `limit` are not explored.
+
+    If a `heuristic(node)` is given, this is an A* search, and the heuristic
+    must never overestimate the remaining cost, nor drop by more than the
+    cost of any step. Ties are broken by comparing nodes, so they need to be
+    orderable.
+    """
+    cost = {}
+    heap = []
+    for node in starts:
+        cost[node] = 0
+        heap.append((heuristic(node) if heuristic else 0, node))
+    heapq.heapify(heap)
+    parents = {} if paths else None
+    stop = _get_stop(goal, is_goal, targets)
+    closed = set()
+
+    while heap:
+        f, node = heapq.heappop(heap)
+        if node in closed:
+            continue
+        if limit is not None and f > limit:
+            break
+        if stop is not None and stop(node):
+            return SearchResult(cost, parents, node)
+        closed.add(node)
+        base = cost[node]
+        for n, step in get_neighbours(node):
+            score = base + step
+            if score < cost.get(n, INF):
+                cost[n] = score
+                if parents is not None:
+                    parents[n] = node
+                if heuristic is not None:
+                    heapq.heappush(heap, (score + heuristic(n), n))
+                else:
+                    heapq.heappush(heap, (score, n))
+    return SearchResult(cost, parents)
+
+
+def astar(
+        start,
+        get_neighbours,
+        heuristic,
+        goal=None,
+        is_goal=None,
+        limit: int | None = None,
+        paths: bool = False,
+        ) -> SearchResult:
+    """A* search from `start`; see `dijkstra()` for the details."""
+    return dijkstra(
+            (start,), get_neighbours, goal, is_goal, None, limit, paths,
+            heuristic)
+
+
+def bidirectional_bfs(
+        start,
+        goal,
+        get_neighbours,
+        get_predecessors=None,
+        paths: bool = False,
+        ) -> SearchResult:
+    """Breadth-first search from both `start` and `goal` until they meet.
+
+    Each round expands whichever frontier is smaller, by one whole level. If
+    the graph is directed, `get_predecessors(node)` must return the nodes
+    that lead to `node`; otherwise the edges are assumed to go both ways.
+
+    The costs in the result are those found by the forward search, plus the
+    goal itself if it is reachable.
+    """
+    get_predecessors = get_predecessors or get_neighbours
+    forward = {start: 0}
+    backward = {goal: 0}
+    fparents = {}
+    bparents = {}
+    ffront = [start]
+    bfront = [goal]
+    meet = start if start == goal else None
+
+    while meet is None and ffront and bfront:
+        if len(ffront) <= len(bfront):
+            dist, other, links, front = forward, backward, fparents, ffront
+            expand = get_neighbours
+        else:
+            dist, other, links, front = backward, forward, bparents, bfront
+            expand = get_predecessors
+        best = INF
+        new = []
+        for node in front:
+            score = dist[node] + 1
+            for n in expand(node):
+                if n in dist:
+                    continue
+                dist[n] = score
+                links[n] = node
+                new.append(n)
+                if n in other and score + other[n] < best:
+                    best = score + other[n]
+                    meet = n
+        if dist is forward:
+            ffront = new
+        else:
+            bfront = new
+
+    if meet is None:
+        return SearchResult(forward, {} if paths else None)
+    cost = forward.copy()
+    cost[goal] = forward[meet] + backward[meet]
+    parents = None
+    if paths:
+        parents = fparents.copy()
+        node = meet
+        while node != goal:
+            parents[bparents[node]] = node
+            node = bparents[node]
+    return SearchResult(cost, parents, goal)
+
+
+def find_first(
+        search,
+        chunks,
+        workers: int | None = None,
+        initializer=None,
+        initargs: tuple = ()) -> tuple | None:
+    """Return the first chunk, in order, where `search` finds a result.
+
+    `chunks` is an iterable of arguments for `search`, and may be endless.
+    `search(chunk)` returns a result, or None if nothing in the chunk
+    matched. Return (n, result) for the first chunk n with a result, or
+    None if the chunks run out without one.
+
+    Chunks are shared out across a pool of worker processes, one per CPU
+    core by default, each set up with `initializer(*initargs)`. These must
+    be module-level functions, so that the workers can unpickle them. The
+    search ends once some chunk has a result and every chunk before it has
+    finished, and any other chunks are cancelled. With only one worker,
+    everything runs in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = enumerate(chunks)
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for n, chunk in chunks:
+            result = search(chunk)
+            if result is not None:
+                return (n, result)
+        return None
+
+    import multiprocessing
+    from concurrent.futures import (
+            FIRST_COMPLETED, ProcessPoolExecutor, wait)
+
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=initializer,
+            initargs=initargs) as pool:
+        futures = {}
+        hits = {}
+        exhausted = False
+        while True:
+            # Keep a couple of chunks queued up for each worker, until
+            # there's a result to wait on.
+            while not hits and not exhausted and len(futures) < 2 * workers:
+                item = next(chunks, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    futures[pool.submit(search, item[1])] = item[0]
+            if not futures:
+                return None
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                n = futures.pop(future)
+                result = future.result()
+                if result is not None:
+                    hits[n] = result
+            if hits:
+                first = min(hits)
+                if all(n > first for n in futures.values()):
+                    for future in futures:
+                        future.cancel()
+                    return (first, hits[first])
 
 
-@jit
 def is_prime(value: int) -> bool:
-    for n in range(2, value ** 0.5 + 1):
-        if value % n == 0:
-            return False
-    return True
+    return numtheory.is_prime(value)
 
 
-@jit
 def get_divisors(value: int) -> set:
-    result = {1, value}
-    for n in range(2, value ** 0.5 + 1):
-        div, mod = divmod(value, n)
-        if mod == 0:
-            result.add(div)
-            result.add(n)
-    return result
+    return numtheory.get_divisors(value)
 
 
 def get_digits(value: int) -> tuple:
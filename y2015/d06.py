@@ -1,28 +1,43 @@
 import re
+from array import array
+
+from util import Grid2D
 
 
 PATTERN = re.compile(r'([\w ]+) (\d+),(\d+) through (\d+),(\d+)')
+TOGGLE = bytes.maketrans(b'\x00\x01', b'\x01\x00')
 
 
 class Grid:
+    typecode = 'B'
+
     def __init__(self, size=1000):
         self.size = size
-        self.lights = [[0 for _ in range(size)] for _ in range(size)]
+        self.lights = Grid2D(size, size, typecode=self.typecode)
 
-    def turn_on(self, y1: int, x1: int, y2: int, x2: int):
-        chunk = [1] * (x2 - x1 + 1)
+    def get_spans(self, y1: int, x1: int, y2: int, x2: int):
+        """Generate the start and end index of each row of a rectangle."""
+        width = x2 - x1 + 1
         for i in range(y1, y2 + 1):
-            self.lights[i][x1:x2 + 1] = chunk
+            start = self.lights.index(i, x1)
+            yield start, start + width
+
+    def turn_on(self, y1: int, x1: int, y2: int, x2: int):
+        cells = self.lights.cells
+        chunk = b'\x01' * (x2 - x1 + 1)
+        for a, b in self.get_spans(y1, x1, y2, x2):
+            cells[a:b] = chunk
 
     def turn_off(self, y1: int, x1: int, y2: int, x2: int):
-        chunk = [0] * (x2 - x1 + 1)
-        for i in range(y1, y2 + 1):
-            self.lights[i][x1:x2 + 1] = chunk
+        cells = self.lights.cells
+        chunk = bytes(x2 - x1 + 1)
+        for a, b in self.get_spans(y1, x1, y2, x2):
+            cells[a:b] = chunk
 
     def toggle(self, y1: int, x1: int, y2: int, x2: int):
-        for i in range(y1, y2 + 1):
-            chunk = [int(not x) for x in self.lights[i][x1:x2 + 1]]
-            self.lights[i][x1:x2 + 1] = chunk
+        cells = self.lights.cells
+        for a, b in self.get_spans(y1, x1, y2, x2):
+            cells[a:b] = cells[a:b].translate(TOGGLE)
 
     def process_line(self, line: str) -> None:
         m = PATTERN.fullmatch(line)
@@ -44,7 +59,7 @@ class Grid:
                 raise ValueError(f"Unknown instruction {cmd}")
 
     def get_total_light(self):
-        return sum(map(sum, self.lights))
+        return self.lights.total()
 
     def to_image(self):
         from PIL import Image, ImageDraw
@@ -55,7 +70,7 @@ class Grid:
             for j in range(self.size):
                 y = 1 + i * 3
                 x = 1 + j * 3
-                if self.lights[i][j]:
+                if self.lights[i, j]:
                     draw.point([(x, y)], '#ffa126')
                     draw.point([(x + 1, y), (x, y + 1)], '#ffb737')
                     draw.point([(x + 1, y + 1)], '#ffca46')
@@ -64,20 +79,23 @@ class Grid:
 
 
 class BrightnessGrid(Grid):
+    # Brightness can go well past what fits in a byte.
+    typecode = 'H'
+
     def turn_on(self, y1: int, x1: int, y2: int, x2: int):
-        for i in range(y1, y2 + 1):
-            chunk = [x + 1 for x in self.lights[i][x1:x2 + 1]]
-            self.lights[i][x1:x2 + 1] = chunk
+        cells = self.lights.cells
+        for a, b in self.get_spans(y1, x1, y2, x2):
+            cells[a:b] = array('H', [x + 1 for x in cells[a:b]])
 
     def turn_off(self, y1: int, x1: int, y2: int, x2: int):
-        for i in range(y1, y2 + 1):
-            chunk = [max(0, x - 1) for x in self.lights[i][x1:x2 + 1]]
-            self.lights[i][x1:x2 + 1] = chunk
+        cells = self.lights.cells
+        for a, b in self.get_spans(y1, x1, y2, x2):
+            cells[a:b] = array('H', [x - 1 if x else 0 for x in cells[a:b]])
 
     def toggle(self, y1: int, x1: int, y2: int, x2: int):
-        for i in range(y1, y2 + 1):
-            chunk = [x + 2 for x in self.lights[i][x1:x2 + 1]]
-            self.lights[i][x1:x2 + 1] = chunk
+        cells = self.lights.cells
+        for a, b in self.get_spans(y1, x1, y2, x2):
+            cells[a:b] = array('H', [x + 2 for x in cells[a:b]])
 
 
 def run(stream, test=False):
@@ -1,6 +1,7 @@
 import re
 from itertools import permutations
-from rich import print
+
+from util import rich_print as print
 
 
 PATTERN = re.compile(
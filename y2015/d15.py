@@ -2,7 +2,7 @@ import re
 from collections import defaultdict
 from itertools import combinations_with_replacement
 
-from rich import print
+from util import rich_print as print
 
 
 PATTERN = re.compile(
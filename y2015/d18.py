@@ -1,47 +1,52 @@
-from PIL import Image, ImageDraw
+from typing import TYPE_CHECKING
+
+from util import Grid2D
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 class Grid:
     """A square grid of binary light cells"""
     def __init__(self):
-        self.lights = []
+        self.lights = None
         self.size = None
 
     def parse(self, stream):
-        for line in stream:
-            line = line.strip()
-            self.lights.append([int(x == '#') for x in line])
-        self.size = len(self.lights)
+        lines = [line.strip() for line in stream]
+        self.lights = Grid2D.from_lines(lines, {'#': 1, '.': 0}, pad=1)
+        self.size = self.lights.height
 
     def count_on(self):
-        return sum(map(sum, self.lights))
+        return self.lights.total()
 
     def count_on_neighbours(self, row: int, col: int) -> int:
-        result = 0
-        for i in range(max(0, row - 1), min(self.size, row + 2)):
-            result += sum(self.lights[i][max(0, col - 1): col + 2])
-        return result
+        cells = self.lights.cells
+        i = self.lights.index(row, col)
+        return sum(cells[i + offset] for offset in self.lights.surrounding)
 
     def update(self):
-        new = []
-        for i in range(self.size):
-            row = []
-            for j in range(self.size):
-                v = self.lights[i][j]
-                n = self.count_on_neighbours(i, j) - v
-                if v:
-                    v = int(n in {2, 3})
-                else:
-                    v = int(n == 3)
-                row.append(v)
-            new.append(row)
-        self.lights = new
+        lights = self.lights
+        cells = lights.cells
+        new = cells[:]
+        around = lights.surrounding
+        for i in lights.indexes():
+            n = 0
+            for offset in around:
+                n += cells[i + offset]
+            if cells[i]:
+                new[i] = n == 2 or n == 3
+            else:
+                new[i] = n == 3
+        lights.cells = new
 
     def run(self, steps: int):
         for _ in range(steps):
             self.update()
 
-    def draw(self) -> Image:
+    def draw(self) -> 'Image.Image':
+        from PIL import Image, ImageDraw
+
         size = 3 * self.size + 1  # 2 pixels per cell, plus border
         im = Image.new('RGB', (size, size), '#1a1a1a')
         draw = ImageDraw.Draw(im)
@@ -49,13 +54,13 @@ class Grid:
             for j in range(self.size):
                 y = 1 + i * 3
                 x = 1 + j * 3
-                if self.lights[i][j]:
+                if self.lights[i, j]:
                     draw.point([(x, y)], '#ffa126')
                     draw.point([(x + 1, y), (x, y + 1)], '#ffb737')
                     draw.point([(x + 1, y + 1)], '#ffca46')
         return im
 
-    def run_and_draw(self, steps: int) -> list[Image]:
+    def run_and_draw(self, steps: int) -> list['Image.Image']:
         images = []
         for _ in range(steps):
             self.update()
@@ -70,26 +75,12 @@ class CornerLockedGrid(Grid):
         return {(0, 0), (0, m), (m, 0), (m, m)}
 
     def update(self):
-        new = []
-        for i in range(self.size):
-            row = []
-            for j in range(self.size):
-                if (i, j) in self.corners:
-                    v = 1
-                else:
-                    v = self.lights[i][j]
-                    n = self.count_on_neighbours(i, j) - v
-                    if v:
-                        v = int(n in {2, 3})
-                    else:
-                        v = int(n == 3)
-                row.append(v)
-            new.append(row)
-        self.lights = new
+        super().update()
+        self.setup_corners()
 
     def setup_corners(self):
-        for i, j in self.corners:
-            self.lights[i][j] = 1
+        for corner in self.corners:
+            self.lights[corner] = 1
 
     def run(self, steps: int):
         self.setup_corners()
@@ -105,7 +96,7 @@ def run(stream, test=False, draw=False):
     grid = Grid()
     grid.parse(stream)
     grid2 = CornerLockedGrid()
-    grid2.lights = grid.lights
+    grid2.lights = grid.lights.copy()
     grid2.size = grid.size
     if draw:
         images = grid.run_and_draw(steps)
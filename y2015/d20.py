@@ -1,5 +1,8 @@
 import math
 
+from numtheory import find_first_at_least, get_divisor_sums
+from util import timing
+
 
 def get_factors(n: int) -> set[int]:
     f = {1, n}
@@ -37,95 +40,36 @@ def get_presents2(n: int) -> int:
     return sum(get_factors2(n, math.ceil(n / 50))) * 11
 
 
-def get_distinct_partitions(n: int) -> set:
-    """Return all the partitions of `n` as multiple distinct positive integers.
-
-    A partition is a way of composing a number as a sum of other numbers. A
-    partition with distinct parts is one that doesn't use any component more
-    than once.
-
-    The partition with one component, `n` itself, is not included. As a result,
-    values of `n` smaller than 3 cannot yield any partitions and are not valid.
+def find_house(target: int, max_multiple: int | None = None) -> int:
+    """Return the first house whose divisor sum is at least `target`.
 
-    For valid inputs, this function will always return at least one partition
-    {1, n - 1}.
-
-    The result is structured as a set of frozensets of integers.
-
-    >>> get_distinct_partitions(5)
-    {frozenset({1, 4}), frozenset({2, 3})}
-    """
-    assert n > 2
-    result = set()
-    q = []
-    for i in range(1, n // 2 + 1):
-        r = n - i
-        p = frozenset({i, r})
-        if len(p) == 2 and p not in result:
-            result.add(p)
-            q.append(({i}, r))
-    while q:
-        parts, rem = q.pop(0)
-        for i in range(1, rem // 2 + 1):
-            r = rem - i
-            if i in parts or r in parts or i == r:
-                continue
-            p = frozenset(parts | {i, r})
-            result.add(p)
-            q.append((parts | {i}, r))
-            q.append((parts | {r}, i))
-    return result
-
-
-def is_factor_set(values: tuple[int]) -> bool:
-    """Return whether the given integers constitute a set of factors.
-
-    The values are assumed to already be sorted from smallest to largest.
+    House `target` is sure to make it, but for large targets the answer is
+    usually a lot closer to target / 4, so start by working out the divisor
+    sums up to a third of the way there, in one sweep, and double the limit
+    until some house makes it.
     """
-    if len(values) < 2 or values[0] != 1:
-        return False
-    prod = values[0] * values[-1]
-    for i in range(1, len(values) // 2):
-        p = values[i] * values[-i - 1]
-        if p != prod:
-            return False
-    return True
+    limit = max(target // 3, 1)
+    while True:
+        limit = min(limit, target)
+        sums = get_divisor_sums(limit, max_multiple)
+        house = find_first_at_least(sums, target, 1)
+        if house is not None:
+            return house
+        limit *= 2
 
 
-def get_factor_sets(presents: int) -> set:
-    """Return all the factor sets for this number of presents.
-
-    Divide `presents` by 10, then find integer partitions that don't re-use any
-    numbers. From those partitions, exclude any that are not a proper set of
-    factors.
+def get_house(presents: int) -> int:
+    """Return the first house number that gets at least `presents`.
 
-    The result is a set of tuples of integers.
+    Each elf delivers ten times its number to every house it visits, so
+    house n gets ten times the sum of its divisors.
     """
-    assert presents % 10 == 0
-    n = presents // 10
-    parts = get_distinct_partitions(n)
-    result = set()
-    for part in parts:
-        part = tuple(sorted(part))
-        if is_factor_set(part):
-            result.add(part)
-    return result
-
-
-def get_house(presents: int) -> int:
-    """Return the first house number that gets at least `presents`."""
-    factors = get_factor_sets(presents)
-    products = [x[-1] for x in factors]
-    return min(products)
+    return find_house(-(-presents // 10))
 
 
 def get_house2(presents: int) -> int:
-    if presents > 1000:
-        return math.floor(presents / 11) - 1
-    else:
-        for i in range(1, presents):
-            if get_presents2(i) >= presents:
-                return i
+    """Like `get_house`, but elves stop after 50 houses and deliver 11 each."""
+    return find_house(-(-presents // 11), 50)
 
 
 def run(stream, test=False, draw=False):
@@ -142,12 +86,8 @@ def run(stream, test=False, draw=False):
         ax.plot([m, n], [presents, presents])
         plt.show()
         return (None, None)
-    if test:
+    with timing("Part 1"):
         result1 = get_house(presents)
+    with timing("Part 2"):
         result2 = get_house2(presents)
-    else:
-        # I got these answers by eyeballing a graph, no I'm not proud of
-        # myself.
-        result1 = 776160
-        result2 = 786240
     return (result1, result2)
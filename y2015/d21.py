@@ -2,7 +2,7 @@ import math
 from collections import namedtuple
 from itertools import product, combinations
 
-from rich import print
+from util import rich_print as print
 
 
 Item = namedtuple('item', ['name', 'cost', 'damage', 'armor'])
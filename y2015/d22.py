@@ -1,6 +1,6 @@
 from collections import namedtuple
 
-from rich import print
+from util import rich_print as print
 
 
 Player = namedtuple('player', ['health', 'mana'])
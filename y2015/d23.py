@@ -1,47 +1,104 @@
+REGISTERS = 'ab'
+
+HLF = 0
+TPL = 1
+INC = 2
+JMP = 3
+JIE = 4
+JIO = 5
+NAMES = ('hlf', 'tpl', 'inc', 'jmp', 'jie', 'jio')
+OPCODES = {name: op for op, name in enumerate(NAMES)}
+
+
+def compile_program(program: tuple) -> tuple:
+    """Split the program into blocks that always run straight through.
+
+    A block starts at the beginning of the program, at the target of any
+    jump, or just after a jump, and ends before the next one. Return a tuple
+    of (start, operations, jump, end) for each block. Each operation is
+    (opcode, register slot), and jump is (opcode, register slot, target), or
+    None if the block just runs on into the next one at line `end`.
+    """
+    starts = {0}
+    for i, (inst, ops) in enumerate(program):
+        if OPCODES[inst] >= JMP:
+            starts.add(i + 1)
+            starts.add(i + int(ops[-1]))
+    starts = sorted(x for x in starts if 0 <= x < len(program))
+
+    blocks = []
+    for start, end in zip(starts, starts[1:] + [len(program)]):
+        operations = []
+        jump = None
+        for i in range(start, end):
+            inst, ops = program[i]
+            op = OPCODES[inst]
+            slot = REGISTERS.index(ops[0]) if op != JMP else None
+            if op >= JMP:
+                jump = (op, slot, i + int(ops[-1]))
+            else:
+                operations.append((op, slot))
+        blocks.append((start, tuple(operations), jump, end))
+    return tuple(blocks)
+
+
 class Computer:
     def __init__(self):
-        self.registers = {
-                'a': 0,
-                'b': 0,
-                }
+        self.registers = [0 for _ in REGISTERS]
+        self.counter = 0
+        self.histogram = []
 
-    def do_instruction(self, instruction, operands) -> int:
-        """Execute one instruction on the Computer.
+    def get_register(self, name: str) -> int:
+        return self.registers[REGISTERS.index(name)]
 
-        Return the offset to the next instruction, relative to the current one.
-        """
-        match instruction:
-            case 'hlf':
-                self.registers[operands[0]] //= 2
-            case 'tpl':
-                self.registers[operands[0]] *= 3
-            case 'inc':
-                self.registers[operands[0]] += 1
-            case 'jmp':
-                return int(operands[0])
-            case 'jie':
-                reg, off = operands
-                if self.registers[reg] % 2 == 0:
-                    return int(off)
-            case 'jio':
-                reg, off = operands
-                if self.registers[reg] == 1:
-                    return int(off)
-        return 1
+    def set_register(self, name: str, value: int):
+        self.registers[REGISTERS.index(name)] = value
 
     def run_program(self, program: tuple):
         """Run this program until the Computer halts.
 
-        Each instruction will supply an offset to the next instruction to
-        execute. The Computer halts when that offset points outside of the
-        program space.
+        The Computer halts when a jump, or the end of the program, takes it
+        outside of the program space. Afterwards, `histogram` gives the
+        number of times each line ran, and `counter` the total.
+
+        The state of the Computer is recorded every time it jumps backwards.
+        It has no inputs, so if it ever gets back to a state it has been in
+        before, it will loop forever, and this raises a ValueError instead.
         """
-        i = 0  # Instruction pointer
-        c = 0  # Instruction counter
-        while i >= 0 and i < len(program):
-            inst, ops = program[i]
-            i += self.do_instruction(inst, ops)
-            c += 1
+        blocks = compile_program(program)
+        index = {block[0]: k for k, block in enumerate(blocks)}
+        visits = [0 for _ in blocks]
+        seen = set()
+        r = self.registers
+        ip = 0
+        while ip in index:
+            k = index[ip]
+            start, operations, jump, ip = blocks[k]
+            visits[k] += 1
+            for op, x in operations:
+                if op == HLF:
+                    r[x] //= 2
+                elif op == TPL:
+                    r[x] *= 3
+                else:
+                    r[x] += 1
+            if jump is None:
+                continue
+            op, x, target = jump
+            if op == JMP or (
+                    r[x] % 2 == 0 if op == JIE else r[x] == 1):
+                ip = target
+            if ip <= start:
+                state = (ip, *r)
+                if state in seen:
+                    raise ValueError(f"Program loops forever at line {ip}")
+                seen.add(state)
+
+        self.histogram = [0 for _ in program]
+        for (start, _, _, end), count in zip(blocks, visits):
+            for i in range(start, end):
+                self.histogram[i] = count
+        self.counter = sum(self.histogram)
 
 
 def parse_program(stream) -> tuple:
@@ -60,11 +117,11 @@ def run(stream, test=False, draw=False):
     comp.run_program(prog)
 
     read = 'a' if test else 'b'
-    result1 = comp.registers[read]
+    result1 = comp.get_register(read)
 
     comp = Computer()
-    comp.registers['a'] = 1
+    comp.set_register('a', 1)
     comp.run_program(prog)
-    result2 = comp.registers[read]
+    result2 = comp.get_register(read)
 
     return (result1, result2)
@@ -0,0 +1,313 @@
+"""The Assembunny computer, shared by several 2016 puzzles.
+
+Operands are resolved when the program is parsed, into either a register
+index or a constant, so that running an instruction doesn't involve any
+string handling.
+
+The computer also recognises the loops that Assembunny programs use to add
+and multiply, and runs each of them in one step. Since `tgl` can rewrite
+the program, the loops are found again every time it does.
+"""
+import logging  # noqa: F401
+
+
+REGISTERS = 'abcd'
+
+CPY = 0
+INC = 1
+DEC = 2
+JNZ = 3
+TGL = 4
+OUT = 5
+NAMES = ('cpy', 'inc', 'dec', 'jnz', 'tgl', 'out')
+OPCODES = {name: op for op, name in enumerate(NAMES)}
+
+# Reasons for the computer to stop running.
+HALTED = 'halted'
+OUTPUT_READY = 'output'
+
+# Kinds of loop that can be run in one step.
+ADD_LOOP = 0
+MUL_LOOP = 1
+
+
+def parse_operand(word: str) -> tuple[int, bool]:
+    """Return (value, is_register) for an operand."""
+    if word in REGISTERS:
+        return (REGISTERS.index(word), True)
+    return (int(word), False)
+
+
+def parse_instruction(line: str) -> tuple:
+    """Parse one line of Assembunny.
+
+    Return (opcode, x, x is register, y, y is register). Instructions with
+    only one operand have None for y.
+    """
+    words = line.split()
+    op = OPCODES[words[0]]
+    x, xr = parse_operand(words[1])
+    y, yr = None, False
+    if len(words) > 2:
+        y, yr = parse_operand(words[2])
+    return (op, x, xr, y, yr)
+
+
+def toggle(instruction: tuple) -> tuple:
+    """Return the instruction that `tgl` turns this one into."""
+    op, x, xr, y, yr = instruction
+    if y is None:
+        op = DEC if op == INC else INC
+    else:
+        op = CPY if op == JNZ else JNZ
+    return (op, x, xr, y, yr)
+
+
+def match_add_loop(program, i: int) -> tuple | None:
+    """Find a loop like `inc a; dec b; jnz b -2` at line i.
+
+    The two first instructions can come in either order. Return (dest,
+    source) as register indexes, or None if there's no such loop here.
+    """
+    if i + 3 > len(program):
+        return None
+    first, second, jump = program[i:i + 3]
+    ops = {first[0]: first, second[0]: second}
+    if set(ops) != {INC, DEC} or not (first[2] and second[2]):
+        return None
+    dest = ops[INC][1]
+    source = ops[DEC][1]
+    if dest == source or jump != (JNZ, source, True, -2, False):
+        return None
+    return (dest, source)
+
+
+def match_mul_loop(program, i: int) -> tuple | None:
+    """Find an add loop repeated by an outer counter, at line i.
+
+        cpy b c
+        inc a
+        dec c
+        jnz c -2
+        dec d
+        jnz d -5
+
+    Return (dest, factor, factor is register, inner, outer), or None.
+    """
+    if i + 6 > len(program):
+        return None
+    op, factor, factor_reg, inner, inner_reg = program[i]
+    if op != CPY or not inner_reg:
+        return None
+    add = match_add_loop(program, i + 1)
+    if add is None or add[1] != inner:
+        return None
+    dest = add[0]
+    dec, outer, outer_reg, _, _ = program[i + 4]
+    if dec != DEC or not outer_reg:
+        return None
+    if program[i + 5] != (JNZ, outer, True, -5, False):
+        return None
+    used = {dest, inner, outer}
+    if len(used) < 3 or (factor_reg and factor in used):
+        return None
+    return (dest, factor, factor_reg, inner, outer)
+
+
+def find_shortcuts(program) -> list:
+    """Return the loop that can be run in one step from each line, if any.
+    """
+    result = []
+    for i in range(len(program)):
+        mul = match_mul_loop(program, i)
+        if mul is not None:
+            result.append((MUL_LOOP,) + mul)
+            continue
+        add = match_add_loop(program, i)
+        if add is not None:
+            result.append((ADD_LOOP,) + add)
+            continue
+        result.append(None)
+    return result
+
+
+def format_instruction(instruction: tuple) -> str:
+    op, x, xr, y, yr = instruction
+    words = [NAMES[op], REGISTERS[x] if xr else str(x)]
+    if y is not None:
+        words.append(REGISTERS[y] if yr else str(y))
+    return ' '.join(words)
+
+
+class Computer:
+    def __init__(self):
+        self.source = ()
+        self.program = []
+        self.shortcuts = []
+        self.counter = 0
+        self.pointer = 0
+        self.registers = [0] * len(REGISTERS)
+        self.outputs = []
+        self.trace = None
+
+    def parse_program(self, stream) -> list:
+        self.source = tuple(
+                parse_instruction(line) for line in stream if line.strip())
+        self.reset()
+        return self.program
+
+    def reset(self):
+        """Put back the original program, and clear all the registers."""
+        self.program = list(self.source)
+        self.shortcuts = find_shortcuts(self.program)
+        self.counter = 0
+        self.pointer = 0
+        self.registers = [0] * len(REGISTERS)
+        self.outputs = []
+
+    def get_register(self, name: str) -> int:
+        return self.registers[REGISTERS.index(name)]
+
+    def set_register(self, name: str, value: int):
+        self.registers[REGISTERS.index(name)] = value
+
+    def set_trace(self, fn):
+        """Call fn(computer, instruction) before each instruction runs.
+
+        While there is a trace function, the computer runs one instruction
+        at a time without any shortcuts, so the fast path never has to check
+        for it.
+        """
+        self.trace = fn
+
+    def toggle_instruction(self, index: int):
+        if index < 0 or index >= len(self.program):
+            return
+        self.program[index] = toggle(self.program[index])
+        self.shortcuts[:] = find_shortcuts(self.program)
+
+    @property
+    def halted(self) -> bool:
+        return not 0 <= self.pointer < len(self.program)
+
+    def step(self) -> bool:
+        """Execute the instruction at the pointer, without any shortcuts.
+
+        Return whether it produced an output.
+        """
+        r = self.registers
+        ip = self.pointer
+        instruction = self.program[ip]
+        if self.trace is not None:
+            self.trace(self, instruction)
+        op, x, xr, y, yr = instruction
+        self.counter += 1
+        self.pointer += 1
+        if op == CPY:
+            if yr:
+                r[y] = r[x] if xr else x
+        elif op == INC:
+            if xr:
+                r[x] += 1
+        elif op == DEC:
+            if xr:
+                r[x] -= 1
+        elif op == JNZ:
+            if (r[x] if xr else x) != 0:
+                self.pointer = ip + (r[y] if yr else y)
+        elif op == TGL:
+            self.toggle_instruction(ip + (r[x] if xr else x))
+        elif op == OUT:
+            self.outputs.append(r[x] if xr else x)
+            return True
+        return False
+
+    def execute(self, stop_on_output: bool = False) -> str:
+        """Run the program until it halts.
+
+        If `stop_on_output` is true, also stop after each output. Return the
+        reason for stopping: HALTED or OUTPUT_READY.
+        """
+        if self.trace is not None:
+            while not self.halted:
+                if self.step() and stop_on_output:
+                    return OUTPUT_READY
+            return HALTED
+
+        program = self.program
+        shortcuts = self.shortcuts
+        r = self.registers
+        ip = self.pointer
+        n = self.counter
+        status = HALTED
+        while 0 <= ip < len(program):
+            shortcut = shortcuts[ip]
+            if shortcut is not None:
+                if shortcut[0] == ADD_LOOP:
+                    _, dest, source = shortcut
+                    count = r[source]
+                    # Any other count would loop forever, the slow way.
+                    if count > 0:
+                        r[dest] += count
+                        r[source] = 0
+                        n += 3 * count
+                        ip += 3
+                        continue
+                else:
+                    _, dest, factor, factor_reg, inner, outer = shortcut
+                    if factor_reg:
+                        factor = r[factor]
+                    count = r[outer]
+                    if factor > 0 and count > 0:
+                        r[dest] += factor * count
+                        r[inner] = 0
+                        r[outer] = 0
+                        n += count * (3 * factor + 3)
+                        ip += 6
+                        continue
+
+            op, x, xr, y, yr = program[ip]
+            n += 1
+            if op == CPY:
+                if yr:
+                    r[y] = r[x] if xr else x
+            elif op == INC:
+                if xr:
+                    r[x] += 1
+            elif op == DEC:
+                if xr:
+                    r[x] -= 1
+            elif op == JNZ:
+                if (r[x] if xr else x) != 0:
+                    ip += r[y] if yr else y
+                    continue
+            elif op == TGL:
+                self.toggle_instruction(ip + (r[x] if xr else x))
+            elif op == OUT:
+                self.outputs.append(r[x] if xr else x)
+                if stop_on_output:
+                    ip += 1
+                    status = OUTPUT_READY
+                    break
+            ip += 1
+        self.pointer = ip
+        self.counter = n
+        return status
+
+    def run_program(self):
+        """Run the program from the start, until the computer halts."""
+        self.pointer = 0
+        self.counter = 0
+        self.execute()
+
+    def generate(self):
+        """Run the program from the start, and yield each value it outputs."""
+        self.pointer = 0
+        self.counter = 0
+        while True:
+            if self.outputs:
+                yield self.outputs.pop(0)
+                continue
+            if self.halted:
+                return
+            self.execute(stop_on_output=True)
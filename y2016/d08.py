@@ -1,4 +1,7 @@
-from PIL import Image
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 def parse(stream) -> list:
@@ -42,7 +45,9 @@ class Screen:
         for i, on in enumerate(col):
             self.rows[i][index] = on
 
-    def draw(self) -> Image:
+    def draw(self) -> 'Image.Image':
+        from PIL import Image
+
         pixel_size = 14
         height = (pixel_size + 1) * self.height + 1  # 1 pixel border
         width = (pixel_size + 1) * self.width + 1
@@ -72,7 +77,7 @@ class Screen:
         for inst, ops in program:
             self.run_instruction(inst, ops)
 
-    def run_and_draw(self, program: list) -> list[Image]:
+    def run_and_draw(self, program: list) -> list['Image.Image']:
         images = []
         for inst, ops in program:
             self.run_instruction(inst, ops)
@@ -2,6 +2,8 @@ import re
 from functools import cache
 from itertools import combinations
 
+from util import bfs
+
 
 INF = float('inf')
 PATTERN = re.compile(r'(\w+)(?:-compatible)? (microchip|generator)')
@@ -123,39 +125,23 @@ def is_safe(items: set) -> bool:
     return not (unshielded and generators)
 
 
-def trace_to_path(trace: dict, end: tuple) -> list:
-    result = [end]
-    node = end
-    while node in trace:
-        result.insert(0, trace[node])
-        node = trace[node]
-    return result
-
-
 def find_fewest_moves(start: tuple) -> int:
     """Find the fewest number of moves needed to reach the goal.
 
     The goal is to have all components safely located on the top floor of the
     facility.
     """
-    explored = {start}
-    trace = {}
-    q = [start]
-
-    while q:
-        node = q.pop(0)
-        if sum(len(x) for x in node[1][:-1]) == 0:
-            # Nothing on any floors except the last one, that's a bingo.
-            return len(trace_to_path(trace, node)) - 1
-
-        for move in get_moves(node):
-            neighbour = apply_move(node, *move)
-            if neighbour in explored:
-                continue
-            explored.add(neighbour)
-            trace[neighbour] = node
-            q.append(neighbour)
-    raise ValueError("Ran out of moves to try!")
+    def get_neighbours(node):
+        return (apply_move(node, *move) for move in get_moves(node))
+
+    def is_goal(node) -> bool:
+        # Nothing on any floors except the last one, that's a bingo.
+        return sum(len(x) for x in node[1][:-1]) == 0
+
+    result = bfs((start,), get_neighbours, is_goal=is_goal)
+    if result.found is None:
+        raise ValueError("Ran out of moves to try!")
+    return result.distance
 
 
 def run(stream, test=False, draw=False):
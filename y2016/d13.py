@@ -1,17 +1,8 @@
-from collections import defaultdict
 from functools import cache
 
-from util import PriorityQueue
+from util import astar, bfs
 
 
-try:
-    from PIL import Image
-except ImportError:
-    # That's fine, visualisations won't be available though.
-    pass
-
-
-INF = float('inf')
 PIXELS = {
         'path': 'assets/green_pixel_4.png',
         'explored': 'assets/orange_pixel_4.png',
@@ -48,15 +39,6 @@ def get_neighbours(location: tuple, magic: int) -> list:
     return [p for p in neighbours if is_space(*p, magic)]
 
 
-def trace_to_path(trace: dict, end: tuple) -> list:
-    result = [end]
-    node = end
-    while node in trace:
-        result.insert(0, trace[node])
-        node = trace[node]
-    return result
-
-
 def get_min_distance(a: tuple[int], b: tuple[int]) -> int:
     """Return the Manhattan distance between two points."""
     if a == b:
@@ -71,43 +53,36 @@ def find_fewest_moves(
     The `magic` number is applied to `is_space()` to discover which locations
     are traversable.
     """
-    trace = {}
-    q = PriorityQueue()
-    q.push(start, get_min_distance(start, goal))
-    dist = defaultdict(lambda: INF)
-    dist[start] = 0
     explored = set()
     frames = []
 
-    while q:
-        cost, node = q.pop()
-        if node == goal:
-            if draw:
-                path = set(trace_to_path(trace, node))
-                frames.append((explored, path))
+    def expand(node):
+        if draw:
+            frames.append((set(explored), {start, goal}))
+            explored.add(node)
+        return ((n, 1) for n in get_neighbours(node, magic))
 
-                maxcoord = max(max(p) for p in explored | path) + 2
-                size = 5 * maxcoord + 1  # 4 pixels per cell, plus border
+    def heuristic(node):
+        return get_min_distance(node, goal)
 
-                bg = draw_background(magic, size)
+    result = astar(start, expand, heuristic, goal, paths=draw)
+    if result.found is None:
+        raise ValueError("Ran out of moves to try!")
 
-                images = [draw_frame(bg, *f) for f in frames]
-                images[0].save(
-                        'out/y2016d13p1_astar.gif', save_all=True,
-                        append_images=images[1:], duration=100)
-            return cost
+    if draw:
+        path = set(result.get_path())
+        frames.append((explored, path))
 
-        if draw:
-            frames.append((set(explored), {start, goal}))
-        for n in get_neighbours(node, magic):
-            score = dist[node] + 1
-            if score < dist[n]:
-                dist[n] = score
-                trace[n] = node
-                f = score + get_min_distance(n, goal)
-                q.set_priority(n, f)
-        explored.add(node)
-    raise ValueError("Ran out of moves to try!")
+        maxcoord = max(max(p) for p in explored | path) + 2
+        size = 5 * maxcoord + 1  # 4 pixels per cell, plus border
+
+        bg = draw_background(magic, size)
+
+        images = [draw_frame(bg, *f) for f in frames]
+        images[0].save(
+                'out/y2016d13p1_astar.gif', save_all=True,
+                append_images=images[1:], duration=100)
+    return result.distance
 
 
 def find_cells_in_range(start: tuple, steps: int, magic: int) -> int:
@@ -115,22 +90,14 @@ def find_cells_in_range(start: tuple, steps: int, magic: int) -> int:
 
     Return the number of distinct cells found.
     """
-    explored = {start}
-    q = [(0, start)]
-
-    while q:
-        cost, node = q.pop(0)
-        if cost >= steps:
-            continue
-        for n in get_neighbours(node, magic):
-            if n in explored:
-                continue
-            explored.add(n)
-            q.append((cost + 1, n))
-    return len(explored)
+    result = bfs(
+            (start,), lambda node: get_neighbours(node, magic), limit=steps)
+    return len(result.cost)
 
 
 def draw_background(magic: int, size: int):
+    from PIL import Image
+
     im = Image.new('RGB', (size, size), '#1a1a1a')
     wall = Image.open(PIXELS['wall'])
     for i in range(size):
@@ -143,6 +110,8 @@ def draw_background(magic: int, size: int):
 
 
 def draw_frame(bg, explored: set, path: set):
+    from PIL import Image
+
     im = bg.copy()
     pixel = Image.open(PIXELS['explored'])
     for p in explored:
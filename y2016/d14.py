@@ -1,9 +1,9 @@
-import json
-import os
 import re
 from collections import defaultdict
 from _md5 import md5
 
+from cache import ResultCache
+
 
 TRIPLES = re.compile(r'(.)\1\1')
 QUINTUPLES = re.compile(r'(.)\1\1\1\1')
@@ -74,28 +74,18 @@ def run(stream, test=False, draw=False):
     salt = parse(stream).encode('ascii')
 
     stretch = 2016
-    os.makedirs('out', exist_ok=True)
-    md5_cache_name = 'out/md5.json'
-    stretch_cache_name = f'out/md5_stretch{stretch}.json'
-    try:
-        with open(md5_cache_name, 'r') as fp:
-            md5cache = json.load(fp)
-    except FileNotFoundError:
-        md5cache = {}
-
-    try:
-        with open(stretch_cache_name, 'r') as fp:
-            stretch_cache = json.load(fp)
-    except FileNotFoundError:
-        stretch_cache = {}
+    cache = ResultCache()
+    saltstr = salt.decode('ascii')
+    md5_cache_key = f'y2016d14:md5:{saltstr}'
+    stretch_cache_key = f'y2016d14:md5_stretch{stretch}:{saltstr}'
+    md5cache = cache.get(md5_cache_key, {})
+    stretch_cache = cache.get(stretch_cache_key, {})
 
     result1 = get_index(salt, 64, md5cache=md5cache)
     result2 = get_index(
             salt, 64, 2016, md5cache=md5cache, stretch_cache=stretch_cache)
 
-    with open(md5_cache_name, 'w') as fp:
-        json.dump(md5cache, fp, separators=(',', ':'))
-    with open(stretch_cache_name, 'w') as fp:
-        json.dump(stretch_cache, fp, separators=(',', ':'))
+    cache.put(md5_cache_key, md5cache)
+    cache.put(stretch_cache_key, stretch_cache)
 
     return (result1, result2)
@@ -1,11 +1,8 @@
-import logging
-from collections import defaultdict
 from _md5 import md5
 
-from util import PriorityQueue
+from util import bfs
 
 
-INF = float('inf')
 VECTORS = {
         'D': (1, 0),
         'R': (0, 1),
@@ -44,13 +41,6 @@ def get_neighbours(location: tuple, path: str) -> list:
     return [(d, move(location, VECTORS[d])) for d in directions]
 
 
-def get_min_distance(a: tuple[int], b: tuple[int]) -> int:
-    """Return the Manhattan distance between two points."""
-    if a == b:
-        return 0
-    return abs(b[0] - a[0]) + abs(b[1] - a[1])
-
-
 def find_shortest_path(start: tuple, goal: tuple, code: str) -> str | None:
     """Find the shortest path that can reach the goal.
 
@@ -59,25 +49,14 @@ def find_shortest_path(start: tuple, goal: tuple, code: str) -> str | None:
 
     The result is a string of U, D, L and R directions.
     """
-    q = PriorityQueue()
-    q.push((start, ''), get_min_distance(start, goal))
-    dist = defaultdict(lambda: INF)
-    dist[(start, '')] = 0
-
-    while q:
-        _, (node, path) = q.pop()
-        logging.debug(f"At {node} from {path}")
-        if node == goal:
-            return path
+    def expand(state):
+        node, path = state
+        return ((n, path + d) for d, n in get_neighbours(node, code + path))
 
-        for d, n in get_neighbours(node, code + path):
-            score = dist[(node, path)] + 1
-            if score < dist[n]:
-                newpath = path + d
-                dist[(n, newpath)] = score
-                f = score + get_min_distance(n, goal)
-                q.set_priority((n, newpath), f)
-    return None
+    result = bfs(((start, ''),), expand, is_goal=lambda s: s[0] == goal)
+    if result.found is None:
+        return None
+    return result.found[1]
 
 
 def find_longest_path(start: tuple, goal: tuple, code: str) -> str | None:
@@ -88,24 +67,16 @@ def find_longest_path(start: tuple, goal: tuple, code: str) -> str | None:
 
     The result is a string of U, D, L and R directions.
     """
-    q = []
-    q.append((start, ''))
-    longest = ''
-    explored = set()
-
-    while q:
-        (node, path) = q.pop(0)
+    def expand(state):
+        node, path = state
         if node == goal:
-            if len(path) > len(longest):
-                longest = path
-            continue
-
-        for d, n in get_neighbours(node, code + path):
-            newpath = path + d
-            if (n, newpath) not in explored:
-                q.append((n, newpath))
-                explored.add((n, newpath))
-    return longest
+            # The vault is the end of the line, the path stops here.
+            return ()
+        return ((n, path + d) for d, n in get_neighbours(node, code + path))
+
+    result = bfs(((start, ''),), expand)
+    paths = [path for node, path in result.cost if node == goal]
+    return max(paths, key=len, default='')
 
 
 def run(stream, test=False, draw=False):
@@ -6,13 +6,12 @@ https://adventofcode.com/2016/day/22
 """
 import logging  # noqa: F401
 import re
-from collections import defaultdict, namedtuple
+from collections import namedtuple
 from itertools import permutations
 
-from util import timing, PriorityQueue
+from util import timing, astar
 
 
-INF = float('inf')
 PATTERN = re.compile(r'node-x(\d+)-y(\d+)')
 Node = namedtuple('node', ['x', 'y', 'size', 'used', 'avail', 'usep'])
 
@@ -114,23 +113,14 @@ def get_min_distance(a: tuple[int], b: tuple[int]) -> int:
 
 
 def find_path_cost(grid: Grid, start, goal) -> int:
-    q = PriorityQueue()
-    q.push(start, get_min_distance(start, goal))
-    dist = defaultdict(lambda: INF)
-    dist[start] = 0
-
-    while q:
-        cost, node = q.pop()
-        if node == goal:
-            return cost
-
-        for n in grid.get_neighbours(node):
-            score = dist[node] + 1
-            if score < dist[n]:
-                dist[n] = score
-                f = score + get_min_distance(n, goal)
-                q.set_priority(n, f)
-    raise ValueError("Ran out of moves to try!")
+    result = astar(
+            start,
+            lambda node: ((n, 1) for n in grid.get_neighbours(node)),
+            lambda node: get_min_distance(node, goal),
+            goal)
+    if result.found is None:
+        raise ValueError("Ran out of moves to try!")
+    return result.distance
 
 
 def find_data_move_cost(grid: Grid) -> int:
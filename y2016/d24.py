@@ -5,10 +5,9 @@ Day 24: Air Duct Spelunking
 https://adventofcode.com/2016/day/24
 """
 import logging  # noqa: F401
-from collections import defaultdict
-from itertools import combinations, permutations
+from itertools import permutations
 
-from util import timing, get_manhattan_distance, PriorityQueue
+from util import timing, bfs
 
 
 INF = float('inf')
@@ -48,25 +47,6 @@ class Grid:
         points = ((y + 1, x), (y, x + 1), (y - 1, x), (y, x - 1))
         return {(y, x) for y, x in points if self.rows[y][x]}
 
-    def find_shortest_path(self, start, goal) -> int:
-        q = PriorityQueue()
-        q.push(start, get_manhattan_distance(start, goal))
-        dist = defaultdict(lambda: INF)
-        dist[start] = 0
-
-        while q:
-            cost, node = q.pop()
-            if node == goal:
-                return cost
-
-            for n in self.get_neighbours(node):
-                score = dist[node] + 1
-                if score < dist[n]:
-                    dist[n] = score
-                    f = score + get_manhattan_distance(n, goal)
-                    q.set_priority(n, f)
-        raise ValueError("Ran out of moves to try!")
-
     def find_target_paths(self) -> dict:
         """For each distinct pair of targets, find the shortest path.
 
@@ -78,11 +58,17 @@ class Grid:
             return self.target_paths
 
         result = {}
-        for a, b in combinations(self.targets.keys(), 2):
-            a_node = self.targets[a]
-            b_node = self.targets[b]
-            steps = self.find_shortest_path(a_node, b_node)
-            result[frozenset((a, b))] = steps
+        names = tuple(self.targets.keys())
+        for i, a in enumerate(names):
+            # One search from each target finds the paths to all the targets
+            # after it.
+            others = {self.targets[b]: b for b in names[i + 1:]}
+            if not others:
+                continue
+            search = bfs(
+                    (self.targets[a],), self.get_neighbours, targets=others)
+            for node, b in others.items():
+                result[frozenset((a, b))] = search.cost[node]
         self.target_paths = result
         return result
 
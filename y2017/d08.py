@@ -5,27 +5,60 @@ Day 8: I Heard You Like Registers
 https://adventofcode.com/2017/day/8
 """
 import logging  # noqa: F401
-from collections import defaultdict, namedtuple
+from collections import namedtuple
 
 from util import timing
+from y2017.machine import compile_function
 
 
 Instruction = namedtuple(
         'instruction',
         ('target', 'amount', 'check', 'operator', 'value'))
 
+OPERATORS = frozenset(('==', '!=', '<', '>', '<=', '>='))
+
+
+def generate_source(program: tuple, slots: dict) -> str:
+    """Return Python source for a function that runs `program`.
+
+    The function takes the list of registers, with each register held in
+    the slot given by `slots`, and updates it in place. It returns the
+    highest value held in any register along the way.
+
+    The program has no jumps, so it compiles to one long run of conditions.
+    Only the target of an instruction can change, so that's the only
+    register that needs to be checked against the highest value so far.
+    """
+    registers = [f"r{i}" for i in range(len(slots))]
+    lines = ["def run(r):"]
+    if registers:
+        lines.append(f"    {', '.join(registers)}, = r")
+    lines.append("    best = max(r, default=0)")
+    for inst in program:
+        if inst.operator not in OPERATORS:
+            raise ValueError(f"Unknown operator {inst.operator!r}")
+        check = registers[slots[inst.check]]
+        target = registers[slots[inst.target]]
+        lines.extend([
+                f"    if {check} {inst.operator} {inst.value}:",
+                f"        {target} += {inst.amount}",
+                f"        if {target} > best: best = {target}",
+                ])
+    if registers:
+        lines.append(f"    r[:] = {', '.join(registers)},")
+    lines.append("    return best")
+    return '\n'.join(lines) + '\n'
+
 
 class Computer:
     def __init__(self):
-        self.counter = 0
-        self.pointer = 0
-        self.registers = defaultdict(lambda: 0)
+        self.slots = {}
+        self.registers = []
         self.program = []
+        self.compiled = None
 
     def reset(self):
-        self.counter = 0
-        self.pointer = 0
-        self.registers.clear()
+        self.registers = [0] * len(self.slots)
 
     def parse_program(self, stream) -> tuple:
         self.program = []
@@ -40,27 +73,16 @@ class Computer:
             value = int(value)
             inst = Instruction(target, amount, check, op, value)
             self.program.append(inst)
+        self.slots = {}
+        for inst in self.program:
+            for name in (inst.target, inst.check):
+                self.slots.setdefault(name, len(self.slots))
+        self.compiled = None
+        self.reset()
         return self.program
 
-    def do_instruction(self, instruction) -> None:
-        """Execute one instruction on the Computer."""
-        value = self.registers[instruction.check]
-        cond = False
-        match instruction.operator:
-            case '==':
-                cond = value == instruction.value
-            case '!=':
-                cond = value != instruction.value
-            case '<':
-                cond = value < instruction.value
-            case '>':
-                cond = value > instruction.value
-            case '<=':
-                cond = value <= instruction.value
-            case '>=':
-                cond = value >= instruction.value
-        if cond:
-            self.registers[instruction.target] += instruction.amount
+    def get_register(self, name: str) -> int:
+        return self.registers[self.slots[name]]
 
     def run_program(self) -> int:
         """Run the current program until the Computer halts.
@@ -74,17 +96,13 @@ class Computer:
 
         Return the highest value held in any register during the run.
         """
-        self.pointer = 0
-        result = float('-inf')
-        while self.pointer < len(self.program):
-            inst = self.program[self.pointer]
-            self.do_instruction(inst)
-            self.pointer += 1
-            result = max(result, self.get_largest_value())
-        return result
+        if self.compiled is None:
+            source = generate_source(self.program, self.slots)
+            self.compiled = compile_function(source, 'run', '<registers>')
+        return self.compiled(self.registers)
 
     def get_largest_value(self) -> int:
-        return max(self.registers.values())
+        return max(self.registers)
 
 
 def run(stream, test: bool = False):
@@ -88,6 +88,68 @@ def _count_mod_matches(init_a: int, init_b: int, count: int) -> int:
     return result
 
 
+CHUNK = 1 << 20
+
+
+def _get_multipliers(factor: int, size: int):
+    """Return an array of factor ** i % DIVISOR, for i from 1 to `size`."""
+    import numpy as np
+
+    result = np.empty(size, dtype=np.int64)
+    result[0] = factor
+    n = 1
+    while n < size:
+        # Double the run of powers we have by multiplying it through by the
+        # last one.
+        m = min(n, size - n)
+        result[n:n + m] = result[:m] * result[n - 1] % DIVISOR
+        n += m
+    return result
+
+
+def _generate_chunks(initial: int, factor: int, modulus: int = 1):
+    """Generate arrays of successive generator values, CHUNK at a time.
+
+    Only values that are multiples of `modulus` are kept.
+    """
+    multipliers = _get_multipliers(factor, CHUNK)
+    last = initial
+    while True:
+        values = multipliers * last % DIVISOR
+        last = int(values[-1])
+        if modulus > 1:
+            values = values[values % modulus == 0]
+        yield values
+
+
+def _take(chunks, count: int):
+    """Return the first `count` values from a stream of chunks."""
+    import numpy as np
+
+    result = []
+    total = 0
+    for chunk in chunks:
+        result.append(chunk)
+        total += len(chunk)
+        if total >= count:
+            break
+    return np.concatenate(result)[:count]
+
+
+@_count_matches.fallback(needs=('numpy',))
+def _count_matches_numpy(init_a: int, init_b: int, count: int) -> int:
+    a = _take(_generate_chunks(init_a, FACTOR_A), count)
+    b = _take(_generate_chunks(init_b, FACTOR_B), count)
+    return int(((a & MATCH) == (b & MATCH)).sum())
+
+
+@_count_mod_matches.fallback(needs=('numpy',))
+def _count_mod_matches_numpy(init_a: int, init_b: int, count: int) -> int:
+    a = _take(_generate_chunks(init_a, FACTOR_A, MODULUS_A), count)
+    b = _take(_generate_chunks(init_b, FACTOR_B, MODULUS_B), count)
+    return int(((a & MATCH) == (b & MATCH)).sum())
+
+
 def count_matches(a: Generator, b: Generator, count: int) -> int:
     return _count_matches(a.initial, b.initial, count)
 
@@ -86,6 +86,29 @@ def get_value_after_zero(steps: int, count: int) -> int:
     return result
 
 
+@get_value_after_zero.fallback
+def _skip_value_after_zero(steps: int, count: int) -> int:
+    """Find the value after zero without visiting every insertion.
+
+    Only insertions that land at position 1 matter. After each insertion,
+    work out how many more will go in without wrapping past the end of the
+    buffer (none of which can land at position 1), and skip straight past
+    them.
+    """
+    position = 0
+    value = 0
+    result = 0
+    while value < count:
+        value += 1
+        position = (position + steps) % value + 1
+        if position == 1:
+            result = value
+        skip = min((value - position) // steps, count - value)
+        value += skip
+        position += skip * (steps + 1)
+    return result
+
+
 def parse(stream) -> tuple:
     return int(stream.readline().strip())
 
@@ -0,0 +1,377 @@
+"""The register machine shared by several 2017 puzzles.
+
+Registers are named by single letters, and live in a fixed list of slots, one
+per letter. Each program is compiled to Python the first time it runs, with
+its operands already resolved into constants or register slots, so running an
+instruction doesn't involve any string handling.
+
+Instructions that the compiled code doesn't know about, such as `snd` and
+`rcv`, stop it, and are carried out one at a time by `do_instruction`.
+"""
+import logging  # noqa: F401
+import string
+from math import isqrt
+
+
+REGISTERS = string.ascii_lowercase
+
+# Reasons for the computer to stop running.
+HALTED = 'halted'
+
+# How each instruction changes register x, where Y stands for the value of
+# its second operand.
+OPERATIONS = {
+        'set': '{x} = {Y}',
+        'add': '{x} += {Y}',
+        'sub': '{x} -= {Y}',
+        'mul': '{x} *= {Y}',
+        'mod': '{x} %= {Y}',
+        }
+
+# The condition on the value of X for each jump to go by Y.
+JUMPS = {
+        'jgz': '{X} > 0',
+        'jnz': '{X} != 0',
+        }
+
+# Two nested loops which search for a pair of factors of B, starting from d0
+# and e0, and clear F if they find one. Lower case names stand for literals.
+PRODUCT_SEARCH = (
+        ('set', 'D', 'd0'),
+        ('set', 'E', 'e0'),
+        ('set', 'G', 'D'),
+        ('mul', 'G', 'E'),
+        ('sub', 'G', 'B'),
+        ('jnz', 'G', '2'),
+        ('set', 'F', '0'),
+        ('sub', 'E', '-1'),
+        ('set', 'G', 'E'),
+        ('sub', 'G', 'B'),
+        ('jnz', 'G', '-8'),
+        ('sub', 'D', '-1'),
+        ('set', 'G', 'D'),
+        ('sub', 'G', 'B'),
+        ('jnz', 'G', '-13'),
+        )
+
+# How many of each instruction a product search executes: once, for each
+# value of d, for each pair (d, e), and for each pair that is found.
+SEARCH_COUNTS = {
+        'set': (1, 2, 2, 1),
+        'mul': (0, 0, 1, 0),
+        'sub': (0, 2, 3, 0),
+        'jnz': (0, 1, 2, 0),
+        }
+
+
+def parse_program(stream) -> tuple:
+    program = []
+    for line in stream:
+        words = line.split()
+        if words:
+            program.append((words[0], words[1:]))
+    return tuple(program)
+
+
+def is_register(operand: str) -> bool:
+    return operand in REGISTERS
+
+
+def get_local(register: str) -> str:
+    """Return the name of the local variable that holds a register."""
+    return f"r{REGISTERS.index(register)}"
+
+
+def compile_function(
+        source: str, name: str, filename: str, namespace: dict = None):
+    """Compile Python `source`, and return the function called `name`.
+
+    The source runs with `namespace` as its globals.
+    """
+    namespace = dict(namespace or {})
+    exec(compile(source, filename, 'exec'), namespace)
+    return namespace[name]
+
+
+def match_pattern(program, i: int, pattern: tuple) -> dict | None:
+    """Match the program at line i against a pattern of instructions.
+
+    Upper case names in the pattern match registers, and lower case names
+    match integer literals, with distinct names matching distinct registers.
+    Anything else has to match exactly. Return the names, or None.
+    """
+    if i + len(pattern) > len(program):
+        return None
+    names = {}
+    for (inst, ops), (want, *wanted) in zip(program[i:], pattern):
+        if inst != want or len(ops) != len(wanted):
+            return None
+        for op, name in zip(ops, wanted):
+            if name.isupper():
+                if not is_register(op):
+                    return None
+            elif name.islower():
+                if is_register(op):
+                    return None
+                op = int(op)
+            elif op != name:
+                return None
+            if names.setdefault(name, op) != op:
+                return None
+    registers = [v for k, v in names.items() if k.isupper()]
+    if len(set(registers)) != len(registers):
+        return None
+    return names
+
+
+def count_products(target: int, d0: int, e0: int) -> int:
+    """Count the pairs d >= d0, e >= e0, both less than target, with d * e ==
+    target.
+    """
+    result = 0
+    for d in range(1, isqrt(target) + 1):
+        if target % d:
+            continue
+        e = target // d
+        pairs = {(d, e), (e, d)}
+        for x, y in pairs:
+            if d0 <= x < target and e0 <= y < target:
+                result += 1
+    return result
+
+
+def generate_source(program: tuple, watch: frozenset = frozenset()) -> str:
+    """Return Python source for a function that runs `program`.
+
+    The function takes (r, ip, n, w), where r is the list of registers, ip
+    the instruction pointer, n the count of instructions executed so far and
+    w the count of those whose name is in `watch`. It returns the new (ip,
+    n, w), having updated r in place. It runs until the pointer leaves the
+    program, or reaches an instruction it doesn't know, before executing it.
+
+    The program is split into blocks, which start at the top, at the
+    targets of jumps with literal offsets, at product searches and around
+    instructions the function doesn't know, and run through to the next
+    block unless a jump is taken. Any other line that a jump lands on runs
+    one instruction at a time until it reaches a block. A product search is
+    run in one step.
+    """
+    used = sorted({
+            op for _, ops in program for op in ops if is_register(op)})
+    registers = [get_local(x) for x in used]
+    searches = {
+            i: names for i in range(len(program))
+            if (names := match_pattern(program, i, PRODUCT_SEARCH))}
+    leaders = {0} | set(searches)
+    for i, (inst, ops) in enumerate(program):
+        if inst in JUMPS:
+            if not is_register(ops[1]):
+                leaders.add(i + int(ops[1]))
+        elif inst not in OPERATIONS:
+            leaders |= {i, i + 1}
+    leaders = sorted(x for x in leaders if 0 <= x < len(program))
+    lines = ["def run(r, ip, n, w):"]
+    for x, name in zip(used, registers):
+        lines.append(f"    {name} = r[{REGISTERS.index(x)}]")
+    lines.append("    while True:")
+
+    def get_value(operand: str) -> str:
+        return get_local(operand) if is_register(operand) else operand
+
+    def emit_exit(indent: str, ip: str, count: int, watched: int):
+        lines.append(f"{indent}ip = {ip}")
+        if count:
+            lines.append(f"{indent}n += {count}")
+        if watched:
+            lines.append(f"{indent}w += {watched}")
+
+    def emit_search(i: int, names: dict):
+        d, e, g, b, f = (get_local(names[x]) for x in 'DEGBF')
+        d0 = names['d0']
+        e0 = names['e0']
+
+        def count(names) -> str:
+            totals = [sum(c) for c in zip(*(
+                    SEARCH_COUNTS[x] for x in names if x in SEARCH_COUNTS))]
+            if not totals:
+                return '0'
+            once, per_d, per_pair, per_found = totals
+            return (f"{once} + ({b} - {d0}) * ({per_d} + {per_pair} * "
+                    f"({b} - {e0})) + {per_found} * found")
+
+        lines.extend([
+                f"            if {d0} < {b} and {e0} < {b}:",
+                f"                found = count_products({b}, {d0}, {e0})",
+                f"                n += {count(SEARCH_COUNTS)}",
+                f"                w += {count(watch)}",
+                f"                if found: {f} = 0",
+                f"                {d} = {e} = {b}",
+                f"                {g} = 0",
+                f"                ip = {i + len(PRODUCT_SEARCH)}",
+                "                continue",
+                ])
+
+    def emit_block(start: int, stop: int):
+        inst, _ = program[start]
+        if inst not in OPERATIONS and inst not in JUMPS:
+            emit_exit("            ", str(start), 0, 0)
+            lines.append("            break")
+            return
+        count = 0
+        watched = 0
+        for i in range(start, stop):
+            inst, ops = program[i]
+            count += 1
+            if inst in watch:
+                watched += 1
+            if inst in JUMPS:
+                cond = JUMPS[inst].format(X=get_value(ops[0]))
+                lines.append(f"            if {cond}:")
+                emit_exit(
+                        "                ", f"{i} + {get_value(ops[1])}",
+                        count, watched)
+                lines.append("                continue")
+                continue
+            lines.append("            " + OPERATIONS[inst].format(
+                    x=get_local(ops[0]), Y=get_value(ops[1])))
+        # Fall through to the next block, or off the end of the program.
+        emit_exit("            ", str(stop), count, watched)
+        lines.append("            continue")
+
+    keyword = 'if'
+    for i, line in enumerate(leaders):
+        lines.append(f"        {keyword} ip == {line}:")
+        keyword = 'elif'
+        if line in searches:
+            emit_search(line, searches[line])
+        stop = leaders[i + 1] if i + 1 < len(leaders) else len(program)
+        emit_block(line, stop)
+    for line in sorted(set(range(len(program))) - set(leaders)):
+        lines.append(f"        elif ip == {line}:")
+        emit_block(line, line + 1)
+    lines.append("        break")
+    for x, name in zip(used, registers):
+        lines.append(f"    r[{REGISTERS.index(x)}] = {name}")
+    lines.append("    return ip, n, w")
+    return '\n'.join(lines) + '\n'
+
+
+def compile_program(program: tuple, watch: frozenset = frozenset()):
+    """Compile `program` into a function. See `generate_source`."""
+    source = generate_source(program, watch)
+    return compile_function(
+            source, 'run', '<duet>', {'count_products': count_products})
+
+
+class Computer:
+    """Runs a program, counting the instructions in `watch` as it goes."""
+    def __init__(self, name: str = '', watch=()):
+        self.name = name
+        self.counter = 0
+        self.watched = 0
+        self.watch = frozenset(watch)
+        self.pointer = 0
+        self.registers = [0] * len(REGISTERS)
+        self.program = ()
+        self.compiled = None
+        self.halt = False
+        self.status = None
+
+    def reset(self):
+        self.counter = 0
+        self.watched = 0
+        self.pointer = 0
+        self.registers = [0] * len(REGISTERS)
+        self.halt = False
+        self.status = None
+
+    def parse(self, stream) -> tuple:
+        self.load(parse_program(stream))
+        return self.program
+
+    def load(self, program: tuple):
+        self.program = tuple(program)
+        self.compiled = None
+
+    def get_register(self, name: str) -> int:
+        return self.registers[REGISTERS.index(name)]
+
+    def set_register(self, name: str, value: int):
+        self.registers[REGISTERS.index(name)] = value
+
+    def get_value(self, value: str) -> int:
+        """Get the value of an operand, either a register or a literal."""
+        if is_register(value):
+            return self.get_register(value)
+        return int(value)
+
+    def do_instruction(self, instruction: str, operands) -> str | None:
+        """Execute one instruction on the Computer.
+
+        Modifies the Computer's instruction pointer directly. Return a reason
+        to stop running, or None to carry on. Subclasses handle instructions
+        that aren't in OPERATIONS or JUMPS.
+        """
+        offset = 1
+        if instruction in JUMPS:
+            value = self.get_value(operands[0])
+            if value > 0 or instruction == 'jnz' and value != 0:
+                offset = self.get_value(operands[1])
+        elif instruction in OPERATIONS:
+            reg, value = operands
+            x = self.get_register(reg)
+            y = self.get_value(value)
+            if instruction == 'set':
+                x = y
+            elif instruction == 'add':
+                x += y
+            elif instruction == 'sub':
+                x -= y
+            elif instruction == 'mul':
+                x *= y
+            elif instruction == 'mod':
+                x %= y
+            self.set_register(reg, x)
+        else:
+            raise ValueError(f"Unknown instruction {instruction!r}")
+        self.pointer += offset
+        return None
+
+    def execute(self) -> str:
+        """Run the program until it halts, or has a reason to stop.
+
+        Return the reason, and also keep it in `status`. The compiled program
+        runs until it reaches an instruction it can't handle, which then goes
+        through do_instruction(). If that doesn't move the pointer, the
+        instruction is blocked, and doesn't count as having executed.
+        """
+        if self.compiled is None:
+            self.compiled = compile_program(self.program, self.watch)
+        length = len(self.program)
+        status = HALTED
+        while not self.halt:
+            self.pointer, self.counter, self.watched = self.compiled(
+                    self.registers, self.pointer, self.counter, self.watched)
+            if self.pointer < 0 or self.pointer >= length:
+                self.halt = True
+                break
+            pointer = self.pointer
+            inst, ops = self.program[pointer]
+            status = self.do_instruction(inst, ops)
+            if self.pointer == pointer:
+                break
+            self.counter += 1
+            if inst in self.watch:
+                self.watched += 1
+            if status is not None:
+                break
+            status = HALTED
+        self.status = status
+        return status
+
+    def run_program(self) -> str:
+        """Run the current program from the start."""
+        self.pointer = 0
+        self.counter = 0
+        self.watched = 0
+        return self.execute()
@@ -8,7 +8,7 @@ import logging  # noqa: F401
 from collections import defaultdict
 from copy import deepcopy
 
-from util import get_manhattan_distance, timing, INF, PriorityQueue
+from util import astar, get_manhattan_distance, timing, INF
 
 
 def get_adjacent(position: tuple) -> set[tuple]:
@@ -120,28 +120,12 @@ class Game:
 
         If the path cost exceeds `limit`, give up and return None.
         """
-        q = PriorityQueue()
-        q.push(start, get_manhattan_distance(start, goal))
-        dist = defaultdict(lambda: INF)
-        dist[start] = 0
-        explored = set()
-
-        while q:
-            cost, node = q.pop()
-            if node == goal:
-                return cost
-
-            if cost > limit:
-                return None
-
-            for n in self.get_neighbours(node):
-                score = dist[node] + 1
-                if score < dist[n]:
-                    dist[n] = score
-                    f = score + get_manhattan_distance(n, goal)
-                    q.set_priority(n, f)
-            explored.add(node)
-        return None
+        result = astar(
+                start,
+                lambda node: ((n, 1) for n in self.get_neighbours(node)),
+                lambda node: get_manhattan_distance(node, goal),
+                goal, limit=limit)
+        return result.distance
 
     def select_move(self, start: tuple, goals: set) -> tuple | None:
         """Select a target square for unit movement.
@@ -7,26 +7,8 @@ https://adventofcode.com/2018/day/16
 import logging  # noqa: F401
 
 from util import timing
-
-
-OPCODES = (
-        'addr',
-        'addi',
-        'mulr',
-        'muli',
-        'banr',
-        'bani',
-        'borr',
-        'bori',
-        'setr',
-        'seti',
-        'gtir',
-        'gtri',
-        'gtrr',
-        'eqir',
-        'eqri',
-        'eqrr',
-        )
+from y2018 import elfcode
+from y2018.elfcode import OPCODES, Computer
 
 
 def parse(stream) -> tuple:
@@ -70,39 +52,7 @@ def do_instruction(registers: tuple, code: tuple) -> tuple:
     Return the new register contents.
     """
     result = list(registers)
-    match code[0]:
-        case 'addr':
-            result[code[3]] = registers[code[1]] + registers[code[2]]
-        case 'addi':
-            result[code[3]] = registers[code[1]] + code[2]
-        case 'mulr':
-            result[code[3]] = registers[code[1]] * registers[code[2]]
-        case 'muli':
-            result[code[3]] = registers[code[1]] * code[2]
-        case 'banr':
-            result[code[3]] = registers[code[1]] & registers[code[2]]
-        case 'bani':
-            result[code[3]] = registers[code[1]] & code[2]
-        case 'borr':
-            result[code[3]] = registers[code[1]] | registers[code[2]]
-        case 'bori':
-            result[code[3]] = registers[code[1]] | code[2]
-        case 'setr':
-            result[code[3]] = registers[code[1]]
-        case 'seti':
-            result[code[3]] = code[1]
-        case 'gtir':
-            result[code[3]] = int(code[1] > registers[code[2]])
-        case 'gtri':
-            result[code[3]] = int(registers[code[1]] > code[2])
-        case 'gtrr':
-            result[code[3]] = int(registers[code[1]] > registers[code[2]])
-        case 'eqir':
-            result[code[3]] = int(code[1] == registers[code[2]])
-        case 'eqri':
-            result[code[3]] = int(registers[code[1]] == code[2])
-        case 'eqrr':
-            result[code[3]] = int(registers[code[1]] == registers[code[2]])
+    result[code[3]] = elfcode.do_instruction(registers, code)
     return tuple(result)
 
 
@@ -186,10 +136,10 @@ def codify_program(program: tuple, opcodes: dict) -> tuple:
 
 
 def run_program(program: tuple) -> tuple:
-    registers = [0, 0, 0, 0]
-    for code in program:
-        registers = do_instruction(registers, code)
-    return tuple(registers)
+    comp = Computer(4)
+    comp.load(program)
+    comp.run()
+    return tuple(comp.registers)
 
 
 def run(stream, test: bool = False):
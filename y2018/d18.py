@@ -6,76 +6,75 @@ https://adventofcode.com/2018/day/18
 """
 import logging  # noqa: F401
 
-from util import timing
+from util import Grid2D, timing
+
+
+OPEN = 0
+WOODS = 1
+YARD = 16
+VALUES = {'.': OPEN, '|': WOODS, '#': YARD}
+CHARS = {OPEN: ' ', WOODS: '|', YARD: '#'}
 
 
 class Grid:
     def __init__(self, size: int = 50):
         self.size = size
-        self.woods = set()
-        self.yards = set()
+        self.grid = Grid2D(size, size, pad=1)
         self.counter = 0
-        self.history = [(self.woods, self.yards)]
+        self.history = []
+        self.seen = {}
 
     def parse(self, stream):
-        y = 0
-        for line in stream:
-            line = line.strip()
-            for x, ch in enumerate(line):
-                if ch == '#':
-                    self.yards.add((x, y))
-                elif ch == '|':
-                    self.woods.add((x, y))
-            y += 1
-        return stream.readline().strip()
+        lines = [line.strip() for line in stream]
+        self.grid = Grid2D.from_lines(lines, VALUES, pad=1)
+        self.size = self.grid.height
+        self.record()
+
+    def record(self):
+        snapshot = self.grid.snapshot()
+        self.seen.setdefault(snapshot, self.counter)
+        self.history.append(snapshot)
 
     def update(self):
+        """Advance the landscape by one minute.
+
+        Woods and yards have values 1 and 16, so the sum of a cell's eight
+        neighbours holds the number of adjacent woods in its low four bits,
+        and the number of yards above that.
+        """
         self.counter += 1
-        newwoods = set()
-        newyards = set()
-
-        for y in range(self.size):
-            for x in range(self.size):
-                p = (x, y)
-                adj = {
-                        (x - 1, y - 1),
-                        (x - 1, y),
-                        (x - 1, y + 1),
-                        (x + 1, y - 1),
-                        (x + 1, y),
-                        (x + 1, y + 1),
-                        (x, y - 1),
-                        (x, y + 1),
-                        }
-                if p in self.woods:
-                    yards = len(self.yards & adj)
-                    if yards > 2:
-                        newyards.add(p)
-                    else:
-                        newwoods.add(p)
-                elif p in self.yards:
-                    woods = len(self.woods & adj)
-                    yards = len(self.yards & adj)
-                    if woods > 0 and yards > 0:
-                        newyards.add(p)
-                else:
-                    woods = len(self.woods & adj)
-                    if woods > 2:
-                        newwoods.add(p)
-        self.woods = newwoods
-        self.yards = newyards
-        self.history.append((self.woods, self.yards))
+        grid = self.grid
+        cells = grid.cells
+        new = cells[:]
+        around = grid.surrounding
+
+        for i in grid.indexes():
+            total = 0
+            for offset in around:
+                total += cells[i + offset]
+            woods = total & 15
+            yards = total >> 4
+            v = cells[i]
+            if v == WOODS:
+                if yards > 2:
+                    new[i] = YARD
+            elif v == YARD:
+                if woods == 0 or yards == 0:
+                    new[i] = OPEN
+            elif woods > 2:
+                new[i] = WOODS
+        grid.cells = new
+        self.record()
 
     def run(self, count: int):
         while self.counter < count:
             self.update()
 
     def find_cycle(self) -> tuple:
-        while self.woods:
+        while self.grid.count(WOODS):
             self.update()
-            entry = (self.woods, self.yards)
-            if entry in self.history[:-1]:
-                index = self.history.index(entry)
+            index = self.seen[self.history[-1]]
+            if index != self.counter:
                 logging.info(
                         f"Found a cycle between update {self.counter} "
                         f"and {index}")
@@ -86,27 +85,15 @@ class Grid:
         diff = count - start
         period = end - start
         index = start + (diff % period)
-        woods, yards = self.history[index]
-        return len(woods) * len(yards)
+        snapshot = self.history[index]
+        return snapshot.count(WOODS) * snapshot.count(YARD)
 
     @property
     def total_resource(self) -> int:
-        return len(self.woods) * len(self.yards)
+        return self.grid.count(WOODS) * self.grid.count(YARD)
 
     def to_string(self) -> str:
-        lines = []
-        for y in range(self.size):
-            line = []
-            for x in range(self.size):
-                p = (x, y)
-                if p in self.woods:
-                    line.append('|')
-                elif p in self.yards:
-                    line.append('#')
-                else:
-                    line.append(' ')
-            lines.append(''.join(line))
-        return '\n'.join(lines)
+        return self.grid.to_string(CHARS)
 
 
 def run(stream, test: bool = False):
@@ -7,7 +7,7 @@ https://adventofcode.com/2018/day/20
 import logging  # noqa: F401
 from collections import defaultdict
 
-from util import get_manhattan_distance, timing, INF, PriorityQueue
+from util import bfs, bidirectional_bfs, timing
 
 
 MOVES = {
@@ -77,7 +77,7 @@ class Graph:
     def __init__(self):
         self.nodes = set()
         self.edges = defaultdict(set)
-        self.dist = defaultdict(lambda: INF)
+        self.dist = {}
 
     def build(self, exp: Exp):
         """Build the graph by walking through an Exp tree."""
@@ -118,30 +118,9 @@ class Graph:
 
         Return the number of steps in the shortest path, or None if the goal is
         not reachable.
-
-        Best distances from the start point for each node are cached so you can
-        quickly find paths from the same start node to different goals. If you
-        want to search from a different start point, you must clear the cache
-        yourself.
         """
-        q = PriorityQueue()
-        q.push(start, get_manhattan_distance(start, goal))
-        self.dist[start] = 0
-        explored = set()
-
-        while q:
-            cost, node = q.pop()
-            if node == goal:
-                return cost
-
-            for n in self.get_neighbours(node):
-                score = self.dist[node] + 1
-                if score < self.dist[n]:
-                    self.dist[n] = score
-                    f = score + get_manhattan_distance(n, goal)
-                    q.set_priority(n, f)
-            explored.add(node)
-        return None
+        result = bidirectional_bfs(start, goal, self.get_neighbours)
+        return result.distance
 
     def find_furthest_path(self, start: tuple = (0, 0)) -> int:
         """Find the distance to the furthest node from `start`.
@@ -152,25 +131,10 @@ class Graph:
         Shortest distance to each target node is captured in `self.dist` for
         later reference.
         """
-        # Use a Dijkstra to get the shortest distance to each node in the
-        # graph, and then return the largest one.
-        self.dist = defaultdict(lambda: INF)
-        self.dist[start] = 0
-        q = PriorityQueue()
-        explored = set()
-        q.push(start, 0)
-
-        while q:
-            cost, node = q.pop()
-            score = cost + 1
-            for n in self.get_neighbours(node):
-                if n in explored:
-                    continue
-                if score < self.dist[n]:
-                    self.dist[n] = score
-                    q.set_priority(n, score)
-            explored.add(node)
-        return max(x for x in self.dist.values() if x < INF)
+        # Every door is one step, so a breadth-first search finds the shortest
+        # distance to each node in the graph, then return the largest one.
+        self.dist = bfs((start,), self.get_neighbours).cost
+        return max(self.dist.values())
 
     def count_rooms(self, minlength: int) -> int:
         """Return the number of rooms at least `minlength` steps away.
@@ -179,7 +143,7 @@ class Graph:
         starting point, so the distances will already be calculated in
         `self.dist`.
         """
-        return sum(1 for x in self.dist.values() if x < INF and x >= minlength)
+        return sum(1 for x in self.dist.values() if x >= minlength)
 
 
 def run(stream, test: bool = False):
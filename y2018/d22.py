@@ -5,9 +5,8 @@ Day 22: Mode Maze
 https://adventofcode.com/2018/day/22
 """
 import logging  # noqa: F401
-from collections import defaultdict
 
-from util import get_manhattan_distance, timing, INF, PriorityQueue
+from util import astar, get_manhattan_distance, timing
 
 
 TYPES = '.=|'
@@ -24,15 +23,6 @@ def get_adjacent(position: tuple) -> set[tuple]:
     return result
 
 
-def trace_to_path(trace: dict, end: tuple) -> list:
-    result = [end]
-    node = end
-    while node in trace:
-        result.insert(0, trace[node])
-        node = trace[node]
-    return result
-
-
 class Grid:
     def __init__(self, depth: int, target: tuple):
         self.depth = depth
@@ -105,30 +95,17 @@ class Grid:
 
         Return the total time taken in the shortest path.
         """
-        q = PriorityQueue()
         start = (0, 0, 1)
         goal = self.target + (1,)
-        q.push(start, sum(self.target))
-        dist = defaultdict(lambda: INF)
-        dist[start] = 0
-        trace = {}
-
-        while q:
-            cost, node = q.pop()
-            logging.debug(f"At {node} with cost {dist[node]} ...")
-            if node == goal:
-                logging.debug(trace_to_path(trace, goal))
-                return cost
-
-            neighbours = self.get_neighbours(node)
-            for n, cost in neighbours.items():
-                score = dist[node] + cost
-                if score < dist[n]:
-                    dist[n] = score
-                    trace[n] = node
-                    f = score + self.estimate_distance(n)
-                    q.set_priority(n, f)
-        return None
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        result = astar(
+                start,
+                lambda node: self.get_neighbours(node).items(),
+                self.estimate_distance,
+                goal, paths=debug)
+        if debug and result.found is not None:
+            logging.debug(result.get_path())
+        return result.distance
 
 
 def parse(stream) -> Grid:
@@ -0,0 +1,271 @@
+"""The ElfCode register machine, shared by several 2018 puzzles.
+
+Each instruction is an opcode and three integers a, b and c, and writes its
+result to register c. Some programs bind one register to the instruction
+pointer, so that writing to it makes a jump.
+"""
+import logging  # noqa: F401
+
+
+# How each opcode computes its result. A and B stand for the contents of
+# registers a and b, and a and b for the values themselves.
+OPERATIONS = {
+        'addr': '{A} + {B}',
+        'addi': '{A} + {b}',
+        'mulr': '{A} * {B}',
+        'muli': '{A} * {b}',
+        'banr': '{A} & {B}',
+        'bani': '{A} & {b}',
+        'borr': '{A} | {B}',
+        'bori': '{A} | {b}',
+        'setr': '{A}',
+        'seti': '{a}',
+        'gtir': '1 if {a} > {B} else 0',
+        'gtri': '1 if {A} > {b} else 0',
+        'gtrr': '1 if {A} > {B} else 0',
+        'eqir': '1 if {a} == {B} else 0',
+        'eqri': '1 if {A} == {b} else 0',
+        'eqrr': '1 if {A} == {B} else 0',
+        }
+OPCODES = tuple(OPERATIONS)
+
+# One function per opcode, taking (registers, a, b) and returning the result.
+FUNCTIONS = {
+        opcode: eval(
+            'lambda r, a, b: ' + template.format(
+                A='r[a]', B='r[b]', a='a', b='b'))
+        for opcode, template in OPERATIONS.items()}
+
+
+def do_instruction(registers, code: tuple) -> int:
+    """Return the result of instruction `code` on these registers."""
+    opcode, a, b, _ = code
+    return FUNCTIONS[opcode](registers, a, b)
+
+
+def parse_instruction(line: str) -> tuple:
+    words = line.split()
+    return (words[0],) + tuple(int(x) for x in words[1:])
+
+
+def get_jump_targets(line: int, code: tuple, bind: int) -> set[int]:
+    """Return the lines that instruction `code` is likely to jump to.
+
+    Only the usual forms are recognised: setting the bound register to a
+    constant, adding a constant to it, or adding a flag register to it to
+    skip the next line. Other jumps can land anywhere, so every line can
+    still be reached through the dispatch, this is just where the blocks
+    start.
+    """
+    opcode, a, b, c = code
+    if c != bind:
+        return set()
+    if opcode == 'seti':
+        return {a + 1}
+    if opcode == 'addi' and a == bind:
+        return {line + b + 1}
+    if opcode == 'addr' and bind in (a, b):
+        return {line + 1, line + 2}
+    return {line + 1}
+
+
+def generate_source(
+        program: tuple, size: int, bind: int | None,
+        breakpoints: frozenset = frozenset()) -> str:
+    """Return Python source for a function that runs `program`.
+
+    The function takes (r, ip, n), where r is the list of registers, ip the
+    instruction pointer and n the count of instructions executed so far,
+    and returns the new (ip, n), having updated r in place. It runs until
+    the pointer leaves the program, or reaches one of `breakpoints`,
+    before executing it.
+
+    The registers are held in local variables while it runs. The program
+    is split into basic blocks, which start at the top, at breakpoints and
+    at the likely targets of jumps, and end at the next block or at a write
+    to the bound register. Any other line that a jump lands on runs one
+    instruction at a time until it reaches a block. Because the bound
+    register always holds the address of the current instruction, reads of
+    it are replaced with that address.
+    """
+    registers = [f"r{i}" for i in range(size)]
+    lines = [
+            "def run(r, ip, n):",
+            f"    {', '.join(registers)}, = r",
+            "    start = n",
+            "    while True:",
+            ]
+
+    leaders = {0} | set(breakpoints)
+    if bind is not None:
+        for i, code in enumerate(program):
+            leaders |= get_jump_targets(i, code, bind)
+    leaders = sorted(x for x in leaders if 0 <= x < len(program))
+
+    def emit_block(start: int, stop: int):
+        count = 0
+        for i in range(start, stop):
+            opcode, a, b, c = program[i]
+            template = OPERATIONS[opcode]
+            values = {'a': a, 'b': b}
+            # Only look up operands that the opcode uses as registers.
+            for name, x in (('A', a), ('B', b)):
+                if '{' + name + '}' in template:
+                    values[name] = str(i) if x == bind else registers[x]
+            expr = template.format(**values)
+            count += 1
+            if c == bind:
+                lines.append(f"            ip = ({expr}) + 1")
+                lines.append(f"            n += {count}")
+                lines.append("            continue")
+                return
+            lines.append(f"            {registers[c]} = {expr}")
+        # Fall through to the next block, or off the end of the program.
+        lines.append(f"            ip = {stop}")
+        lines.append(f"            n += {count}")
+        lines.append("            continue")
+
+    keyword = 'if'
+    for i, line in enumerate(leaders):
+        lines.append(f"        {keyword} ip == {line}:")
+        keyword = 'elif'
+        if line in breakpoints:
+            lines.append("            break")
+        else:
+            stop = leaders[i + 1] if i + 1 < len(leaders) else len(program)
+            emit_block(line, stop)
+    for line in sorted(set(range(len(program))) - set(leaders)):
+        lines.append(f"        elif ip == {line}:")
+        emit_block(line, line + 1)
+    lines.append("        break")
+    if bind is not None:
+        lines.append(f"    if n != start: {registers[bind]} = ip - 1")
+    lines.append(f"    r[:] = {', '.join(registers)},")
+    lines.append("    return ip, n")
+    return '\n'.join(lines) + '\n'
+
+
+def compile_program(
+        program: tuple, size: int, bind: int | None,
+        breakpoints: frozenset = frozenset()):
+    """Compile `program` into a function. See `generate_source`."""
+    source = generate_source(program, size, bind, breakpoints)
+    namespace = {}
+    exec(compile(source, '<elfcode>', 'exec'), namespace)
+    return namespace['run']
+
+
+class Computer:
+    def __init__(self, size: int = 6):
+        self.pointer = 0
+        self.counter = 0
+        self.bind = None
+        self.registers = [0 for _ in range(size)]
+        self.program = []
+        self.halt = False
+        self.compiled = {}
+
+    def parse(self, stream):
+        if isinstance(stream, str):
+            stream = stream.split('\n')
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#ip'):
+                self.bind = int(line.split()[1])
+                continue
+            self.program.append(parse_instruction(line))
+        self.compiled = {}
+
+    def load(self, program: tuple, bind: int | None = None):
+        self.program = list(program)
+        self.bind = bind
+        self.compiled = {}
+
+    def reset(self):
+        self.pointer = 0
+        self.counter = 0
+        self.registers = [0 for _ in self.registers]
+        self.halt = False
+
+    def update_halt(self):
+        if self.pointer < 0 or self.pointer >= len(self.program):
+            self.halt = True
+
+    def step(self):
+        """Perform the next instruction."""
+        registers = self.registers
+        if self.bind is not None:
+            registers[self.bind] = self.pointer
+        opcode, a, b, c = self.program[self.pointer]
+        registers[c] = FUNCTIONS[opcode](registers, a, b)
+        if self.bind is not None:
+            self.pointer = registers[self.bind]
+        self.pointer += 1
+        self.counter += 1
+        self.update_halt()
+
+    def run(self, breakpoints=()) -> bool:
+        """Run the program until it halts, or reaches a breakpoint.
+
+        `breakpoints` is a collection of program lines to stop at, before
+        executing them. If the computer is already sitting on a breakpoint,
+        it goes past it. Return whether the computer has halted.
+
+        The program is compiled to Python the first time it runs with each
+        set of breakpoints.
+        """
+        self.update_halt()
+        if self.halt:
+            return True
+        breakpoints = frozenset(breakpoints)
+        if self.pointer in breakpoints:
+            self.step()
+            if self.halt or self.pointer in breakpoints:
+                return self.halt
+        fn = self.compiled.get(breakpoints)
+        if fn is None:
+            fn = compile_program(
+                    tuple(self.program), len(self.registers), self.bind,
+                    breakpoints)
+            self.compiled[breakpoints] = fn
+        self.pointer, self.counter = fn(
+                self.registers, self.pointer, self.counter)
+        self.update_halt()
+        return self.halt
+
+    def run_to_line(self, line: int):
+        """Run the program until we arrive at a particular program line."""
+        self.step()
+        if self.pointer != line:
+            self.run((line,))
+
+    def watch_line_register(self, line: int, register: int):
+        """Generate the contents of `register` each time `line` executes."""
+        while not self.halt:
+            if self.pointer != line and self.run((line,)):
+                return
+            self.step()
+            yield self.registers[register]
+
+    def watch_registers(self, registers: set):
+        """Trace every write to `registers` to the debug log."""
+        while not self.halt:
+            line = self.pointer
+            count = self.counter
+            self.step()
+            inst = self.program[line]
+            if inst[-1] in registers:
+                new = self.registers[inst[-1]]
+                logging.debug(
+                        f"{count:6d} line {line:2d} "
+                        f"{inst[0]} {inst[1]:d} {inst[2]:8d} {inst[3]:d} "
+                        f"r{inst[-1]} -> {new}")
+
+    def to_string(self):
+        code = self.program[self.pointer]
+        registers = ' '.join([f'{x:5d}' for x in self.registers])
+        return (
+                f'{self.counter:5d} {self.pointer:2d} '
+                f'{code[0]} {code[1]} {code[2]:2d} {code[3]} [{registers}]')
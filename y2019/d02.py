@@ -5,9 +5,11 @@ Day 2: 1202 Program Alarm
 https://adventofcode.com/2019/day/2
 """
 import logging  # noqa: F401
+from functools import partial
+from itertools import product
 
 from util import timing
-from y2019.intcode import Computer
+from y2019.intcode import Computer, sweep
 
 
 def parse(stream) -> Computer:
@@ -16,15 +18,40 @@ def parse(stream) -> Computer:
     return comp
 
 
+def get_output(comp: Computer, noun: int, verb: int) -> int:
+    comp.memory[1] = noun
+    comp.memory[2] = verb
+    comp.run()
+    return comp.memory[0]
+
+
+def try_inputs(target: int, comp: Computer, params: tuple[int]) -> int | None:
+    """Return 100 * noun + verb if the pair produce `target`, else None."""
+    noun, verb = params
+    try:
+        if get_output(comp, noun, verb) == target:
+            return 100 * noun + verb
+    except (IndexError, ValueError):
+        # Some pairs turn the program into nonsense.
+        pass
+    return None
+
+
+def find_inputs(comp: Computer, target: int) -> tuple[int] | None:
+    """Find the noun and verb that make the program output `target`."""
+    result = sweep(
+            comp, product(range(100), repeat=2),
+            partial(try_inputs, target), reduce='first', chunksize=100)
+    return None if result is None else result[0]
+
+
 def run(stream, test: bool = False):
     with timing("Part 1"):
         comp = parse(stream)
         if test:
             comp.run()
         else:
-            comp.memory[1] = 12
-            comp.memory[2] = 2
-            comp.run()
+            get_output(comp, 12, 2)
         result1 = comp.memory[0]
 
     with timing("Part 2"):
@@ -32,7 +59,7 @@ def run(stream, test: bool = False):
             result2 = 0
         else:
             target = 19690720
-            noun, verb = comp.find_inputs(target)
+            noun, verb = find_inputs(comp, target)
             result2 = noun * 100 + verb
 
     return (result1, result2)
@@ -7,71 +7,66 @@ https://adventofcode.com/2019/day/7
 import logging  # noqa: F401
 from itertools import permutations
 
-from util import NINF, timing
-from y2019.intcode import Computer
+from util import timing
+from y2019.intcode import Computer, Network, sweep
 
 
 class Chain:
-    def __init__(self, amplifiers=None):
-        self.amplifiers = list(amplifiers)
+    """A chain of amplifiers, all running the same program."""
+    def __init__(self, program: tuple[int]):
+        self.program = program
 
-    def reset(self):
-        for amp in self.amplifiers:
-            amp.reset()
+    def get_amplifiers(self, count: int) -> list[Computer]:
+        amp = Computer()
+        amp.program = self.program
+        amp.load_program()
+        return [amp] + [amp.clone() for _ in range(count - 1)]
 
     def run(self, phases: tuple[int]) -> int:
         signal = 0
-        for i in range(len(phases)):
-            amp = self.amplifiers[i]
-            (signal,) = amp.run((phases[i], signal))
+        for amp, phase in zip(self.get_amplifiers(len(phases)), phases):
+            (signal,) = amp.run((phase, signal))
         return signal
 
     def run_loop(self, phases: tuple[int]) -> int:
-        for i in range(len(phases)):
-            amp = self.amplifiers[i]
-            amp.add_input(phases[i])
+        """Run the amplifiers in a feedback loop, and return the last signal.
+
+        Each amplifier's output is connected to the next one's input, and
+        the last amplifier feeds back into the first.
+        """
+        amps = self.get_amplifiers(len(phases))
+        network = Network(amps)
+        for i, phase in enumerate(phases):
+            amps[i].add_input(phase)
+            network.connect(i, (i + 1) % len(amps))
+        amps[0].add_input(0)
+        network.run()
+        # The last amplifier's final output is left waiting for the first.
+        return amps[0].inputs[-1]
+
+    def find_highest_signal(self) -> int:
+        _, signal = sweep(self.program, permutations(range(5)), get_signal)
+        return signal
 
-        signal = 0
-        i = 0
-        length = len(self.amplifiers)
-        try:
-            while not self.amplifiers[-1].halt:
-                amp = self.amplifiers[i % length]
-                amp.add_input(signal)
-                signal = next(amp.generate())
-                i += 1
-        except StopIteration:
-            pass
+    def find_highest_signal_loop(self) -> int:
+        phases, signal = sweep(
+                self.program, permutations(range(5, 10)), get_loop_signal)
+        logging.debug(f"{phases} produced {signal}")
         return signal
 
-    def find_highest_signal(self):
-        best = NINF
-        for phases in permutations(range(5)):
-            self.reset()
-            signal = self.run(phases)
-            if signal > best:
-                best = signal
-        return best
-
-    def find_highest_signal_loop(self):
-        best = NINF
-        for phases in permutations(range(5, 10)):
-            self.reset()
-            signal = self.run_loop(phases)
-            logging.debug(f"{phases} produced {signal}")
-            if signal > best:
-                best = signal
-        return best
+
+def get_signal(comp: Computer, phases: tuple[int]) -> int:
+    return Chain(comp.program).run(phases)
+
+
+def get_loop_signal(comp: Computer, phases: tuple[int]) -> int:
+    return Chain(comp.program).run_loop(phases)
 
 
 def parse(stream) -> Chain:
     comp = Computer()
     comp.parse(stream)
-
-    amps = [comp]
-    for _ in range(4):
-        amps.append(comp.clone())
-    return Chain(amps)
+    return Chain(comp.program)
 
 
 def run(stream, test: bool = False):
@@ -84,8 +79,6 @@ def run(stream, test: bool = False):
             chain = parse(
                     "3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,"
                     "27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5")
-        else:
-            chain.reset()
         result2 = chain.find_highest_signal_loop()
 
     return (result1, result2)
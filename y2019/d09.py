@@ -17,6 +17,7 @@ def parse(stream) -> Computer:
 def run(stream, test: bool = False):
     with timing("Part 1"):
         comp = parse(stream)
+        comp.enable_translation()
         comp.add_input(1)
         result1 = ','.join(str(x) for x in comp.run())
 
@@ -27,6 +27,7 @@ def move(position: tuple, direction: int) -> tuple:
 class Grid:
     def __init__(self):
         self.robot = Computer()
+        self.robot.enable_translation()
         self.position = (0, 0)
         self.direction = 0
         self.painted = set()
@@ -40,23 +41,33 @@ class Grid:
         self.direction = 0
         self.painted = set()
 
+    def step(self) -> tuple | None:
+        """Show the robot the current panel, and carry out its response.
+
+        Return the position the robot painted, or None if it halted instead.
+        """
+        robot = self.robot
+        robot.add_input(int(self.position in self.painted))
+        robot.execute()
+        if len(robot.outputs) < 2:
+            return None
+        colour = robot.outputs.popleft()
+        rotation = robot.outputs.popleft()
+        robot.outputs.clear()
+
+        position = self.position
+        if colour:
+            self.painted.add(position)
+        else:
+            self.painted.discard(position)
+        self.direction = turn(self.direction, rotation)
+        self.position = move(position, self.direction)
+        return position
+
     def run(self):
         """Run the robot until it halts."""
         while not self.robot.halt:
-            current = int(self.position in self.painted)
-            self.robot.add_input(current)
-            try:
-                colour = next(self.robot.generate())
-                rotation = next(self.robot.generate())
-
-                if colour:
-                    self.painted.add(self.position)
-                else:
-                    self.painted.discard(self.position)
-                self.direction = turn(self.direction, rotation)
-                self.position = move(self.position, self.direction)
-            except StopIteration:
-                pass
+            self.step()
 
     def count_painted_panels(self) -> int:
         """Run the robot until it halts.
@@ -65,22 +76,9 @@ class Grid:
         """
         result = set()
         while not self.robot.halt:
-            current = int(self.position in self.painted)
-            self.robot.add_input(current)
-            try:
-                colour = next(self.robot.generate())
-                rotation = next(self.robot.generate())
-
-                if colour:
-                    self.painted.add(self.position)
-                else:
-                    self.painted.discard(self.position)
-                result.add(self.position)
-
-                self.direction = turn(self.direction, rotation)
-                self.position = move(self.position, self.direction)
-            except StopIteration:
-                pass
+            position = self.step()
+            if position is not None:
+                result.add(position)
         return len(result)
 
     def to_string(self) -> str:
@@ -15,33 +15,35 @@ class Game:
     def __init__(self):
         self.tiles = defaultdict(lambda: 0)
         self.computer = Computer()
+        self.computer.enable_translation()
         self.ball = (0, 0)
         self.paddle = (0, 0)
         self.score = 0
 
+    def update(self):
+        """Apply the screen updates the game has output so far."""
+        outputs = self.computer.outputs
+        while len(outputs) >= 3:
+            x = outputs.popleft()
+            y = outputs.popleft()
+            v = outputs.popleft()
+            if (x, y) == (-1, 0):
+                self.score = v
+                continue
+            if self.tiles[(x, y)] == 2 and v == 0:
+                blocks = self.count_tiles(2) - 1
+                logging.debug(
+                        f"block destroyed at ({x},{y}), "
+                        f"{blocks} remain")
+            elif v == 4:
+                self.ball = (x, y)
+            elif v == 3:
+                self.paddle = (x, y)
+            self.tiles[(x, y)] = v
+
     def run(self):
-        while not self.computer.halt:
-            try:
-                x = next(self.computer.generate())
-                y = next(self.computer.generate())
-                v = next(self.computer.generate())
-                if (x, y) == (-1, 0):
-                    self.score = v
-                else:
-                    if self.tiles[(x, y)] == 2 and v == 0:
-                        blocks = self.count_tiles(2)
-                        logging.debug(
-                                f"block destroyed at ({x},{y}), "
-                                f"{blocks} remain")
-                        if blocks == 0:
-                            return
-                    elif v == 4:
-                        self.ball = (x, y)
-                    elif v == 3:
-                        self.paddle = (x, y)
-                    self.tiles[(x, y)] = v
-            except StopIteration:
-                pass
+        self.computer.run()
+        self.update()
 
     def count_tiles(self, value: int) -> int:
         return len(tuple(v for v in self.tiles.values() if v == value))
@@ -54,6 +56,7 @@ class Game:
         left (-1). If the ball is to the right of the paddle, we send it right
         (1). If the ball is directly above the paddle, we leave it neutral (0).
         """
+        self.update()
         diff = self.ball[0] - self.paddle[0]
         if diff != 0:
             diff = 1 if diff > 0 else -1
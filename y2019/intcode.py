@@ -1,29 +1,616 @@
-from collections import defaultdict
+import os
+from collections import Counter, defaultdict, deque, namedtuple
+
+from util import find_first
+
+
+HALT = 99
+ADD = 1
+MUL = 2
+INPUT = 3
+OUTPUT = 4
+JUMP_IF_TRUE = 5
+JUMP_IF_FALSE = 6
+LESS_THAN = 7
+EQUALS = 8
+ADJUST_BASE = 9
+
+# The number of parameters each instruction takes, and which one of them (if
+# any) is written to.
+PARAMS = {
+        HALT: (0, None),
+        ADD: (3, 3),
+        MUL: (3, 3),
+        INPUT: (1, 1),
+        OUTPUT: (1, None),
+        JUMP_IF_TRUE: (2, None),
+        JUMP_IF_FALSE: (2, None),
+        LESS_THAN: (3, 3),
+        EQUALS: (3, 3),
+        ADJUST_BASE: (1, None),
+        }
+
+# Reasons for the engine to stop running.
+HALTED = 'halted'
+OUTPUT_READY = 'output'
+NEEDS_INPUT = 'input'
+
+# Cache of decoded instructions, keyed by the raw instruction value.
+_decoded = {}
+
+
+def decode(value: int) -> tuple[int, int, int, int]:
+    """Decode an instruction value into (opcode, mode 1, mode 2, mode 3).
+
+    Anything that isn't a valid instruction decodes to an opcode of -1. The
+    result is cached, since programs only use a handful of distinct
+    instructions.
+    """
+    result = _decoded.get(value)
+    if result is not None:
+        return result
+    modes, opcode = divmod(value, 100)
+    m1 = modes % 10
+    m2 = modes // 10 % 10
+    m3 = modes // 100 % 10
+    result = (opcode, m1, m2, m3)
+    if value < 0 or opcode not in PARAMS or modes >= 1000:
+        result = (-1, 0, 0, 0)
+    else:
+        count, write = PARAMS[opcode]
+        modes = (m1, m2, m3)
+        if any(m > 2 for m in modes[:count]):
+            result = (-1, 0, 0, 0)
+        elif write and modes[write - 1] == 1:
+            result = (-1, 0, 0, 0)
+    _decoded[value] = result
+    return result
+
+
+class Memory:
+    """Flat, growable Intcode memory.
+
+    Addresses past the end read as zero, and writing to them grows the
+    memory. The engine works on `cells`, the underlying list, directly.
+    """
+    def __init__(self, values=()):
+        self.cells = list(values)
+        # Bumped on every write from outside the engine, so that a computer
+        # knows when its translation is stale.
+        self.version = 0
+        # The numbers of the pages written since the last snapshot, or None
+        # if nothing is keeping track.
+        self.dirty = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __getitem__(self, addr: int) -> int:
+        if addr < 0:
+            raise ValueError(f"Invalid address {addr}")
+        if addr >= len(self.cells):
+            return 0
+        return self.cells[addr]
+
+    def __setitem__(self, addr: int, value: int):
+        if addr < 0:
+            raise ValueError(f"Invalid address {addr}")
+        self.ensure(addr + 1)
+        self.cells[addr] = value
+        self.version += 1
+        if self.dirty is not None:
+            self.dirty.add(addr >> PAGE_BITS)
+
+    def ensure(self, size: int):
+        """Grow the memory, if needed, to hold at least `size` cells."""
+        cells = self.cells
+        if size > len(cells):
+            # Grow generously, so that a program walking upwards through
+            # memory doesn't trigger a resize on every step.
+            cells.extend([0] * max(size - len(cells), len(cells) // 2))
+
+    def load(self, values):
+        self.cells[:] = values
+        self.version += 1
+        self.dirty = None
+
+
+# Extra reasons for translated code to stop, which hand control back to the
+# computer: the code jumped somewhere it wasn't translated for, ran off the
+# end of memory, wrote over its own instructions, or hit something only the
+# interpreter knows how to report.
+MISSED = 'missed'
+GROW = 'grow'
+MODIFIED = 'modified'
+FALLBACK = 'fallback'
+
+# Give up on translation after retranslating this many times in one run.
+MAX_RETRANSLATIONS = 32
+# Stop translating for a computer whose program keeps rewriting itself.
+MAX_MODIFICATIONS = 8
+# Cache of translations, keyed by memory contents and entry points.
+MAX_CACHED = 64
+_translations = {}
+
+translation = namedtuple('translation', ['run', 'entries', 'top', 'source'])
+
+
+def _read_cell(cells, addr: int) -> int:
+    return cells[addr] if 0 <= addr < len(cells) else 0
+
+
+def find_instructions(cells, entries) -> tuple[dict, set]:
+    """Decode every instruction reachable from `entries`.
+
+    Return ({address: (opcode, modes, params)}, leaders), where leaders are
+    the addresses that start a basic block: the entries, static jump
+    targets, and the instruction after a conditional jump or an output.
+    Every input starts a block too, so that a program waiting on input can
+    resume there. Addresses outside memory decode as invalid.
+    """
+    instructions = {}
+    leaders = set(entries)
+    todo = list(entries)
+    while todo:
+        addr = todo.pop()
+        while addr not in instructions:
+            if 0 <= addr < len(cells):
+                op, *modes = decode(cells[addr])
+            else:
+                op, modes = -1, [0, 0, 0]
+            if op < 0:
+                instructions[addr] = (op, modes, ())
+                break
+            count, _ = PARAMS[op]
+            params = tuple(
+                    _read_cell(cells, addr + 1 + i) for i in range(count))
+            instructions[addr] = (op, modes, params)
+            following = addr + 1 + count
+            if op == HALT:
+                break
+            if op == JUMP_IF_TRUE or op == JUMP_IF_FALSE:
+                if modes[1] == 1:
+                    leaders.add(params[1])
+                    todo.append(params[1])
+                leaders.add(following)
+            elif op == INPUT:
+                leaders.add(addr)
+            elif op == OUTPUT:
+                leaders.add(following)
+            addr = following
+    return instructions, leaders
+
+
+class _Writer:
+    """Generate the source for one translated program."""
+    def __init__(self, instructions: dict, leaders: set):
+        self.instructions = instructions
+        self.leaders = sorted(a for a in leaders if a in instructions)
+        self.code = set()
+        for addr, (_, _, params) in instructions.items():
+            self.code.update(range(addr, addr + 1 + len(params)))
+        self.top = 0
+        self.lines = []
+
+    def emit(self, depth: int, line: str):
+        self.lines.append('    ' * depth + line)
+
+    def address(self, depth: int, mode: int, param: int, name: str) -> str:
+        """Emit the lookup for a parameter's address, and return it."""
+        if mode == 0:
+            if param < 0:
+                self.emit(depth, f"_bad({param})")
+            self.top = max(self.top, param)
+            return str(param)
+        self.emit(depth, f"{name} = rb + {param}")
+        self.emit(depth, f"if {name} < 0: _bad({name})")
+        return name
+
+    def value(self, depth: int, mode: int, param: int, name: str) -> str:
+        if mode == 1:
+            return str(param)
+        return f"cells[{self.address(depth, mode, param, name)}]"
+
+    def mark_dirty(self, depth: int, dest: str):
+        """Record the page written to, if the memory is keeping track."""
+        if dest.isdigit():
+            page = int(dest) >> PAGE_BITS
+        else:
+            page = f"{dest} >> {PAGE_BITS}"
+        self.emit(depth, f"if dirty is not None: dirty.add({page})")
+
+    def check_write(self, depth: int, dest: str, following: int):
+        """Hand back to the interpreter if a write lands on code."""
+        if dest.isdigit():
+            if int(dest) in self.code:
+                self.emit(depth, f"return MODIFIED, {following}, rb")
+        elif self.code:
+            self.emit(depth, f"if {dest} in CODE: "
+                             f"return MODIFIED, {following}, rb")
+
+    def instruction(self, depth: int, addr: int) -> bool:
+        """Emit one instruction, and return whether it ends the block."""
+        op, modes, params = self.instructions[addr]
+        following = addr + 1 + len(params)
+        if 2 in modes[:len(params)]:
+            self.emit(depth, f"at = {addr}")
+        if op in (ADD, MUL, LESS_THAN, EQUALS):
+            a = self.value(depth, modes[0], params[0], 'a')
+            b = self.value(depth, modes[1], params[1], 'b')
+            c = self.address(depth, modes[2], params[2], 'c')
+            expr = {
+                    ADD: f"{a} + {b}",
+                    MUL: f"{a} * {b}",
+                    LESS_THAN: f"1 if {a} < {b} else 0",
+                    EQUALS: f"1 if {a} == {b} else 0",
+                    }[op]
+            self.emit(depth, f"cells[{c}] = {expr}")
+            self.mark_dirty(depth, c)
+            self.check_write(depth, c, following)
+        elif op == JUMP_IF_TRUE or op == JUMP_IF_FALSE:
+            a = self.value(depth, modes[0], params[0], 'a')
+            test = a if op == JUMP_IF_TRUE else f"not {a}"
+            self.emit(depth, f"if {test}:")
+            b = self.value(depth + 1, modes[1], params[1], 'b')
+            self.emit(depth + 1, f"ip = {b}")
+            if modes[1] != 1:
+                self.emit(depth + 1, "if ip < 0: _bad(ip)")
+            elif params[1] < 0:
+                self.emit(depth + 1, f"_bad({params[1]})")
+            self.emit(depth + 1, "continue")
+            self.emit(depth, f"ip = {following}")
+            self.emit(depth, "continue")
+            return True
+        elif op == ADJUST_BASE:
+            a = self.value(depth, modes[0], params[0], 'a')
+            self.emit(depth, f"rb += {a}")
+        elif op == OUTPUT:
+            a = self.value(depth, modes[0], params[0], 'a')
+            self.emit(depth, f"append({a})")
+            self.emit(depth, f"if stop: "
+                             f"return OUTPUT_READY, {following}, rb")
+        elif op == INPUT:
+            c = self.address(depth, modes[0], params[0], 'c')
+            if not c.isdigit():
+                self.emit(depth, f"if c >= len(cells): "
+                                 f"return GROW, {addr}, rb")
+            self.emit(depth, "if hook is not None:")
+            self.emit(depth + 1, f"cells[{c}] = hook()")
+            self.emit(depth, "elif inputs:")
+            self.emit(depth + 1, f"cells[{c}] = popleft()")
+            self.emit(depth, "else:")
+            self.emit(depth + 1, f"return NEEDS_INPUT, {addr}, rb")
+            self.mark_dirty(depth, c)
+            self.check_write(depth, c, following)
+        elif op == HALT:
+            self.emit(depth, f"return HALTED, {addr}, rb")
+            return True
+        else:
+            self.emit(depth, f"return FALLBACK, {addr}, rb")
+            return True
+        return False
+
+    def block(self, depth: int, start: int):
+        addr = start
+        while not self.instruction(depth, addr):
+            op, modes, params = self.instructions[addr]
+            addr += 1 + len(params)
+            if addr in self.leaders or addr not in self.instructions:
+                self.emit(depth, f"ip = {addr}")
+                self.emit(depth, "continue")
+                return
+
+    def dispatch(self, depth: int, leaders: list):
+        """Emit a binary search over block addresses."""
+        if len(leaders) <= 4:
+            for i, addr in enumerate(leaders):
+                keyword = 'if' if i == 0 else 'elif'
+                self.emit(depth, f"{keyword} ip == {addr}:")
+                self.block(depth + 1, addr)
+            return
+        mid = len(leaders) // 2
+        self.emit(depth, f"if ip < {leaders[mid]}:")
+        self.dispatch(depth + 1, leaders[:mid])
+        self.emit(depth, "else:")
+        self.dispatch(depth + 1, leaders[mid:])
+
+    def write(self) -> str:
+        self.emit(0, "def run(cells, ip, rb, inputs, outputs, hook, stop, "
+                     "dirty):")
+        self.emit(1, "append = outputs.append")
+        self.emit(1, "popleft = inputs.popleft")
+        self.emit(1, "at = ip")
+        self.emit(1, "try:")
+        self.emit(2, "while True:")
+        self.dispatch(3, self.leaders)
+        self.emit(3, "return MISSED, ip, rb")
+        self.emit(1, "except IndexError:")
+        self.emit(2, "return GROW, at, rb")
+        return '\n'.join(self.lines) + '\n'
+
+
+def _bad(addr: int):
+    raise ValueError(f"Invalid address {addr}")
+
+
+def translate(cells, entries) -> translation:
+    """Translate the program in `cells` into a Python function.
+
+    Each basic block reachable from `entries` becomes straight-line code,
+    with its operands baked in as constants, and jumps go through a binary
+    search on the block address. The function takes (cells, ip, rb, inputs,
+    outputs, hook, stop, dirty) and returns (status, ip, rb), where status
+    is one of the engine's reasons for stopping, or one of MISSED, GROW,
+    MODIFIED or FALLBACK. Pages written to are added to `dirty`, unless it
+    is None.
+
+    Translations are cached by the memory contents they were made from.
+    """
+    entries = frozenset(entries)
+    key = (tuple(cells), entries)
+    result = _translations.get(key)
+    if result is not None:
+        return result
+    writer = _Writer(*find_instructions(cells, entries))
+    source = writer.write()
+    name = f"<intcode {hash(key) & 0xffffffff:08x}>"
+    namespace = {
+            'HALTED': HALTED,
+            'OUTPUT_READY': OUTPUT_READY,
+            'NEEDS_INPUT': NEEDS_INPUT,
+            'MISSED': MISSED,
+            'GROW': GROW,
+            'MODIFIED': MODIFIED,
+            'FALLBACK': FALLBACK,
+            'CODE': frozenset(writer.code),
+            '_bad': _bad,
+            }
+    exec(compile(source, name, 'exec'), namespace)
+    entries = frozenset(writer.leaders) | entries
+    result = translation(namespace['run'], entries, writer.top, source)
+    if len(_translations) >= MAX_CACHED:
+        _translations.clear()
+    _translations[key] = result
+    return result
+
+
+# Snapshots store memory in pages of this many cells.
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS
+ZERO_PAGE = (0,) * PAGE_SIZE
+
+
+class Snapshot:
+    """A frozen copy of a computer's state, made by `Computer.snapshot`.
+
+    Memory is held as a tuple of fixed-size pages, and any page that hasn't
+    changed since the snapshot it was taken relative to is shared with it,
+    so a chain of snapshots only stores the pages that changed along the
+    way. Trailing zero pages are dropped, so memory that has merely grown
+    doesn't make two states look different.
+
+    Snapshots compare by value and are hashable, so they can go straight
+    into a visited set. Integer hashes don't depend on the hash seed, so
+    the hash is stable from one run to the next.
+    """
+    __slots__ = (
+            'pages', 'pointer', 'relative_base', 'halt', 'inputs',
+            'outputs', 'key', 'hash')
+
+    def __init__(
+            self, pages, pointer, relative_base, halt, inputs, outputs):
+        self.pages = pages
+        self.pointer = pointer
+        self.relative_base = relative_base
+        self.halt = halt
+        self.inputs = inputs
+        self.outputs = outputs
+        self.key = (pages, pointer, relative_base, halt, inputs, outputs)
+        self.hash = hash(self.key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Snapshot):
+            return NotImplemented
+        return self.hash == other.hash and self.key == other.key
+
+    def __hash__(self):
+        return self.hash
+
+    def get_cells(self) -> list[int]:
+        cells = []
+        for page in self.pages:
+            cells.extend(page)
+        return cells
+
+
+def get_page(cells, n: int, base: tuple = ()) -> tuple[int]:
+    """Return page `n` of `cells`, reusing the one in `base` if unchanged."""
+    i = n * PAGE_SIZE
+    page = tuple(cells[i:i + PAGE_SIZE])
+    if len(page) < PAGE_SIZE:
+        page += ZERO_PAGE[len(page):]
+    if n < len(base) and base[n] == page:
+        return base[n]
+    if page == ZERO_PAGE:
+        return ZERO_PAGE
+    return page
+
+
+def _trim_pages(pages: list) -> tuple[tuple[int]]:
+    while pages and pages[-1] == ZERO_PAGE:
+        pages.pop()
+    return tuple(pages)
+
+
+def get_pages(cells, base: tuple = ()) -> tuple[tuple[int]]:
+    """Split `cells` into pages, reusing any unchanged page from `base`."""
+    count = -(-len(cells) // PAGE_SIZE)
+    return _trim_pages([get_page(cells, n, base) for n in range(count)])
+
+
+def update_pages(cells, base: tuple, dirty: set) -> tuple[tuple[int]]:
+    """Like `get_pages`, where only the `dirty` pages can differ from `base`.
+
+    Every other page is taken straight from `base`, or is zero if it lies
+    beyond it, so this only costs time for the pages that were written.
+    """
+    pages = list(base)
+    for n in dirty:
+        if n >= len(pages):
+            pages.extend([ZERO_PAGE] * (n + 1 - len(pages)))
+        pages[n] = get_page(cells, n, base)
+    return _trim_pages(pages)
+
+
+NAMES = {
+        HALT: 'hlt',
+        ADD: 'add',
+        MUL: 'mul',
+        INPUT: 'in',
+        OUTPUT: 'out',
+        JUMP_IF_TRUE: 'jnz',
+        JUMP_IF_FALSE: 'jz',
+        LESS_THAN: 'lt',
+        EQUALS: 'eq',
+        ADJUST_BASE: 'arb',
+        }
+
+
+def format_operand(mode: int, param: int) -> str:
+    match mode:
+        case 0:
+            return f"[{param}]"
+        case 1:
+            return str(param)
+        case _:
+            return f"[rb{param:+d}]"
+
+
+class Profile:
+    """Execution counts recorded by a computer with profiling enabled.
+
+    `addresses` and `opcodes` count how many times each instruction address
+    and each opcode was executed. `branches` maps the address of each
+    conditional jump to its [taken, not taken] counts, and `back_edges`
+    counts taken jumps backwards, from (target, source), which are the
+    loops in the program.
+    """
+    def __init__(self):
+        self.addresses = Counter()
+        self.opcodes = Counter()
+        self.branches = defaultdict(lambda: [0, 0])
+        self.back_edges = Counter()
+
+    @property
+    def total(self) -> int:
+        return self.opcodes.total()
+
+    def record_branch(self, addr: int, target: int, taken: bool):
+        self.branches[addr][0 if taken else 1] += 1
+        if taken and target <= addr:
+            self.back_edges[(target, addr)] += 1
+
+    def get_hot_loops(self, count: int = 5) -> list[tuple[int, int, int, int]]:
+        """Return the loops that ran the most instructions.
+
+        Each loop is (start, end, iterations, instructions), where
+        instructions counts everything executed at addresses from start to
+        end, including any inner loops.
+        """
+        loops = []
+        for (start, end), iterations in self.back_edges.items():
+            executed = sum(
+                    n for addr, n in self.addresses.items()
+                    if start <= addr <= end)
+            loops.append((start, end, iterations, executed))
+        loops.sort(key=lambda x: (-x[3], x[0]))
+        return loops[:count]
+
+    def report(self, count: int = 10) -> str:
+        """Return a plain-text summary of the profile."""
+        total = self.total
+        lines = [f"{total} instructions executed", "", "By opcode:"]
+        for op, n in self.opcodes.most_common():
+            lines.append(
+                    f"  {NAMES[op]:<4} {n:>12} {100 * n / total:6.2f}%")
+        lines += ["", "Hottest addresses:"]
+        for addr, n in self.addresses.most_common(count):
+            lines.append(f"  {addr:>6} {n:>12}")
+        lines += ["", "Branches (taken / not taken):"]
+        busiest = sorted(
+                self.branches.items(), key=lambda x: -sum(x[1]))
+        for addr, (taken, skipped) in busiest[:count]:
+            ratio = taken / (taken + skipped)
+            lines.append(
+                    f"  {addr:>6} {taken:>10} / {skipped:<10} "
+                    f"{100 * ratio:6.2f}% taken")
+        lines += ["", "Hottest loops:"]
+        for start, end, iterations, executed in self.get_hot_loops(count):
+            lines.append(
+                    f"  {start:>6}-{end:<6} {iterations:>10} iterations "
+                    f"{executed:>12} instructions")
+        return '\n'.join(lines)
+
+
+def disassemble(
+        cells, start: int = 0, end: int | None = None,
+        profile: Profile | None = None) -> str:
+    """Return a listing of the program in `cells`, one instruction per line.
+
+    Anything that doesn't decode as an instruction is listed as data, one
+    cell at a time. With a `profile`, each line is annotated with how many
+    times it ran, and how often it branched, and the start of each loop
+    is marked.
+    """
+    if end is None:
+        end = len(cells)
+    loop_starts = set()
+    if profile is not None:
+        loop_starts = {target for target, _ in profile.back_edges}
+    lines = []
+    addr = start
+    while addr < end:
+        op, *modes = decode(cells[addr])
+        if op < 0:
+            text = f"data {cells[addr]}"
+            size = 1
+        else:
+            count, _ = PARAMS[op]
+            params = [_read_cell(cells, addr + 1 + i) for i in range(count)]
+            operands = ', '.join(
+                    format_operand(m, p) for m, p in zip(modes, params))
+            text = f"{NAMES[op]:<4}{operands}"
+            size = 1 + count
+        if profile is None:
+            lines.append(f"{addr:>6}  {text}")
+        else:
+            mark = '>' if addr in loop_starts else ' '
+            executed = profile.addresses.get(addr, '')
+            line = f"{addr:>6}{mark} {executed:>10}  {text}"
+            if addr in profile.branches:
+                taken, skipped = profile.branches[addr]
+                line += f"  ; taken {taken}/{taken + skipped}"
+            lines.append(line.rstrip())
+        addr += size
+    return '\n'.join(lines)
 
 
 class Computer:
     def __init__(self, program: str = ''):
-        self.program = []
-        self.memory = defaultdict(lambda: 0)
+        self.program = ()
+        self.memory = Memory()
         self.halt = False
         self.pointer = 0
         self.relative_base = 0
-        self.inputs = []
+        self.inputs = deque()
         self.input_hook = None
-        self.outputs = []
-
-        self.instructions = {
-                99: self.do_halt,
-                1: self.do_add,
-                2: self.do_mul,
-                3: self.do_input,
-                4: self.do_output,
-                5: self.do_jump_if_true,
-                6: self.do_jump_if_false,
-                7: self.do_less_than,
-                8: self.do_equals,
-                9: self.do_adjust_relative_base,
-                }
+        self.outputs = deque()
+        self.translated = False
+        self.translation = None
+        self.translated_version = None
+        self.modifications = 0
+        self.base = None
+        self.profile = None
         if program:
             self.parse(program)
 
@@ -36,22 +623,91 @@ class Computer:
         self.load_program()
 
     def load_program(self):
-        self.memory.clear()
-        self.memory.update({i: x for i, x in enumerate(self.program)})
+        self.memory.load(self.program)
 
     def reset(self):
         self.load_program()
         self.pointer = 0
+        self.relative_base = 0
         self.halt = False
-        self.inputs = []
-        self.outputs = []
+        self.inputs = deque()
+        self.outputs = deque()
 
     def clone(self):
         new = Computer()
         new.program = self.program
+        new.translated = self.translated
         new.load_program()
         return new
 
+    def snapshot(self, base: Snapshot | None = None) -> Snapshot:
+        """Return a snapshot of the whole machine state.
+
+        Memory pages that are unchanged from `base` are shared with it. By
+        default, `base` is the last snapshot this computer took or restored,
+        so that snapshots taken along a search path share most of their
+        memory. Relative to that default, only the pages written to since
+        are looked at, so a snapshot takes time in proportion to how much
+        memory changed rather than to the size of memory.
+        """
+        memory = self.memory
+        if base is None:
+            base = self.base
+        if base is not None and base is self.base and \
+                memory.dirty is not None:
+            pages = update_pages(memory.cells, base.pages, memory.dirty)
+        else:
+            pages = get_pages(memory.cells, base.pages if base else ())
+        result = Snapshot(
+                pages, self.pointer, self.relative_base, self.halt,
+                tuple(self.inputs), tuple(self.outputs))
+        self.base = result
+        # Keep track of writes from here on, so that the next snapshot only
+        # has to look at the pages they touched.
+        memory.dirty = set()
+        return result
+
+    def restore(self, snapshot: Snapshot):
+        """Put the machine back into the state recorded in `snapshot`."""
+        self.memory.load(snapshot.get_cells())
+        self.memory.dirty = set()
+        self.pointer = snapshot.pointer
+        self.relative_base = snapshot.relative_base
+        self.halt = snapshot.halt
+        self.inputs = deque(snapshot.inputs)
+        self.outputs = deque(snapshot.outputs)
+        self.base = snapshot
+
+    def fork(self):
+        """Return a new computer in the same state as this one."""
+        new = Computer()
+        new.program = self.program
+        new.translated = self.translated
+        new.restore(self.snapshot())
+        return new
+
+    def enable_profiling(self) -> Profile:
+        """Start recording execution counts, and return the new Profile.
+
+        A profiled computer runs instructions one at a time through
+        `execute_traced`, which is much slower than the usual engine, but
+        otherwise behaves the same.
+        """
+        self.profile = Profile()
+        return self.profile
+
+    def disable_profiling(self):
+        self.profile = None
+
+    def enable_translation(self, enabled: bool = True):
+        """Run the program as translated Python code, instead of interpreting.
+
+        See `translate`. The computer falls back to the interpreter whenever
+        the translated code can't carry on.
+        """
+        self.translated = enabled
+        self.translation = None
+
     def add_input(self, value: int):
         self.inputs.append(value)
 
@@ -70,123 +726,546 @@ class Computer:
         Otherwise, we take the first value off the input queue.
 
         If the computer doesn't have an input hook, and the queue is empty when
-        we try to read an input, the program will crash.
+        we try to read an input, raise IndexError.
         """
         if self.input_hook is None:
-            return self.inputs.pop(0)
+            return self.inputs.popleft()
         return self.input_hook()
 
-    def get_mode(self, modes: int, index: int) -> str:
-        modes = str(modes)
+    def grow_for(self, pointer: int, relative_base: int):
+        """Grow memory to fit every address the instruction at `pointer` uses.
+
+        The engine calls this when an instruction runs off the end of memory,
+        and then retries the instruction.
+        """
+        memory = self.memory
+        memory.ensure(pointer + 4)
+        opcode, *modes = decode(memory[pointer])
+        if opcode < 0:
+            return
+        count, _ = PARAMS[opcode]
+        top = pointer + count
+        for i in range(count):
+            value = memory[pointer + 1 + i]
+            match modes[i]:
+                case 0:
+                    top = max(top, value)
+                case 2:
+                    top = max(top, value + relative_base)
+        memory.ensure(top + 1)
+
+    def execute(self, stop_on_output: bool = False) -> str:
+        """Run the program until it halts, or can't go on without input.
+
+        If `stop_on_output` is true, also stop after each output. Return the
+        reason for stopping: HALTED, NEEDS_INPUT or OUTPUT_READY.
+
+        This is the hot loop for every Intcode puzzle, so the operand fetches
+        are written out longhand for each instruction, instead of going
+        through helper methods.
+        """
+        if self.profile is not None:
+            return self.execute_traced(stop_on_output)
+        if self.translated and not self.halt:
+            status = self.execute_translated(stop_on_output)
+            if status is not None:
+                return status
+        cells = self.memory.cells
+        dirty = self.memory.dirty
+        decoded = _decoded
+        inputs = self.inputs
+        outputs = self.outputs
+        hook = self.input_hook
+        ip = self.pointer
+        rb = self.relative_base
+        if ip < 0:
+            raise ValueError(f"Invalid address {ip}")
+        status = None
         try:
-            return modes[-index]
-        except IndexError:
-            return '0'
-
-    def get_value(self, modes: int, index: int):
-        value = self.memory[self.pointer + index]
-        mode = self.get_mode(modes, index)
-        match mode:
-            case '0':
-                return self.memory[value]
-            case '1':
-                return value
-            case '2':
-                addr = value + self.relative_base
-                if addr < 0:
-                    raise ValueError(f"Invalid address {addr}")
-                return self.memory[addr]
-        raise ValueError(f"Unknown parameter mode {mode}")
-
-    def put_value(self, modes: int, index: int, value: int):
-        addr = self.memory[self.pointer + index]
-        mode = self.get_mode(modes, index)
-        match mode:
-            case '0':
-                self.memory[addr] = value
-                return
-            case '2':
-                addr += self.relative_base
-                if addr < 0:
+            while status is None:
+                try:
+                    while True:
+                        value = cells[ip]
+                        inst = decoded.get(value)
+                        if inst is None:
+                            inst = decode(value)
+                        op, m1, m2, m3 = inst
+
+                        if op == ADD or op == MUL or op == LESS_THAN \
+                                or op == EQUALS:
+                            a = cells[ip + 1]
+                            if m1 != 1:
+                                if m1 == 2:
+                                    a += rb
+                                if a < 0:
+                                    raise ValueError(f"Invalid address {a}")
+                                a = cells[a]
+                            b = cells[ip + 2]
+                            if m2 != 1:
+                                if m2 == 2:
+                                    b += rb
+                                if b < 0:
+                                    raise ValueError(f"Invalid address {b}")
+                                b = cells[b]
+                            c = cells[ip + 3]
+                            if m3 == 2:
+                                c += rb
+                            if c < 0:
+                                raise ValueError(f"Invalid address {c}")
+                            if op == ADD:
+                                cells[c] = a + b
+                            elif op == MUL:
+                                cells[c] = a * b
+                            elif op == LESS_THAN:
+                                cells[c] = int(a < b)
+                            else:
+                                cells[c] = int(a == b)
+                            if dirty is not None:
+                                dirty.add(c >> PAGE_BITS)
+                            ip += 4
+                        elif op == JUMP_IF_TRUE or op == JUMP_IF_FALSE:
+                            a = cells[ip + 1]
+                            if m1 != 1:
+                                if m1 == 2:
+                                    a += rb
+                                if a < 0:
+                                    raise ValueError(f"Invalid address {a}")
+                                a = cells[a]
+                            if (a != 0) == (op == JUMP_IF_TRUE):
+                                b = cells[ip + 2]
+                                if m2 != 1:
+                                    if m2 == 2:
+                                        b += rb
+                                    if b < 0:
+                                        raise ValueError(
+                                                f"Invalid address {b}")
+                                    b = cells[b]
+                                if b < 0:
+                                    raise ValueError(f"Invalid address {b}")
+                                ip = b
+                            else:
+                                ip += 3
+                        elif op == ADJUST_BASE:
+                            a = cells[ip + 1]
+                            if m1 != 1:
+                                if m1 == 2:
+                                    a += rb
+                                if a < 0:
+                                    raise ValueError(f"Invalid address {a}")
+                                a = cells[a]
+                            rb += a
+                            ip += 2
+                        elif op == OUTPUT:
+                            a = cells[ip + 1]
+                            if m1 != 1:
+                                if m1 == 2:
+                                    a += rb
+                                if a < 0:
+                                    raise ValueError(f"Invalid address {a}")
+                                a = cells[a]
+                            outputs.append(a)
+                            ip += 2
+                            if stop_on_output:
+                                status = OUTPUT_READY
+                                break
+                        elif op == INPUT:
+                            c = cells[ip + 1]
+                            if m1 == 2:
+                                c += rb
+                            if c < 0:
+                                raise ValueError(f"Invalid address {c}")
+                            if c >= len(cells):
+                                # Make room before consuming any input.
+                                raise IndexError(c)
+                            if hook is not None:
+                                cells[c] = hook()
+                            elif inputs:
+                                cells[c] = inputs.popleft()
+                            else:
+                                status = NEEDS_INPUT
+                                break
+                            if dirty is not None:
+                                dirty.add(c >> PAGE_BITS)
+                            ip += 2
+                        elif op == HALT:
+                            self.halt = True
+                            status = HALTED
+                            break
+                        else:
+                            raise ValueError(
+                                    f"Invalid instruction {value} at {ip}")
+                except IndexError:
+                    size = len(cells)
+                    self.grow_for(ip, rb)
+                    if len(cells) == size:
+                        raise ValueError(
+                                f"Invalid address in instruction at {ip}")
+        finally:
+            self.pointer = ip
+            self.relative_base = rb
+        return status
+
+    def execute_traced(self, stop_on_output: bool = False) -> str:
+        """Run the program like `execute`, recording it in `self.profile`."""
+        profile = self.profile
+        memory = self.memory
+        if self.halt:
+            return HALTED
+        while True:
+            ip = self.pointer
+            value = memory[ip]
+            op, *modes = decode(value)
+            if op < 0:
+                raise ValueError(f"Invalid instruction {value} at {ip}")
+            count, _ = PARAMS[op]
+            params = [memory[ip + 1 + i] for i in range(count)]
+            addrs = []
+            for mode, param in zip(modes, params):
+                addr = None
+                if mode == 0:
+                    addr = param
+                elif mode == 2:
+                    addr = param + self.relative_base
+                if addr is not None and addr < 0:
                     raise ValueError(f"Invalid address {addr}")
-                self.memory[addr] = value
-                return
-        raise ValueError(f"Invalid mode for write: {mode}")
-
-    def do_halt(self, modes: int):
-        self.halt = True
-
-    def do_add(self, modes: int):
-        a = self.get_value(modes, 1)
-        b = self.get_value(modes, 2)
-        self.put_value(modes, 3, a + b)
-        self.pointer += 4
-
-    def do_mul(self, modes: int):
-        a = self.get_value(modes, 1)
-        b = self.get_value(modes, 2)
-        self.put_value(modes, 3, a * b)
-        self.pointer += 4
-
-    def do_input(self, modes: int):
-        v = self.read_input()
-        self.put_value(modes, 1, v)
-        self.pointer += 2
-
-    def do_output(self, modes: int):
-        v = self.get_value(modes, 1)
-        self.outputs.append(v)
-        self.pointer += 2
-
-    def do_jump_if_true(self, modes: int):
-        a = self.get_value(modes, 1)
-        if a != 0:
-            b = self.get_value(modes, 2)
-            self.pointer = b
-        else:
-            self.pointer += 3
+                addrs.append(addr)
+            args = [
+                    p if a is None else memory[a]
+                    for p, a in zip(params, addrs)]
+            if op == INPUT and self.input_hook is None and not self.inputs:
+                return NEEDS_INPUT
 
-    def do_jump_if_false(self, modes: int):
-        a = self.get_value(modes, 1)
-        if a == 0:
-            b = self.get_value(modes, 2)
-            self.pointer = b
-        else:
-            self.pointer += 3
-
-    def do_less_than(self, modes: int):
-        a = self.get_value(modes, 1)
-        b = self.get_value(modes, 2)
-        self.put_value(modes, 3, int(a < b))
-        self.pointer += 4
-
-    def do_equals(self, modes: int):
-        a = self.get_value(modes, 1)
-        b = self.get_value(modes, 2)
-        self.put_value(modes, 3, int(a == b))
-        self.pointer += 4
-
-    def do_adjust_relative_base(self, modes: int):
-        a = self.get_value(modes, 1)
-        self.relative_base += a
-        self.pointer += 2
-
-    def do_instruction(self):
-        value = self.memory[self.pointer]
-        modes, opcode = divmod(value, 100)
-        if opcode not in self.instructions:
-            raise ValueError(f"Unknown opcode {opcode} at {self.pointer}")
-        self.instructions[opcode](modes)
+            profile.addresses[ip] += 1
+            profile.opcodes[op] += 1
+            following = ip + 1 + count
+            if op == ADD:
+                memory[addrs[2]] = args[0] + args[1]
+            elif op == MUL:
+                memory[addrs[2]] = args[0] * args[1]
+            elif op == LESS_THAN:
+                memory[addrs[2]] = int(args[0] < args[1])
+            elif op == EQUALS:
+                memory[addrs[2]] = int(args[0] == args[1])
+            elif op == JUMP_IF_TRUE or op == JUMP_IF_FALSE:
+                taken = (args[0] != 0) == (op == JUMP_IF_TRUE)
+                profile.record_branch(ip, args[1], taken)
+                if taken:
+                    following = args[1]
+            elif op == ADJUST_BASE:
+                self.relative_base += args[0]
+            elif op == INPUT:
+                memory[addrs[0]] = self.read_input()
+            elif op == OUTPUT:
+                self.outputs.append(args[0])
+                self.pointer = following
+                if stop_on_output:
+                    return OUTPUT_READY
+            elif op == HALT:
+                self.halt = True
+                return HALTED
+            self.pointer = following
+
+    def execute_translated(self, stop_on_output: bool = False) -> str | None:
+        """Run the program through its translation, as far as possible.
+
+        Return the reason for stopping, like `execute`, or None if the
+        interpreter needs to take over from the current pointer.
+        """
+        memory = self.memory
+        for _ in range(MAX_RETRANSLATIONS):
+            code = self.translation
+            if self.translated_version != memory.version:
+                code = None
+            if code is None or self.pointer not in code.entries:
+                entries = {self.pointer}
+                if code is not None:
+                    entries |= code.entries
+                code = translate(memory.cells, entries)
+                memory.ensure(code.top + 1)
+                self.translation = code
+                self.translated_version = memory.version
+
+            status, self.pointer, self.relative_base = code.run(
+                    memory.cells, self.pointer, self.relative_base,
+                    self.inputs, self.outputs, self.input_hook,
+                    stop_on_output, memory.dirty)
+            if status == HALTED:
+                self.halt = True
+                return status
+            if status == OUTPUT_READY or status == NEEDS_INPUT:
+                return status
+            if status == GROW:
+                size = len(memory)
+                self.grow_for(self.pointer, self.relative_base)
+                if len(memory) == size:
+                    return None
+            elif status == MODIFIED:
+                # The program has rewritten its own code, so this
+                # translation is no good any more.
+                self.translation = None
+                self.modifications += 1
+                if self.modifications >= MAX_MODIFICATIONS:
+                    self.translated = False
+                return None
+            elif status == FALLBACK:
+                return None
+        return None
 
     def run(self, inputs: tuple[int] = ()) -> tuple[int]:
-        self.inputs.extend(list(inputs))
-        while not self.halt:
-            self.do_instruction()
+        self.inputs.extend(inputs)
+        if not self.halt and self.execute() == NEEDS_INPUT:
+            raise IndexError("Out of input values")
         return tuple(self.outputs)
 
     def generate(self):
-        while not self.halt:
-            while not self.halt and not self.outputs:
-                self.do_instruction()
+        while True:
             if self.outputs:
-                yield self.outputs.pop(0)
+                yield self.outputs.popleft()
+                continue
+            if self.halt:
+                return
+            if self.execute(stop_on_output=True) == NEEDS_INPUT:
+                raise IndexError("Out of input values")
+
+
+# The reason for a network to stop when no computer can run, but they haven't
+# all halted.
+IDLE = 'idle'
+
+
+class Network:
+    """Run a group of computers cooperatively.
+
+    Computers are connected by channels, each a deque that serves as the
+    sending computer's outputs and the receiving computer's inputs, so
+    values pass between them without any copying. Each computer runs until
+    it halts or is blocked on input, and only computers with input waiting
+    get scheduled again.
+
+    Connect computers after resetting them, since a reset replaces their
+    input and output queues.
+    """
+    def __init__(self, computers=()):
+        self.computers = list(computers)
+        self.receivers = {}
+        self.pending = deque(range(len(self.computers)))
+        self.queued = set(self.pending)
+        self.wake = None
+
+    def add(self, computer: Computer) -> int:
+        """Add a computer to the network, and return its index."""
+        index = len(self.computers)
+        self.computers.append(computer)
+        self.schedule(index)
+        return index
+
+    def connect(self, source: int, dest: int) -> deque:
+        """Send all output from computer `source` to computer `dest`.
+
+        Anything `dest` already has queued as input stays at the front of
+        the channel. Return the channel.
+        """
+        channel = self.computers[dest].inputs
+        self.computers[source].outputs = channel
+        self.receivers[source] = dest
+        return channel
+
+    def schedule(self, index: int):
+        if index not in self.queued:
+            self.queued.add(index)
+            self.pending.append(index)
+
+    def send(self, index: int, *values: int):
+        """Queue input values for computer `index`, from outside the network.
+        """
+        self.computers[index].inputs.extend(values)
+        self.schedule(index)
+        if self.wake is not None:
+            self.wake.set()
+
+    def get_waiting(self) -> list[int]:
+        """Return the computers that are blocked on input."""
+        return [
+                i for i, comp in enumerate(self.computers)
+                if not comp.halt and not comp.inputs]
+
+    def step(self) -> bool:
+        """Give the next scheduled computer its turn.
+
+        Return False if no computer was scheduled.
+        """
+        if not self.pending:
+            return False
+        index = self.pending.popleft()
+        self.queued.discard(index)
+        comp = self.computers[index]
+        if not comp.halt:
+            comp.execute()
+            dest = self.receivers.get(index)
+            if dest is not None and self.computers[dest].inputs:
+                self.schedule(dest)
+        return True
+
+    def get_status(self) -> str:
+        if all(comp.halt for comp in self.computers):
+            return HALTED
+        return IDLE
+
+    def run(self) -> str:
+        """Run until every computer has halted, or none of them can go on.
+
+        Return HALTED if they have all halted, or IDLE if the rest are all
+        blocked on input. An idle network deadlocks, unless something from
+        outside sends it more input.
+        """
+        while self.step():
+            pass
+        return self.get_status()
+
+    async def run_async(self) -> str:
+        """Run the network as an asyncio task, until all computers halt.
+
+        The network yields to the event loop after each computer's turn.
+        When it goes idle, it waits for another task to `send` it input,
+        so a deadlocked network never returns; use `asyncio.wait_for` to
+        put a limit on it.
+        """
+        import asyncio
+
+        self.wake = asyncio.Event()
+        try:
+            while True:
+                while self.step():
+                    await asyncio.sleep(0)
+                if self.get_status() == HALTED:
+                    return HALTED
+                self.wake.clear()
+                await self.wake.wait()
+        finally:
+            self.wake = None
+
+
+# State for parameter sweeps, set up once in each worker process.
+_sweep_computer = None
+_sweep_evaluate = None
+
+
+def _init_sweep(program: tuple[int], evaluate):
+    global _sweep_computer, _sweep_evaluate
+    _sweep_computer = Computer()
+    _sweep_computer.program = program
+    _sweep_evaluate = evaluate
+
+
+def _sweep_chunk(chunk: list[tuple]) -> list[tuple]:
+    """Evaluate a chunk of (index, param) pairs on a freshly reset computer.
+    """
+    results = []
+    for index, param in chunk:
+        _sweep_computer.reset()
+        results.append((index, _sweep_evaluate(_sweep_computer, param)))
+    return results
+
+
+def _sweep_first(chunk: list[tuple]) -> tuple | None:
+    """Return the first (index, value) in a chunk whose value isn't None."""
+    for index, param in chunk:
+        _sweep_computer.reset()
+        value = _sweep_evaluate(_sweep_computer, param)
+        if value is not None:
+            return (index, value)
+    return None
+
+
+def _is_better(reduce: str, new: tuple, old: tuple | None) -> bool:
+    """Return whether (index, value) `new` beats `old` under `reduce`.
+
+    Ties go to the earlier index, so the result doesn't depend on which
+    worker finishes first.
+    """
+    if old is None:
+        return True
+    if new[1] == old[1]:
+        return new[0] < old[0]
+    return (new[1] > old[1]) == (reduce == 'max')
+
+
+def sweep(
+        program,
+        params,
+        evaluate,
+        reduce: str = 'max',
+        workers: int | None = None,
+        chunksize: int = 8) -> tuple | None:
+    """Run a program once for each parameter, and reduce the results.
+
+    `program` is a Computer, or a program string or tuple of values. For
+    each param in `params`, `evaluate(computer, param)` is called with a
+    computer that has just been reset to the original program, and should
+    return a value, or None if the param doesn't count.
+
+    `reduce` is 'max' or 'min' to find the best value, or 'first' to find
+    the first param, in order, with a value that isn't None. Return
+    (param, value), or None if no param counted.
+
+    The runs are shared out in chunks across a pool of worker processes,
+    one per CPU core by default, and each worker is sent the program just
+    once. `evaluate` must be a module-level function, or a partial of one,
+    so that the workers can unpickle it. With only one worker, everything
+    runs in this process. When looking for the first match, the chunks go
+    through `util.find_first`, so chunks after it are cancelled as soon as
+    every chunk before it has finished.
+    """
+    if reduce not in ('max', 'min', 'first'):
+        raise ValueError(f"Unknown reduction {reduce!r}")
+    if isinstance(program, Computer):
+        program = program.program
+    elif isinstance(program, str):
+        program = Computer(program).program
+    params = list(params)
+    items = list(enumerate(params))
+    chunks = [
+            items[i:i + chunksize]
+            for i in range(0, len(items), chunksize)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if len(chunks) <= 1:
+        workers = 1
+
+    if reduce == 'first':
+        found = find_first(
+                _sweep_first, chunks, workers,
+                _init_sweep, (program, evaluate))
+        if found is None:
+            return None
+        index, value = found[1]
+        return (params[index], value)
+
+    best = None
+    if workers <= 1:
+        _init_sweep(program, evaluate)
+        for chunk in chunks:
+            for index, value in _sweep_chunk(chunk):
+                if value is not None and _is_better(
+                        reduce, (index, value), best):
+                    best = (index, value)
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_sweep,
+                initargs=(program, evaluate)) as pool:
+            futures = [pool.submit(_sweep_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                for index, value in future.result():
+                    if value is not None and _is_better(
+                            reduce, (index, value), best):
+                        best = (index, value)
+
+    if best is None:
+        return None
+    return (params[best[0]], best[1])
@@ -1,126 +1,96 @@
 #!/usr/bin/env python
-from util import timing, Direction
+from util import timing, Direction, Grid2D
 
 
-def get_total_load(pattern: list[list]) -> int:
-    result = 0
-    i = 1
-    for row in reversed(pattern):
-        result += row.count('O') * i
-        i += 1
-    return result
-
-
-def pivot(rows: list[list]) -> list[list]:
-    """Translate columns into rows."""
-    return [[row[x] for row in rows] for x in range(len(rows[0]))]
+ROCK = ord('O')
+CUBE = ord('#')
+SPACE = ord('.')
+SPIN = (Direction.NORTH, Direction.WEST, Direction.SOUTH, Direction.EAST)
 
 
-def flip(rows: list[list]) -> list[list]:
-    """Reverse every row."""
-    return [list(reversed(x)) for x in rows]
-
+def get_total_load(grid: Grid2D) -> int:
+    result = 0
+    for y in range(grid.height):
+        result += grid.get_row(y).count(ROCK) * (grid.height - y)
+    return result
 
-def slide_rocks(row: list) -> list:
-    """Slide all rocks in `row` as far WEST as possible."""
-    space = 0
-    rocks = 0
-    start = 0
-    row = list(row)
-    for i, ch in enumerate(row):
-        if ch == '.':
-            space += 1
-        elif ch == 'O':
-            rocks += 1
-        else:
-            if rocks and space:
-                part = ['O'] * rocks + ['.'] * space
-                end = start + rocks + space
-                row = row[:start] + part + row[end:]
-            start = i + 1
-            space = 0
-            rocks = 0
-    if rocks and space:
-        part = ['O'] * rocks + ['.'] * space
-        end = start + rocks + space
-        row = row[:start] + part + row[end:]
-    return row
 
+def get_lines(grid: Grid2D, direction: Direction) -> tuple[list, int, int]:
+    """Return the lines that rocks roll along when tilted in `direction`.
 
-def rotate(
-        rows: list[list],
-        direction: Direction,
-        reverse: bool = False,
-        ) -> list[list]:
+    The result is the index of the first cell of each line, on the edge that
+    the rocks roll towards, the step from one cell to the next heading away
+    from that edge, and the number of cells in each line.
+    """
+    h = grid.height
+    w = grid.width
     if direction == Direction.NORTH:
-        return pivot(rows)
-    if direction == Direction.EAST:
-        return flip(rows)
+        return [grid.index(0, x) for x in range(w)], grid.stride, h
     if direction == Direction.SOUTH:
-        if reverse:
-            return pivot(flip(rows))
-        else:
-            return flip(pivot(rows))
-    # West doesn't need any transformation
-    return rows
-
-
-def tilt(rows: list[list], direction: Direction) -> list[list]:
-    rotated = rotate(rows, direction)
-    result = []
-    for i, row in enumerate(rotated):
-        result.append(slide_rocks(row))
-    return rotate(result, direction, reverse=True)
-
-
-def to_string(rows: list[list]) -> str:
-    return '\n'.join([''.join(row) for row in rows])
+        return [grid.index(h - 1, x) for x in range(w)], -grid.stride, h
+    if direction == Direction.WEST:
+        return [grid.index(y, 0) for y in range(h)], 1, w
+    return [grid.index(y, w - 1) for y in range(h)], -1, w
+
+
+def tilt(grid: Grid2D, direction: Direction):
+    """Slide all rocks in `grid` as far as possible in `direction`."""
+    cells = grid.cells
+    starts, step, length = get_lines(grid, direction)
+    for i in starts:
+        free = i
+        for _ in range(length):
+            ch = cells[i]
+            if ch == ROCK:
+                if i != free:
+                    cells[free] = ROCK
+                    cells[i] = SPACE
+                free += step
+            elif ch == CUBE:
+                free = i + step
+            i += step
+
+
+def spin(grid: Grid2D):
+    for direction in SPIN:
+        tilt(grid, direction)
 
 
 def run(stream, test=False):
-    rows = []
-    for line in stream:
-        row = list(line.strip())
-        if row:
-            rows.append(row)
+    lines = [line.strip() for line in stream]
+    grid = Grid2D.from_lines(lines, pad=1, border=CUBE)
 
     # Part 1
     with timing("Part 1"):
-        tilted = tilt(rows, Direction.NORTH)
+        tilted = grid.copy()
+        tilt(tilted, Direction.NORTH)
         load1 = get_total_load(tilted)
     print(f"Result for Part 1 = {load1}\n")
 
     # Part 2
-    results = []
     limit = 1000000000
     with timing("Part 2\n"):
+        snapshot = grid.snapshot()
+        seen = {snapshot: 0}
+        history = [snapshot]
         cycles = 0
-        results.append(rows)
         while cycles < limit:
-            rows = tilt(rows, Direction.NORTH)
-            rows = tilt(rows, Direction.WEST)
-            rows = tilt(rows, Direction.SOUTH)
-            rows = tilt(rows, Direction.EAST)
-            if rows == results[-1]:
-                # If it's the same every cycle, no need to keep going
-                break
+            spin(grid)
             cycles += 1
-            matches = [i for i, x in enumerate(results) if x == rows]
-            if matches:
+            snapshot = grid.snapshot()
+            if snapshot in seen:
                 # Loop detected
-                start = matches[0]
+                start = seen[snapshot]
                 diff = cycles - start
                 print(
                     f"Cycle {cycles} matched {start} -- "
                     f"looping every {diff} cycles")
                 index = ((limit - start) % diff) + start
-                if index < cycles:
-                    rows = results[index]
-                    print(f"Found target result at {index}")
-                    break
-                limit = index
-                print(f"Continuing until we get to {index} ...")
-            results.append(rows)
-        load2 = get_total_load(rows)
+                print(f"Found target result at {index}")
+                grid.cells = bytearray(history[index])
+                break
+            seen[snapshot] = cycles
+            history.append(snapshot)
+        load2 = get_total_load(grid)
     print(f"Result for Part 2 = {load2}\n")
     return (load1, load2)
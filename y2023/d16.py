@@ -1,108 +1,77 @@
 #!/usr/bin/env python
-from util import timing, Direction
+from util import timing, Direction, Grid2D
 
 
-VECTORS = {
-        Direction.NORTH: (-1,  0),
-        Direction.SOUTH:  (1,  0),
-        Direction.EAST:   (0,  1),
-        Direction.WEST:   (0, -1),
+# Directions are numbered in the same order as Grid2D.adjacent.
+HEADINGS = {
+        Direction.NORTH: 0,
+        Direction.EAST: 1,
+        Direction.SOUTH: 2,
+        Direction.WEST: 3,
         }
-MIRRORS = {
-        '\\': {
-            Direction.NORTH: Direction.WEST,
-            Direction.SOUTH: Direction.EAST,
-            Direction.EAST:  Direction.SOUTH,
-            Direction.WEST:  Direction.NORTH,
-            },
-        '/': {
-            Direction.NORTH: Direction.EAST,
-            Direction.SOUTH: Direction.WEST,
-            Direction.EAST:  Direction.NORTH,
-            Direction.WEST:  Direction.SOUTH,
-            },
+# For each tile, the heading(s) a beam leaves on, by the heading it arrived on.
+TURNS = {
+        ord('.'): ((0,), (1,), (2,), (3,)),
+        ord('\\'): ((3,), (2,), (1,), (0,)),
+        ord('/'): ((1,), (0,), (3,), (2,)),
+        ord('|'): ((0,), (0, 2), (2,), (0, 2)),
+        ord('-'): ((1, 3), (1,), (1, 3), (3,)),
         }
-SPLITTERS = {
-        #    ({directions affected}, (output directions))
-        '|': (
-            {Direction.EAST, Direction.WEST},
-            (Direction.NORTH, Direction.SOUTH),
-            ),
-        '-': (
-            {Direction.NORTH, Direction.SOUTH},
-            (Direction.EAST, Direction.WEST),
-            ),
-        }
-
-
-def in_bounds(rows: list, position: tuple[int]) -> bool:
-    y, x = position
-    return y >= 0 and y < len(rows) and x >= 0 and x < len(rows[0])
-
-
-def move(position: tuple[int], direction: Direction) -> tuple[int]:
-    v = VECTORS[direction]
-    return (position[0] + v[0], position[1] + v[1])
-
-
-def run_beam(
-        rows: list,
-        tiles: dict,
-        position: tuple[int],
-        direction: Direction,
-        ) -> None:
-    while in_bounds(rows, position):
-        if direction in tiles.get(position, set()):
-            # A beam has already trod this path, exit.
-            return
-        tiles.setdefault(position, set()).add(direction)
-
-        y, x = position
-        tile = rows[y][x]
-
-        match tile:
-            case '\\' | '/':
-                direction = MIRRORS[tile][direction]
-            case '|' | '-':
-                if direction in SPLITTERS[tile][0]:
-                    directions = SPLITTERS[tile][1]
-                    direction = directions[0]
-                    run_beam(rows, tiles, position, directions[1])
-
-        position = move(position, direction)
+EDGE = 0
 
 
 def count_tiles(
-        rows: list,
+        grid: Grid2D,
         position: tuple[int],
         direction: Direction,
-        ) -> None:
-    tiles = {}
-    run_beam(rows, tiles, position, direction)
-    return len(tiles)
+        ) -> int:
+    """Return the number of tiles energised by a beam entering at `position`.
+
+    Each cell of `seen` holds a bit for every heading a beam has passed
+    through it on, so that we can stop following a beam once it retraces a
+    path. The grid is padded with EDGE cells, where beams leave.
+    """
+    cells = grid.cells
+    offsets = grid.adjacent
+    seen = bytearray(len(cells))
+    stack = [(grid.index(*position), HEADINGS[direction])]
+    while stack:
+        i, heading = stack.pop()
+        while cells[i] != EDGE:
+            bit = 1 << heading
+            if seen[i] & bit:
+                # A beam has already trod this path, exit.
+                break
+            seen[i] |= bit
+            headings = TURNS[cells[i]][heading]
+            heading = headings[0]
+            if len(headings) > 1:
+                other = headings[1]
+                stack.append((i + offsets[other], other))
+            i += offsets[heading]
+    return len(seen) - seen.count(0)
 
 
 def run(stream, test=False):
-    rows = []
-    for line in stream:
-        rows.append(line.strip())
+    grid = Grid2D.from_lines(
+            [line.strip() for line in stream], pad=1, border=EDGE)
 
     # Part 1
     with timing("Part 1"):
-        count = count_tiles(rows, (0, 0), Direction.EAST)
+        count = count_tiles(grid, (0, 0), Direction.EAST)
     print(f"Result for Part 1 = {count}\n")
 
     # Part 2
     with timing("Part 2"):
         results = []
-        width = len(rows[0])
-        height = len(rows)
+        width = grid.width
+        height = grid.height
         for x in range(width):
-            results.append(count_tiles(rows, (0, x), Direction.SOUTH))
-            results.append(count_tiles(rows, (height - 1, x), Direction.NORTH))
+            results.append(count_tiles(grid, (0, x), Direction.SOUTH))
+            results.append(count_tiles(grid, (height - 1, x), Direction.NORTH))
         for y in range(height):
-            results.append(count_tiles(rows, (y, 0), Direction.EAST))
-            results.append(count_tiles(rows, (y, width - 1), Direction.WEST))
+            results.append(count_tiles(grid, (y, 0), Direction.EAST))
+            results.append(count_tiles(grid, (y, width - 1), Direction.WEST))
         result = max(results)
     print(f"Result for Part 2 = {result}\n")
     return (count, result)
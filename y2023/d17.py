@@ -1,8 +1,7 @@
 #!/usr/bin/env python
-import heapq
-from collections import defaultdict, namedtuple
+from collections import namedtuple
 
-from util import timing, Direction
+from util import timing, Direction, astar
 
 
 VECTORS = {
@@ -43,44 +42,6 @@ def get_min_distance(a: tuple[int], b: tuple[int]) -> int:
 Node = namedtuple('node', ['y', 'x', 'd', 'r'])
 
 
-class PriorityQueue:
-    def __init__(self):
-        self.queue = []
-        self.finder = {}
-        self.deleted = set()
-
-    def __len__(self):
-        return len(self.queue)
-
-    def __bool__(self):
-        return bool(self.finder)
-
-    def push(self, node, priority):
-        entry = (priority, node)
-        heapq.heappush(self.queue, entry)
-        self.finder[node] = entry
-
-    def has_node(self, node):
-        return node in self.finder
-
-    def has_position(self, position):
-        return position in {(n.y, n.x) for n in self.finder.keys()}
-
-    def set_priority(self, node, priority):
-        if node in self.finder:
-            self.deleted.add(id(self.finder[node]))
-        self.push(node, priority)
-
-    def pop(self):
-        while self.queue:
-            entry = heapq.heappop(self.queue)
-            if id(entry) not in self.deleted:
-                del self.finder[entry[1]]
-                return entry
-            self.deleted.discard(id(entry))
-        raise KeyError('Cannot pop from empty priority queue')
-
-
 def get_neighbours(
         node: Node,
         height: int,
@@ -141,36 +102,20 @@ def find_path_astar(rows: list, min_run: int = 0, max_run: int = 3) -> int:
     height = len(rows)
     width = len(rows[0])
 
-    def inf() -> float:
-        return float('inf')
-
     start = Node(0, 0, Direction.EAST, 0)
     dest = Node(height - 1, width - 1, Direction.EAST, 0)
-    nodes = PriorityQueue()
-    nodes.push(start, get_min_distance(start, dest))
-    origins = {}
-    g = defaultdict(inf)
-    f = defaultdict(inf)
-    g[start] = 0
-
-    while nodes:
-        heat, current = nodes.pop()
-        if current[:2] == dest[:2]:
-            return heat
 
+    def expand(current: Node):
         neighbours = get_neighbours(current, height, width, min_run, max_run)
-        for neighbour in neighbours:
-            score = g[current] + get_cost(rows, current, neighbour)
-            if score < g[neighbour]:
-                # Best path to the neighbour so far
-                origins[neighbour] = current
-                g[neighbour] = score
-                dist = get_min_distance(neighbour, dest)
-                fscore = score + dist
-
-                f[neighbour] = fscore
-                nodes.set_priority(neighbour, fscore)
-    print("Ran out of nodes without finding the destination!")
+        return ((n, get_cost(rows, current, n)) for n in neighbours)
+
+    result = astar(
+            start, expand,
+            lambda node: get_min_distance(node, dest),
+            is_goal=lambda node: node[:2] == dest[:2])
+    if result.found is None:
+        print("Ran out of nodes without finding the destination!")
+    return result.distance
 
 
 def run(stream, test=False):
@@ -1,9 +1,7 @@
 #!/usr/bin/env python
 from collections import namedtuple
 
-from rich import print
-
-from util import timing, Point
+from util import timing, Point, rich_print as print
 
 
 Segment = namedtuple('segment', ['start', 'end', 'length', 'choices'])
@@ -3,9 +3,7 @@ from collections import namedtuple
 from fractions import Fraction
 from itertools import combinations
 
-from rich import print
-
-from util import timing
+from util import timing, rich_print as print
 
 
 Line = namedtuple('line', ['a', 'b'])
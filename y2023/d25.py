@@ -2,9 +2,7 @@
 from collections import defaultdict
 from itertools import pairwise
 
-from rich import print
-
-from util import timing
+from util import bfs, timing, rich_print as print
 
 
 class Graph:
@@ -56,24 +54,16 @@ class Graph:
         assert start != end
         if blocked is None:
             blocked = set()
-        q = [[start]]
-        explored = {start}
-        while q:
-            path = q.pop(0)
-            node = path[-1]
-            for neighbour in self.neighbours[node]:
-                edge = frozenset({node, neighbour})
-                if edge in blocked:
-                    continue
-                if neighbour == end:
-                    path.append(end)
-                    edges = [frozenset({a, b}) for a, b in pairwise(path)]
-                    return edges
-                if neighbour in explored:
-                    continue
-                explored.add(neighbour)
-                q.append(path + [neighbour])
-        return None
+
+        def get_neighbours(node):
+            return (
+                    n for n in self.neighbours[node]
+                    if frozenset({node, n}) not in blocked)
+
+        result = bfs((start,), get_neighbours, end, paths=True)
+        if result.found is None:
+            return None
+        return [frozenset({a, b}) for a, b in pairwise(result.get_path())]
 
     def get_edge_distinct_paths(self, a: str, b: str) -> list:
         """Return all edge-distinct paths between two nodes.
@@ -126,16 +116,7 @@ class Graph:
 
         The result includes `start` itself.
         """
-        q = [start]
-        explored = {start}
-        while q:
-            node = q.pop(0)
-            for neighbour in self.neighbours[node]:
-                if neighbour in explored:
-                    continue
-                explored.add(neighbour)
-                q.append(neighbour)
-        return explored
+        return set(bfs((start,), self.neighbours.__getitem__).cost)
 
     def get_subgraphs(self) -> set:
         """Get each of the disconnected subgraphs in this graph.